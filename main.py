@@ -3,8 +3,23 @@ import sys
 import os
 import time
 import argparse
+from collections import deque
+from datetime import datetime, timedelta
 from src.config import Config
 from src.recognition import load_encodings, recognize_faces
+from src.gallery import FaceGallery
+from src.store import store_checksum, store_generation
+from src.ann import prepare_index
+from src.tracker import FaceTracker
+from src.motion import MotionDetector
+from src.detectors import create_detector
+from src.quality import FaceQualityGate
+from src.pipeline import RecognitionPipeline
+from src.workers import RecognitionPool
+from src.multicam import MultiCameraOrchestrator, parse_sources
+from src.reload import GalleryReloader
+from src.metrics import MetricsRegistry, MetricsServer, StatsReporter
+from src.sources import is_recorded_source, iter_timed_frames, source_fps
 from src.utils import setup_signal_handler, draw_face_info, release_resources, validate_camera, setup_logging, handle_error
 from src.logger import AccessLogger
 
@@ -14,8 +29,360 @@ def parse_arguments():
     parser.add_argument('--no-log', action='store_true', help='Desactiva el registro de accesos')
     parser.add_argument('--report', action='store_true', help='Genera un reporte de accesos al finalizar')
     parser.add_argument('--report-format', choices=['csv', 'json'], default='csv', help='Formato del reporte')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Procesos de reconocimiento en paralelo (0 = un solo hilo; por defecto Config.RECOGNITION_WORKERS)')
+    parser.add_argument('--cameras', help='Fuentes separadas por comas para el modo multicámara (ej. "0,1,rtsp://...")')
+    parser.add_argument('--source', help='Vídeo, directorio de frames o URL de stream a procesar en lugar de la cámara')
+    parser.add_argument('--headless', action='store_true', help='Sin ventanas ni teclado (servidores sin pantalla)')
+    parser.add_argument('--output-video', help='Guarda el vídeo anotado con los rostros reconocidos')
+    parser.add_argument('--source-start', type=lambda value: datetime.strptime(value, "%Y-%m-%d %H:%M:%S"),
+                        help='Hora de inicio de la grabación ("AAAA-MM-DD HH:MM:SS") para fechar los accesos; '
+                             'por defecto, el momento en que empieza el procesado')
+    parser.add_argument('--fps', type=float, default=None,
+                        help='Frames por segundo de un directorio de frames (por defecto 25) o del vídeo anotado')
+    parser.add_argument('--metrics', action='store_true',
+                        help='Activa las métricas por etapa y el endpoint /metrics (por defecto Config.METRICS_ENABLED)')
     return parser.parse_args()
 
+def create_tracker(config):
+    """Crea el tracker de rostros configurado, o None si está desactivado"""
+    if not config.TRACKING_ENABLED:
+        return None
+    return FaceTracker(
+        iou_threshold=config.TRACK_IOU_THRESHOLD,
+        reencode_interval=config.TRACK_REENCODE_INTERVAL,
+        max_move=config.TRACK_MAX_MOVE,
+        max_scale_change=config.TRACK_MAX_SCALE_CHANGE,
+        max_missed=config.TRACK_MAX_MISSED
+    )
+
+def create_face_detector(config):
+    """Crea el detector de rostros configurado en Config.FACE_DETECTOR"""
+    return create_detector(config.FACE_DETECTOR, **config.detector_params())
+
+def create_quality_gate(config):
+    """Crea el filtro de calidad de rostros configurado, o None si está desactivado"""
+    if not config.FACE_QUALITY_GATING:
+        return None
+    return FaceQualityGate(**config.quality_params())
+
+def create_motion_detector(config):
+    """Crea el detector de movimiento configurado, o None si está desactivado"""
+    if not config.MOTION_GATING:
+        return None
+    return MotionDetector(
+        thumb_width=config.MOTION_THUMB_WIDTH,
+        threshold=config.MOTION_THRESHOLD,
+        min_area=config.MOTION_MIN_AREA,
+        learning_rate=config.MOTION_LEARNING_RATE,
+        max_coverage=config.MOTION_MAX_COVERAGE,
+        full_detect_interval=config.MOTION_FULL_DETECT_INTERVAL
+    )
+
+def generate_final_report(args, access_logger):
+    """
+    Genera el reporte de accesos del día al finalizar si se solicitó
+
+    Si se procesó una grabación con --source-start, el reporte empieza el día de la grabación.
+    """
+    if args.report and access_logger:
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start_date = today
+        if getattr(args, 'source_start', None):
+            start_date = min(today, args.source_start.replace(hour=0, minute=0, second=0, microsecond=0))
+        report_path = access_logger.generate_report(
+            format_type=args.report_format,
+            start_date=start_date,
+            end_date=today + timedelta(days=1, seconds=-1)
+        )
+        if report_path:
+            print(f"Reporte generado: {report_path}")
+
+def close_access_logger(access_logger):
+    """Vacía la cola de registros pendientes y muestra las estadísticas de escritura"""
+    if not access_logger:
+        return
+    access_logger.close()
+    stats = access_logger.stats()
+    if stats:
+        print(f"Registro de accesos: {stats['records_written']} registros en {stats['batches']} lotes "
+              f"(lote medio {stats['avg_batch_size']:.1f}, volcado medio {stats['avg_flush_ms']:.2f} ms)")
+
+def start_gallery_reloader(gallery, config):
+    """Arranca la recarga en caliente de la galería, o devuelve None si está desactivada"""
+    if config.GALLERY_RELOAD_INTERVAL <= 0:
+        return None
+    reloader = GalleryReloader(
+        config.ENCODINGS_FILE,
+        gallery,
+        search_index=config.SEARCH_INDEX,
+        index_file=config.INDEX_FILE,
+        index_params=config.index_params(),
+        poll_interval=config.GALLERY_RELOAD_INTERVAL
+    )
+    reloader.start()
+    return reloader
+
+def start_metrics(config):
+    """
+    Crea el registro de métricas y arranca el endpoint HTTP y la línea periódica configurados
+    
+    Returns:
+        tuple: (MetricsRegistry o None si están desactivadas, servicios arrancados)
+    """
+    if not config.METRICS_ENABLED:
+        return None, []
+    registry = MetricsRegistry(window=config.METRICS_WINDOW)
+    services = []
+    if config.METRICS_PORT:
+        try:
+            server = MetricsServer(registry, host=config.METRICS_HOST, port=config.METRICS_PORT)
+            server.start()
+            services.append(server)
+            print(f"Métricas disponibles en http://{config.METRICS_HOST}:{server.port}/metrics")
+        except OSError as e:
+            print(f"ADVERTENCIA: No se pudo abrir el endpoint de métricas en el puerto {config.METRICS_PORT}: {e}")
+    if config.METRICS_REPORT_INTERVAL > 0:
+        reporter = StatsReporter(registry, interval=config.METRICS_REPORT_INTERVAL)
+        reporter.start()
+        services.append(reporter)
+    return registry, services
+
+def stop_metrics(registry, services):
+    """Detiene los servicios de métricas y muestra el resumen final"""
+    for service in services:
+        service.stop()
+    if registry is not None:
+        for line in registry.stats_lines():
+            print(line)
+
+def process_recording(source, gallery, config, access_logger, args, num_workers=0):
+    """
+    Procesa un vídeo o directorio de frames grabado a máxima velocidad, sin descartar frames
+    
+    Los accesos se fechan con la hora de cada frame en la grabación (--source-start más su
+    posición), de modo que la agrupación de eventos sigue el tiempo de la grabación y no el
+    de procesado. Termina al llegar al final de la fuente.
+    
+    Args:
+        source (str): Ruta del vídeo o del directorio de frames; se registra como camera_id
+        gallery (FaceGallery): Galería de rostros conocidos
+        config (Config): Configuración del sistema
+        access_logger (AccessLogger, optional): Logger de accesos
+        args (argparse.Namespace): Argumentos (headless, output_video, source_start, fps)
+        num_workers (int): Procesos de reconocimiento (0 = en el proceso principal, con tracker)
+    """
+    start_time = args.source_start or datetime.now()
+    fps = args.fps or source_fps(source)
+    metrics, metrics_services = start_metrics(config)
+    camera_metrics = metrics.camera(source) if metrics is not None else None
+    
+    pool = None
+    if num_workers > 0:
+        print(f"Iniciando {num_workers} procesos de reconocimiento...")
+        pool = RecognitionPool(
+            num_workers,
+            config.ENCODINGS_FILE,
+            index_file=config.INDEX_FILE,
+            search_index=config.SEARCH_INDEX,
+            index_params=config.index_params(),
+            tolerance=config.FACE_RECOGNITION_TOLERANCE,
+            access_logger=access_logger,
+            detector_backend=config.FACE_DETECTOR,
+            detector_params=config.detector_params(),
+            quality_params=config.quality_params() if config.FACE_QUALITY_GATING else None,
+            timings=camera_metrics
+        )
+    else:
+        tracker = create_tracker(config)
+        motion_detector = create_motion_detector(config)
+        detector = create_face_detector(config)
+        quality_gate = create_quality_gate(config)
+    
+    writer = None
+    frames = 0
+    processing_start = time.time()
+    
+    def show(frame, face_info):
+        """Dibuja, guarda y muestra un frame ya reconocido; devuelve False si se pidió salir"""
+        nonlocal writer
+        if args.headless and not args.output_video:
+            return True
+        start = time.perf_counter()
+        frame = draw_face_info(frame, face_info)
+        if args.output_video:
+            if writer is None:
+                height, width = frame.shape[:2]
+                writer = cv2.VideoWriter(args.output_video, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+            writer.write(frame)
+        if camera_metrics is not None:
+            camera_metrics.add('draw', time.perf_counter() - start)
+        if args.headless:
+            return True
+        start = time.perf_counter()
+        cv2.imshow(config.WINDOW_NAME, frame)
+        key = cv2.waitKey(1) & 0xFF
+        if camera_metrics is not None:
+            camera_metrics.add('display', time.perf_counter() - start)
+        return key != ord('q')
+    
+    print(f"Procesando {source}...")
+    try:
+        pending = deque()
+        frame_iter = iter_timed_frames(source, fps=fps)
+        while True:
+            start = time.perf_counter()
+            item = next(frame_iter, None)
+            if item is None:
+                break
+            if camera_metrics is not None:
+                camera_metrics.add('grab', time.perf_counter() - start)
+            offset, frame = item
+            timestamp = start_time + timedelta(seconds=offset) if offset is not None else None
+            
+            if pool is None:
+                results = recognize_faces(
+                    frame,
+                    gallery,
+                    gallery.names,
+                    tolerance=config.FACE_RECOGNITION_TOLERANCE,
+                    access_logger=access_logger,
+                    camera_id=source,
+                    tracker=tracker,
+                    motion_detector=motion_detector,
+                    detector=detector,
+                    quality_gate=quality_gate,
+                    timings=camera_metrics,
+                    timestamp=timestamp
+                )
+                if camera_metrics is not None:
+                    camera_metrics.observe_results(results)
+                frames += 1
+                if not show(frame, results):
+                    break
+                continue
+            
+            # Varios frames en vuelo; los resultados llegan en el orden de envío
+            pool.submit(frame, source, timestamp)
+            pending.append(frame)
+            if pool.in_flight >= 2 * pool.num_workers:
+                _, results = pool.next_result()
+                frames += 1
+                if not show(pending.popleft(), results):
+                    break
+        
+        while pool is not None and pool.in_flight:
+            _, results = pool.next_result()
+            frames += 1
+            show(pending.popleft(), results)
+    except KeyboardInterrupt:
+        print("\nPrograma interrumpido por el usuario")
+    except Exception:
+        # Tras un error no se espera a los frames en vuelo
+        if pool is not None:
+            pool.terminate()
+        raise
+    finally:
+        elapsed = time.time() - processing_start
+        print(f"Frames procesados: {frames} en {elapsed:.1f} s ({frames / elapsed if elapsed else 0:.1f} frames/s)")
+        if writer is not None:
+            writer.release()
+            print(f"Vídeo anotado guardado en: {args.output_video}")
+        if pool is not None:
+            pool.close()
+        stop_metrics(metrics, metrics_services)
+        if not args.headless:
+            release_resources()
+
+def run_multi_camera(sources, gallery, config, access_logger, headless=False):
+    """
+    Ejecuta el modo multicámara: un bucle de captura por fuente, una galería compartida
+    y un planificador de reconocimiento equitativo entre cámaras
+    
+    Args:
+        sources (list): Fuentes de vídeo; cada una se registra como camera_id
+        gallery (FaceGallery): Galería compartida por todas las cámaras
+        config (Config): Configuración del sistema
+        access_logger (AccessLogger, optional): Logger de accesos
+        headless (bool): Sin ventanas; se termina con Ctrl+C o cuando no queda ninguna cámara
+    """
+    # Un tracker por cámara; la galería es la misma para todas
+    trackers = {source: create_tracker(config) for source in sources}
+    motion_detectors = {source: create_motion_detector(config) for source in sources}
+    detectors = {source: create_face_detector(config) for source in sources}
+    quality_gate = create_quality_gate(config)
+    reloader = start_gallery_reloader(gallery, config)
+    metrics, metrics_services = start_metrics(config)
+    
+    def recognize(frame, camera_id):
+        # Una sola lectura de la galería vigente por frame
+        current = reloader.gallery if reloader else gallery
+        camera_metrics = metrics.camera(camera_id) if metrics is not None else None
+        results = recognize_faces(
+            frame,
+            current,
+            current.names,
+            tolerance=config.FACE_RECOGNITION_TOLERANCE,
+            access_logger=access_logger,
+            camera_id=camera_id,
+            tracker=trackers[camera_id],
+            motion_detector=motion_detectors[camera_id],
+            detector=detectors[camera_id],
+            quality_gate=quality_gate,
+            timings=camera_metrics
+        )
+        if camera_metrics is not None:
+            camera_metrics.observe_results(results)
+        return results
+    
+    print(f"Iniciando {len(sources)} cámaras...")
+    orchestrator = MultiCameraOrchestrator(
+        sources,
+        recognize,
+        frame_width=config.FRAME_WIDTH,
+        frame_height=config.FRAME_HEIGHT,
+        num_threads=config.MULTICAM_RECOGNITION_THREADS,
+        metrics=metrics
+    ).start()
+    
+    print("Sistema iniciado. " + ("Presiona Ctrl+C para salir." if headless else "Presiona 'q' para salir."))
+    
+    try:
+        while orchestrator.alive:
+            new_frames = orchestrator.wait_new_frames(timeout=1.0)
+            if headless:
+                for source in orchestrator.failed_sources():
+                    print(f"[ERROR] Cámara {source} desconectada")
+                continue
+            
+            for camera_id, frame, face_info in new_frames:
+                start = time.perf_counter()
+                frame = draw_face_info(frame.copy(), face_info)
+                draw_time = time.perf_counter() - start
+                cv2.imshow(f"{config.WINDOW_NAME} - {camera_id}", frame)
+                if metrics is not None:
+                    camera_metrics = metrics.camera(camera_id)
+                    camera_metrics.add('draw', draw_time)
+                    camera_metrics.add('display', time.perf_counter() - start - draw_time)
+            
+            for source in orchestrator.failed_sources():
+                print(f"[ERROR] Cámara {source} desconectada")
+            
+            # Salir con 'q'
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord('q'):
+                print("Cerrando el programa...")
+                break
+    except KeyboardInterrupt:
+        print("\nPrograma interrumpido por el usuario")
+    finally:
+        orchestrator.stop()
+        if reloader is not None:
+            reloader.stop()
+        stop_metrics(metrics, metrics_services)
+        if not headless:
+            release_resources()
+
 def main():
     # Parsear argumentos
     args = parse_arguments()
@@ -29,7 +396,7 @@ def main():
     # Inicializar logger de accesos
     access_logger = None
     if not args.no_log:
-        access_logger = AccessLogger(log_dir=log_dir)
+        access_logger = AccessLogger(log_dir=log_dir, **Config.access_log_params())
         print(f"Registro de accesos activado. Logs en: {log_dir}")
     
     # Configurar manejador de señales
@@ -38,38 +405,140 @@ def main():
     try:
         # Inicializar configuración
         config = Config()
+        if args.metrics:
+            config.METRICS_ENABLED = True
         
         # Verificar directorios necesarios
         os.makedirs(config.EMPLOYEES_DIR, exist_ok=True)
         os.makedirs(os.path.dirname(config.ENCODINGS_FILE), exist_ok=True)
         
         # Cargar encodings conocidos
-        known_face_encodings, known_face_names = load_encodings(config.ENCODINGS_FILE)
+        known_face_encodings, known_face_names = load_encodings(
+            config.ENCODINGS_FILE, legacy_file=config.LEGACY_ENCODINGS_FILE
+        )
+        
+        # Construir la galería una sola vez (matriz float32 mapeada en memoria, sin copia)
+        gallery = FaceGallery(known_face_encodings, known_face_names, checksum=store_checksum(config.ENCODINGS_FILE),
+                              generation=store_generation(config.ENCODINGS_FILE))
+        gallery.index = prepare_index(gallery, config.SEARCH_INDEX, config.INDEX_FILE, **config.index_params())
         
-        if not known_face_encodings:
+        if len(gallery) == 0:
             print("ADVERTENCIA: No hay empleados registrados en el sistema.")
             print("Utilice el script add_employee.py para añadir empleados.")
+            if args.headless:
+                # Sin terminal interactiva no se puede preguntar, y sin galería no hay nada que reconocer
+                print("Programa terminado.")
+                return
             print("¿Desea continuar de todos modos? (s/n)")
             response = input().lower()
             if response != 's' and response != 'si':
                 print("Programa terminado.")
                 return
         
-        # Validar cámara
-        if not validate_camera(config.CAMERA_ID):
-            handle_error(
-                Exception(f"No se pudo acceder a la cámara con ID {config.CAMERA_ID}"),
-                "Verifique que la cámara esté conectada y no esté siendo utilizada por otra aplicación",
-                exit_code=1
+        num_workers = args.workers if args.workers is not None else config.RECOGNITION_WORKERS
+        
+        # Grabaciones (vídeo o directorio de frames): se procesan enteras a máxima velocidad
+        if args.source and is_recorded_source(args.source):
+            try:
+                process_recording(args.source, gallery, config, access_logger, args, num_workers=num_workers)
+            finally:
+                generate_final_report(args, access_logger)
+                close_access_logger(access_logger)
+            print("Sistema finalizado.")
+            sys.exit(0)
+        
+        # Fuentes de vídeo: --source, --cameras, Config.CAMERA_SOURCES o la cámara por defecto
+        sources = (parse_sources(args.source) or parse_sources(args.cameras)
+                   or parse_sources(config.CAMERA_SOURCES) or [config.CAMERA_ID])
+        camera_id = sources[0]
+        
+        # Validar cámaras
+        for source in sources:
+            if not validate_camera(source):
+                handle_error(
+                    Exception(f"No se pudo acceder a la cámara con ID {source}"),
+                    "Verifique que la cámara esté conectada y no esté siendo utilizada por otra aplicación",
+                    exit_code=1
+                )
+        
+        # Modo multicámara en un solo proceso con la galería compartida
+        if len(sources) > 1:
+            try:
+                run_multi_camera(sources, gallery, config, access_logger, headless=args.headless)
+            finally:
+                generate_final_report(args, access_logger)
+                close_access_logger(access_logger)
+            print("Sistema finalizado.")
+            sys.exit(0)
+        
+        # Tracker para no re-codificar rostros ya identificados y detector de movimiento
+        # para no buscar rostros en frames estáticos
+        tracker = create_tracker(config)
+        motion_detector = create_motion_detector(config)
+        detector = create_face_detector(config)
+        quality_gate = create_quality_gate(config)
+        
+        # Recarga en caliente: la galería nueva se prepara en segundo plano y se publica entre frames
+        reloader = start_gallery_reloader(gallery, config)
+        
+        # Tiempos por etapa y contadores de la cámara
+        metrics, metrics_services = start_metrics(config)
+        camera_metrics = metrics.camera(camera_id) if metrics is not None else None
+        
+        # Función de reconocimiento que ejecuta la etapa de reconocimiento del pipeline
+        def recognize(frame):
+            current = reloader.gallery if reloader else gallery
+            results = recognize_faces(
+                frame, 
+                current, 
+                current.names, 
+                tolerance=config.FACE_RECOGNITION_TOLERANCE,
+                access_logger=access_logger,
+                camera_id=camera_id,
+                tracker=tracker,
+                motion_detector=motion_detector,
+                detector=detector,
+                quality_gate=quality_gate,
+                timings=camera_metrics
+            )
+            if camera_metrics is not None:
+                camera_metrics.observe_results(results)
+            return results
+        
+        # Pool de procesos de reconocimiento (cada uno carga la galería al arrancar)
+        pool = None
+        if num_workers > 0:
+            print(f"Iniciando {num_workers} procesos de reconocimiento...")
+            pool = RecognitionPool(
+                num_workers,
+                config.ENCODINGS_FILE,
+                index_file=config.INDEX_FILE,
+                search_index=config.SEARCH_INDEX,
+                index_params=config.index_params(),
+                tolerance=config.FACE_RECOGNITION_TOLERANCE,
+                access_logger=access_logger,
+                reloader=reloader,
+                detector_backend=config.FACE_DETECTOR,
+                detector_params=config.detector_params(),
+                quality_params=config.quality_params() if config.FACE_QUALITY_GATING else None,
+                timings=camera_metrics
             )
         
-        # Inicializar la cámara
+        # Inicializar el pipeline: captura y reconocimiento en hilos separados
         print("Iniciando cámara...")
-        cap = cv2.VideoCapture(config.CAMERA_ID)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.FRAME_WIDTH)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.FRAME_HEIGHT)
+        pipeline = RecognitionPipeline(
+            camera_id,
+            recognize,
+            frame_width=config.FRAME_WIDTH,
+            frame_height=config.FRAME_HEIGHT,
+            queue_size=config.RECOGNITION_QUEUE_SIZE,
+            pool=pool,
+            timings=camera_metrics
+        ).start()
         
-        print("Sistema iniciado. Presiona 'q' para salir.")
+        if args.output_video:
+            print("ADVERTENCIA: --output-video solo se aplica a vídeos y directorios de frames grabados")
+        print("Sistema iniciado. " + ("Presiona Ctrl+C para salir." if args.headless else "Presiona 'q' para salir."))
         
         frame_count = 0
         fps_start_time = time.time()
@@ -77,24 +546,13 @@ def main():
         
         try:
             while True:
-                # Capturar frame
-                ret, frame = cap.read()
-                if not ret:
-                    print("Error al capturar el frame. Reintentando...")
-                    # Reintentar unas cuantas veces antes de rendirse
-                    for _ in range(3):
-                        time.sleep(0.5)
-                        cap.release()
-                        cap = cv2.VideoCapture(config.CAMERA_ID)
-                        ret, frame = cap.read()
-                        if ret:
-                            break
-                    
-                    if not ret:
-                        handle_error(
-                            Exception("No se pudo recuperar la conexión con la cámara"),
-                            exit_code=1
-                        )
+                # Esperar el siguiente frame capturado
+                item = pipeline.next_frame(timeout=1.0)
+                if item is None:
+                    if pipeline.failed:
+                        handle_error(pipeline.grabber.error, exit_code=1)
+                    continue
+                _, frame = item
                 
                 # Calcular FPS
                 frame_count += 1
@@ -104,28 +562,30 @@ def main():
                     frame_count = 0
                     fps_start_time = end_time
                 
-                # Reconocer rostros en el frame
-                face_info = recognize_faces(
-                    frame, 
-                    known_face_encodings, 
-                    known_face_names, 
-                    tolerance=config.FACE_RECOGNITION_TOLERANCE,
-                    access_logger=access_logger,
-                    camera_id=config.CAMERA_ID
-                )
+                # Sin pantalla no hay nada que dibujar: los accesos se registran en la etapa de reconocimiento
+                if args.headless:
+                    continue
                 
-                # Dibujar información en el frame
-                frame = draw_face_info(frame, face_info)
+                # Dibujar los últimos resultados de reconocimiento sobre una copia del frame
+                # (la etapa de reconocimiento puede estar leyendo el original)
+                start = time.perf_counter()
+                frame = draw_face_info(frame.copy(), pipeline.latest_results())
                 
-                # Mostrar FPS
+                # Mostrar FPS de visualización y de reconocimiento
                 cv2.putText(frame, f"FPS: {fps:.2f}", (10, 30), 
                             cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+                cv2.putText(frame, f"Reconocimiento: {pipeline.recognizer.fps:.2f} FPS", (10, 55), 
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+                draw_time = time.perf_counter() - start
                 
                 # Mostrar el frame
                 cv2.imshow(config.WINDOW_NAME, frame)
                 
                 # Salir con 'q'
                 key = cv2.waitKey(1) & 0xFF
+                if camera_metrics is not None:
+                    camera_metrics.add('draw', draw_time)
+                    camera_metrics.add('display', time.perf_counter() - start - draw_time)
                 if key == ord('q'):
                     print("Cerrando el programa...")
                     break
@@ -134,15 +594,24 @@ def main():
             print("\nPrograma interrumpido por el usuario")
         except Exception as e:
             handle_error(e, "Error durante la ejecución del programa")
+            # Tras un error no se espera a los frames en vuelo
+            if pool is not None:
+                pool.terminate()
         finally:
-            # Generar reporte si se solicitó
-            if args.report and access_logger:
-                report_path = access_logger.generate_report(format_type=args.report_format)
-                if report_path:
-                    print(f"Reporte generado: {report_path}")
+            # Detener el pipeline y liberar recursos antes de cerrar el log, para que
+            # los accesos de los frames que aún estaban en curso no se pierdan
+            pipeline.stop()
+            if reloader is not None:
+                reloader.stop()
+            if pool is not None:
+                pool.close()
+            stop_metrics(metrics, metrics_services)
+            if not args.headless:
+                release_resources()
             
-            # Liberar recursos
-            release_resources(cap)
+            # Generar reporte si se solicitó y vaciar los registros pendientes
+            generate_final_report(args, access_logger)
+            close_access_logger(access_logger)
             
     except Exception as e:
         handle_error(e, "Error al inicializar el programa", exit_code=1)
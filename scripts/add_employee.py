@@ -10,12 +10,14 @@ import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.config import Config
 from src.recognition import capture_employee_photos, generate_encodings
+from src.detectors import create_detector
 from src.utils import validate_camera, handle_error
 
 @click.command()
 @click.argument('name')
 @click.option('--num-photos', default=5, help='Número de fotos a capturar')
-def main(name, num_photos):
+@click.option('--full-rebuild', is_flag=True, help='Ignora la caché y vuelve a codificar todas las fotos')
+def main(name, num_photos, full_rebuild):
     """Script para añadir un nuevo empleado al sistema"""
     try:
         print(f"Añadiendo nuevo empleado: {name}")
@@ -49,10 +51,20 @@ def main(name, num_photos):
             config.FRAME_WIDTH, 
             config.FRAME_HEIGHT, 
             config.EMPLOYEES_DIR, 
-            num_photos
+            num_photos,
+            detector=create_detector(config.FACE_DETECTOR, **config.detector_params())
         ):
             # Generar encodings
-            num_encodings = generate_encodings(config.EMPLOYEES_DIR, config.ENCODINGS_FILE)
+            num_encodings = generate_encodings(
+                config.EMPLOYEES_DIR,
+                config.ENCODINGS_FILE,
+                index_file=config.INDEX_FILE,
+                index_backend=config.SEARCH_INDEX,
+                index_params=config.index_params(),
+                full_rebuild=full_rebuild,
+                workers=config.ENCODING_WORKERS,
+                chunk_size=config.ENCODING_CHUNK_SIZE
+            )
             
             if num_encodings > 0:
                 print(f"\nProceso completado. Total de encodings: {num_encodings}")
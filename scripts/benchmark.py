@@ -0,0 +1,172 @@
+import os
+import sys
+import json
+import time
+import platform
+import click
+from datetime import datetime
+from tabulate import tabulate
+
+# Añadir el directorio raíz al path para poder importar desde src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.config import Config
+from src.sources import iter_frames
+from src.detectors import DETECTOR_BACKENDS, create_detector
+from src.ann import INDEX_BACKENDS
+from src.tracker import FaceTracker
+from src.motion import MotionDetector
+from src.quality import FaceQualityGate
+from src.logger import AccessLogger
+from src.recognition import load_encodings
+from src.benchmark import (run_benchmark, prepare_synthetic_gallery, encode_benchmark_faces, compare_results,
+                           git_revision)
+from src.utils import handle_error
+
+@click.command()
+@click.option('--source', 'sources', multiple=True, required=True,
+              help='Vídeo o directorio de frames a reproducir (se puede repetir)')
+@click.option('--gallery-size', 'gallery_sizes', type=int, multiple=True,
+              help='Tamaños de galería sintética (por defecto 1, 100, 10000 y 100000)')
+@click.option('--max-frames', type=int, default=300, help='Frames máximos leídos de cada fuente')
+@click.option('--warmup', type=int, default=5, help='Frames iniciales que no se miden')
+@click.option('--detector', type=click.Choice(list(DETECTOR_BACKENDS)), default=None,
+              help='Detector de rostros (por defecto Config.FACE_DETECTOR)')
+@click.option('--index', 'search_index', type=click.Choice(list(INDEX_BACKENDS)), default=None,
+              help='Índice de búsqueda (por defecto Config.SEARCH_INDEX)')
+@click.option('--known-faces', type=click.Choice(['frames', 'gallery', 'none']), default='frames',
+              help='Rostros reales de la galería: los de los frames, los de la galería de empleados o ninguno')
+@click.option('--tracking/--no-tracking', default=None, help='Seguimiento entre frames (por defecto, según Config)')
+@click.option('--motion/--no-motion', default=None, help='Detección condicionada al movimiento (por defecto, según Config)')
+@click.option('--quality/--no-quality', default=None, help='Filtro de calidad de rostros (por defecto, según Config)')
+@click.option('--log/--no-log', 'log_access', default=True, help='Registra los accesos en un directorio temporal')
+@click.option('--output', help='Archivo JSON donde guardar los resultados')
+@click.option('--baseline', type=click.Path(exists=True), help='Resultados JSON anteriores con los que comparar')
+def main(sources, gallery_sizes, max_frames, warmup, detector, search_index, known_faces, tracking, motion,
+         quality, log_access, output, baseline):
+    """Mide el reconocimiento sobre vídeos o imágenes grabados, sin cámara ni pantalla"""
+    try:
+        config = Config()
+        gallery_sizes = gallery_sizes or (1, 100, 10000, 100000)
+        detector = detector or config.FACE_DETECTOR
+        search_index = search_index or config.SEARCH_INDEX
+        tracking = config.TRACKING_ENABLED if tracking is None else tracking
+        motion = config.MOTION_GATING if motion is None else motion
+        quality = config.FACE_QUALITY_GATING if quality is None else quality
+
+        # Decodificar antes de medir para que la lectura del vídeo no cuente en las latencias
+        frames = []
+        start = time.perf_counter()
+        for source in sources:
+            frames.extend(iter_frames(source, max_frames=max_frames))
+        decode_time = time.perf_counter() - start
+        if len(frames) <= warmup:
+            print(f"Se necesitan más de {warmup} frames; se leyeron {len(frames)}.")
+            return
+        print(f"Frames cargados: {len(frames)} ({decode_time:.1f} s de lectura)")
+
+        face_detector = create_detector(detector, **config.detector_params(detector))
+        quality_gate = FaceQualityGate(**config.quality_params()) if quality else None
+        
+        # Rostros reales en la galería para que el benchmark recorra también las coincidencias
+        # y el registro de accesos; el resto de la galería es sintético
+        if known_faces == 'frames':
+            known_encodings, known_names = encode_benchmark_faces(frames, detector=face_detector)
+        elif known_faces == 'gallery':
+            known_encodings, known_names = load_encodings(config.ENCODINGS_FILE, legacy_file=config.LEGACY_ENCODINGS_FILE)
+        else:
+            known_encodings, known_names = [], []
+        print(f"Rostros reales en la galería: {len(known_names)}")
+        if known_faces != 'none' and not len(known_names):
+            print("ADVERTENCIA: Sin rostros reales ningún rostro coincidirá; las etapas match y log no medirán accesos.")
+
+        def tracker_factory():
+            return FaceTracker(
+                iou_threshold=config.TRACK_IOU_THRESHOLD,
+                reencode_interval=config.TRACK_REENCODE_INTERVAL,
+                max_move=config.TRACK_MAX_MOVE,
+                max_scale_change=config.TRACK_MAX_SCALE_CHANGE,
+                max_missed=config.TRACK_MAX_MISSED
+            )
+
+        def motion_factory():
+            return MotionDetector(
+                thumb_width=config.MOTION_THUMB_WIDTH,
+                threshold=config.MOTION_THRESHOLD,
+                min_area=config.MOTION_MIN_AREA,
+                learning_rate=config.MOTION_LEARNING_RATE,
+                max_coverage=config.MOTION_MAX_COVERAGE,
+                full_detect_interval=config.MOTION_FULL_DETECT_INTERVAL
+            )
+
+        def logger_factory(log_dir):
+            return AccessLogger(log_dir=log_dir, **config.access_log_params())
+
+        runs = []
+        for size in gallery_sizes:
+            gallery, index_time = prepare_synthetic_gallery(size, search_index, config.index_params(),
+                                                            known_encodings=known_encodings, known_names=known_names)
+            run = run_benchmark(
+                frames, gallery,
+                tolerance=config.FACE_RECOGNITION_TOLERANCE,
+                detector=face_detector,
+                tracker_factory=tracker_factory if tracking else None,
+                motion_factory=motion_factory if motion else None,
+                quality_gate=quality_gate,
+                logger_factory=logger_factory if log_access else None,
+                warmup=warmup
+            )
+            run['index_build_s'] = round(index_time, 3)
+            runs.append(run)
+            print(f"Galería de {size} encodings: {run['frames_per_s']} frames/s, {run['faces_per_s']} rostros/s")
+
+        report = {
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'revision': git_revision(),
+            'machine': {'platform': platform.platform(), 'python': platform.python_version(), 'cpus': os.cpu_count()},
+            'sources': list(sources),
+            'frames': len(frames),
+            'warmup': warmup,
+            'decode_s': round(decode_time, 3),
+            'settings': {
+                'detector': detector,
+                'search_index': search_index,
+                'known_faces': known_faces,
+                'known_faces_count': len(known_names),
+                'tracking': tracking,
+                'motion_gating': motion,
+                'quality_gating': quality,
+                'log_access': log_access,
+                'tolerance': config.FACE_RECOGNITION_TOLERANCE
+            },
+            'runs': runs
+        }
+
+        # Resumen por etapa y tamaño de galería
+        stages = ['resize', 'cvtcolor', 'detect', 'quality', 'encode', 'match', 'log']
+        rows = []
+        for run in runs:
+            for stage in stages:
+                summary = run['stages'].get(stage)
+                if summary:
+                    rows.append([run['gallery_size'], stage, summary['count'], summary['p50_ms'],
+                                 summary['p95_ms'], summary['p99_ms']])
+            frame = run['frame']
+            rows.append([run['gallery_size'], 'frame', frame['count'], frame['p50_ms'], frame['p95_ms'], frame['p99_ms']])
+        print(tabulate(rows, headers=['galería', 'etapa', 'muestras', 'p50 ms', 'p95 ms', 'p99 ms'], tablefmt='psql'))
+
+        if baseline:
+            with open(baseline, 'r', encoding='utf-8') as f:
+                comparison = compare_results(report, json.load(f))
+            print("\nComparación con la referencia:")
+            print(tabulate(comparison, headers=['galería', 'frames/s ref.', 'frames/s', 'variación %',
+                                                'p95 ref. (ms)', 'p95 (ms)'], tablefmt='psql'))
+
+        if output:
+            with open(output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"Resultados guardados en: {output}")
+    except Exception as e:
+        handle_error(e, "Error al ejecutar el benchmark", exit_code=1)
+
+if __name__ == '__main__':
+    main()
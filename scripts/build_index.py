@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import click
+from tabulate import tabulate
+
+# Añadir el directorio raíz al path para poder importar desde src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.config import Config
+from src.recognition import load_encodings
+from src.gallery import FaceGallery
+from src.store import store_checksum
+from src.ann import INDEX_BACKENDS, build_index, save_index, evaluate_recall
+from src.utils import handle_error
+
+@click.command()
+@click.option('--backend', 'backends', multiple=True, type=click.Choice(list(INDEX_BACKENDS)),
+              help='Backends a evaluar (por defecto, todos)')
+@click.option('--nprobe', type=int, multiple=True, help='Valores de nprobe a comparar para ivf/ivfpq')
+@click.option('--queries', 'num_queries', type=int, default=1000, help='Número de consultas de prueba')
+@click.option('--save', is_flag=True, help='Guarda el índice del backend configurado en Config.SEARCH_INDEX')
+def main(backends, nprobe, num_queries, save):
+    """Compara los backends de búsqueda (recall frente a búsqueda exacta y latencia)"""
+    try:
+        config = Config()
+        encodings, names = load_encodings(config.ENCODINGS_FILE)
+        gallery = FaceGallery(encodings, names, checksum=store_checksum(config.ENCODINGS_FILE))
+
+        if len(gallery) == 0:
+            print("No hay encodings registrados.")
+            return
+
+        params = config.index_params()
+        rows = []
+        for backend in backends or list(INDEX_BACKENDS):
+            probes = nprobe if backend in ('ivf', 'ivfpq') and nprobe else (params['nprobe'],)
+            for probe in probes:
+                start = time.perf_counter()
+                index = build_index(gallery, backend, **dict(params, nprobe=probe))
+                build_time = time.perf_counter() - start
+
+                metrics = evaluate_recall(gallery, index, num_queries=num_queries)
+                rows.append([
+                    backend,
+                    probe if backend in ('ivf', 'ivfpq') else '-',
+                    f"{metrics['recall']:.4f}",
+                    f"{metrics['index_ms']:.3f}",
+                    f"{metrics['exact_ms']:.3f}",
+                    f"{metrics['speedup']:.1f}x",
+                    f"{build_time:.1f}"
+                ])
+
+                if save and backend == config.SEARCH_INDEX and hasattr(index, 'to_arrays'):
+                    save_index(index, gallery, config.INDEX_FILE)
+                    print(f"Índice '{backend}' guardado en: {config.INDEX_FILE}")
+
+        print(f"\nGalería: {len(gallery)} encodings")
+        print(tabulate(rows, headers=['backend', 'nprobe', 'recall@1', 'ms/consulta',
+                                      'ms exacta', 'aceleración', 'construcción (s)'],
+                       tablefmt='psql'))
+    except Exception as e:
+        handle_error(e, "Error al construir el índice", exit_code=1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+import os
+import sys
+import time
+import click
+import cv2
+import numpy as np
+from tabulate import tabulate
+
+# Añadir el directorio raíz al path para poder importar desde src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.config import Config
+from src.detectors import DETECTOR_BACKENDS, create_detector, match_detections
+from src.utils import handle_error
+
+def find_images(images_dir):
+    """Rutas de las imágenes de un directorio (recursivo) en orden estable"""
+    paths = []
+    for root, _, files in os.walk(images_dir):
+        for file_name in files:
+            if file_name.lower().endswith(('.png', '.jpg', '.jpeg')):
+                paths.append(os.path.join(root, file_name))
+    return sorted(paths)
+
+def run_detector(detector, images):
+    """
+    Ejecuta un detector sobre todas las imágenes
+
+    Returns:
+        tuple: (cajas por imagen, latencias en ms por imagen)
+    """
+    detections, latencies = [], []
+    for image in images:
+        start = time.perf_counter()
+        detections.append(list(detector(image)))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return detections, latencies
+
+@click.command()
+@click.option('--images', 'images_dir', default=None, help='Directorio de imágenes (por defecto Config.EMPLOYEES_DIR)')
+@click.option('--backend', 'backends', multiple=True, type=click.Choice(list(DETECTOR_BACKENDS)),
+              help='Detectores a evaluar (por defecto, todos)')
+@click.option('--reference', default='hog', type=click.Choice(list(DETECTOR_BACKENDS)),
+              help='Detector de referencia para medir la coincidencia de cajas')
+@click.option('--resize', type=float, default=0.25, help='Factor de redimensionado (el mismo que en el reconocimiento)')
+def main(images_dir, backends, reference, resize):
+    """Compara los detectores de rostros (latencia, fotos con rostro y coincidencia con la referencia)"""
+    try:
+        config = Config()
+        images_dir = images_dir or config.EMPLOYEES_DIR
+
+        paths = find_images(images_dir)
+        if not paths:
+            print(f"No se encontraron imágenes en: {images_dir}")
+            return
+
+        # Las fotos se redimensionan igual que los frames de la cámara antes de detectar
+        images = []
+        for path in paths:
+            image = cv2.imread(path)
+            if image is None:
+                continue
+            image = cv2.resize(image, (0, 0), fx=resize, fy=resize)
+            images.append(np.ascontiguousarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB)))
+
+        backends = list(backends or DETECTOR_BACKENDS)
+        if reference not in backends:
+            backends.insert(0, reference)
+
+        results = {}
+        for backend in backends:
+            try:
+                detector = create_detector(backend, **config.detector_params(backend))
+            except Exception as e:
+                print(f"Detector '{backend}' no disponible: {e}")
+                continue
+            results[backend] = run_detector(detector, images)
+
+        if reference not in results:
+            print(f"El detector de referencia '{reference}' no está disponible.")
+            return
+
+        reference_boxes = results[reference][0]
+        total_reference = sum(len(boxes) for boxes in reference_boxes)
+        rows = []
+        for backend, (detections, latencies) in results.items():
+            # Cada foto de empleado contiene un único rostro
+            with_face = sum(1 for boxes in detections if boxes)
+            matched = sum(match_detections(boxes, ref) for boxes, ref in zip(detections, reference_boxes))
+            rows.append([
+                backend,
+                f"{np.mean(latencies):.1f}",
+                f"{np.percentile(latencies, 95):.1f}",
+                f"{with_face / len(images):.3f}",
+                sum(len(boxes) for boxes in detections),
+                f"{matched / total_reference:.3f}" if total_reference else '-'
+            ])
+
+        print(f"\nImágenes: {len(images)} (factor de redimensionado {resize})")
+        print(tabulate(rows, headers=['detector', 'ms/imagen', 'p95 ms', 'fotos con rostro',
+                                      'rostros', f'coincidencia con {reference}'],
+                       tablefmt='psql'))
+    except Exception as e:
+        handle_error(e, "Error al comparar los detectores", exit_code=1)
+
+if __name__ == '__main__':
+    main()
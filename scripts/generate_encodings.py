@@ -0,0 +1,38 @@
+import os
+import sys
+import click
+
+# Añadir el directorio raíz al path para poder importar desde src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.config import Config
+from src.recognition import generate_encodings
+from src.utils import handle_error
+
+@click.command()
+@click.option('--full-rebuild', is_flag=True, help='Ignora la caché y vuelve a codificar todas las fotos')
+@click.option('--workers', type=int, default=None, help='Procesos en paralelo (0 = en serie; por defecto Config.ENCODING_WORKERS)')
+@click.option('--chunk-size', type=int, default=None, help='Fotos por bloque de trabajo en el modo paralelo')
+def main(full_rebuild, workers, chunk_size):
+    """Genera (de forma incremental) los encodings de todas las fotos de empleados"""
+    try:
+        config = Config()
+        num_encodings = generate_encodings(
+            config.EMPLOYEES_DIR,
+            config.ENCODINGS_FILE,
+            index_file=config.INDEX_FILE,
+            index_backend=config.SEARCH_INDEX,
+            index_params=config.index_params(),
+            full_rebuild=full_rebuild,
+            workers=config.ENCODING_WORKERS if workers is None else workers,
+            chunk_size=chunk_size or config.ENCODING_CHUNK_SIZE
+        )
+
+        if num_encodings > 0:
+            print(f"\nProceso completado. Total de encodings: {num_encodings}")
+        else:
+            print("\nNo se pudieron generar encodings. Verifique las fotos de los empleados.")
+    except Exception as e:
+        handle_error(e, "Error al generar encodings", exit_code=1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+import os
+import sys
+import click
+
+# Añadir el directorio raíz al path para poder importar desde src
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.config import Config
+from src.store import migrate_pickle_store, open_gallery_store, is_gallery_store
+from src.utils import handle_error
+
+@click.command()
+@click.option('--source', default=None, help='Archivo .pkl heredado (por defecto Config.LEGACY_ENCODINGS_FILE)')
+@click.option('--dest', default=None, help='Directorio de la galería binaria (por defecto Config.ENCODINGS_FILE)')
+@click.option('--force', is_flag=True, help='Sobrescribe la galería binaria si ya existe')
+def main(source, dest, force):
+    """Migra el archivo pickle de encodings a la galería binaria mapeable en memoria"""
+    try:
+        config = Config()
+        source = source or config.LEGACY_ENCODINGS_FILE
+        dest = dest or config.ENCODINGS_FILE
+
+        if not os.path.exists(source):
+            handle_error(FileNotFoundError(source), f"No se encontró el archivo {source}", exit_code=1)
+
+        if is_gallery_store(dest) and not force:
+            print(f"La galería {dest} ya existe. Use --force para sobrescribirla.")
+            return
+
+        count = migrate_pickle_store(source, dest)
+
+        # Verificar la galería escrita (incluido el checksum)
+        matrix, names, header = open_gallery_store(dest, verify=True)
+        print(f"Verificación correcta: {header['count']} encodings de dimensión {header['dim']}")
+        if count != len(names):
+            handle_error(ValueError("El número de encodings migrados no coincide"), exit_code=1)
+    except Exception as e:
+        handle_error(e, "Error al migrar los encodings", exit_code=1)
+
+if __name__ == '__main__':
+    main()
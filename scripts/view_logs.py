@@ -1,5 +1,6 @@
 import os
 import sys
+import glob
 import click
 import pandas as pd
 from datetime import datetime, timedelta
@@ -8,7 +9,16 @@ from tabulate import tabulate
 
 # Añadir el directorio raíz al path para poder importar desde src
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from src.logger import AccessLogger
+from src.config import Config
+from src.logger import AccessLogger, convert_json_to_jsonl, read_log_entries
+from src.log_store import SQLiteLogStore, DB_FILE
+from src.rollups import merge_rollups
+
+def open_logger():
+    """Abre el registro de accesos configurado, solo para consultas"""
+    return AccessLogger(
+        log_format=Config.ACCESS_LOG_FORMAT, backend=Config.ACCESS_LOG_BACKEND, rollups=True
+    )
 
 @click.group()
 def cli():
@@ -19,61 +29,77 @@ def cli():
 @click.option('--name', help='Filtrar por nombre')
 @click.option('--days', type=int, default=7, help='Número de días a mostrar')
 @click.option('--access-type', type=click.Choice(['PERMITIDO', 'DENEGADO']), help='Tipo de acceso')
-def list(name, days, access_type):
+@click.option('--camera', help='Filtrar por cámara')
+@click.option('--limit', type=int, help='Número máximo de registros a mostrar')
+@click.option('--offset', type=int, default=0, help='Registros a saltar (paginación)')
+@click.option('--page-size', type=click.IntRange(min=1), default=100, help='Registros por tabla impresa')
+def list(name, days, access_type, camera, limit, offset, page_size):
     """Lista los registros de acceso"""
-    logger = AccessLogger()
+    logger = open_logger()
     
     # Calcular fecha de inicio
     start_date = datetime.now() - timedelta(days=days)
     
-    # Obtener registros
-    records = logger.get_access_history(
+    # Recorrer los registros sin cargarlos todos en memoria
+    records = logger.iter_access_history(
         name=name,
         start_date=start_date,
-        access_type=access_type
+        access_type=access_type,
+        camera_id=int(camera) if camera and camera.isdigit() else camera,
+        limit=limit,
+        offset=offset
     )
     
-    if not records:
+    # Mostrar resultados por páginas a medida que se leen
+    total = 0
+    page = []
+    for record in records:
+        if total == 0:
+            print(f"\nRegistros de acceso (últimos {days} días):")
+        total += 1
+        page.append(record)
+        if len(page) >= page_size:
+            print(tabulate(page, headers='keys', tablefmt='psql'))
+            page = []
+    if page:
+        print(tabulate(page, headers='keys', tablefmt='psql'))
+    
+    if not total:
         print("No se encontraron registros que coincidan con los criterios.")
         return
-    
-    # Convertir a DataFrame para mejor visualización
-    df = pd.DataFrame(records)
-    
-    # Mostrar resultados
-    print(f"\nRegistros de acceso (últimos {days} días):")
-    print(tabulate(df, headers='keys', tablefmt='psql', showindex=False))
-    print(f"\nTotal de registros: {len(records)}")
+    print(f"\nTotal de registros: {total}")
 
 @cli.command()
 @click.option('--days', type=int, default=7, help='Número de días a analizar')
 @click.option('--output', help='Ruta para guardar el gráfico')
-def stats(days, output):
+@click.option('--rebuild', is_flag=True, help='Recalcula los contadores desde los registros originales')
+def stats(days, output, rebuild):
     """Muestra estadísticas de acceso"""
-    logger = AccessLogger()
+    logger = open_logger()
     
     # Calcular fecha de inicio
     start_date = datetime.now() - timedelta(days=days)
     
-    # Obtener registros
-    records = logger.get_access_history(start_date=start_date)
+    # Contadores diarios agregados (solo se leen registros originales para reconstruirlos)
+    rollups = logger.get_rollups(start_date=start_date, rebuild=rebuild)
     
-    if not records:
+    if not any(rollup['records'] for rollup in rollups.values()):
         print("No se encontraron registros para el período especificado.")
         return
     
-    # Convertir a DataFrame
-    df = pd.DataFrame(records)
-    
-    # Convertir timestamp a datetime
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    
     # Estadísticas por día
-    df['fecha'] = df['timestamp'].dt.date
-    daily_stats = df.groupby(['fecha', 'acceso']).size().unstack(fill_value=0)
-    
-    # Estadísticas por usuario
-    user_stats = df.groupby(['nombre', 'acceso']).size().unstack(fill_value=0)
+    daily_stats = pd.DataFrame.from_dict(
+        {datetime.strptime(day, "%Y%m%d").date(): rollup['acceso'] for day, rollup in rollups.items()},
+        orient='index'
+    ).fillna(0).astype(int).sort_index()
+    daily_stats.index.name = 'fecha'
+    
+    # Estadísticas por usuario y por cámara y hora
+    totals = merge_rollups(rollups.values())
+    user_stats = pd.DataFrame.from_dict(totals['usuarios'], orient='index').fillna(0).astype(int).sort_index()
+    user_stats.index.name = 'nombre'
+    camera_stats = pd.DataFrame.from_dict(totals['camaras'], orient='index').fillna(0).astype(int).sort_index(axis=1)
+    camera_stats.index.name = 'camara_id'
     
     # Mostrar estadísticas
     print("\nEstadísticas de acceso por día:")
@@ -82,6 +108,9 @@ def stats(days, output):
     print("\nEstadísticas de acceso por usuario:")
     print(tabulate(user_stats, headers='keys', tablefmt='psql'))
     
+    print("\nAccesos por cámara y hora:")
+    print(tabulate(camera_stats, headers='keys', tablefmt='psql'))
+    
     # Crear gráficos
     plt.figure(figsize=(12, 10))
     
@@ -114,7 +143,7 @@ def stats(days, output):
 @click.option('--output', help='Ruta del archivo de salida')
 def report(format_type, output):
     """Genera un reporte de accesos"""
-    logger = AccessLogger()
+    logger = open_logger()
     report_path = logger.generate_report(output_file=output, format_type=format_type)
     
     if report_path:
@@ -122,5 +151,75 @@ def report(format_type, output):
     else:
         print("Error al generar el reporte.")
 
+@cli.command()
+@click.option('--log-dir', default='logs', help='Directorio de los registros')
+@click.option('--keep-json', is_flag=True, help='Conserva los archivos .json originales')
+def convert(log_dir, keep_json):
+    """Convierte los registros en formato array JSON a JSONL"""
+    json_files = sorted(glob.glob(os.path.join(log_dir, "accesos_*.json")))
+    if not json_files:
+        print("No se encontraron registros en formato JSON para convertir.")
+        return
+    
+    total = 0
+    for json_path in json_files:
+        try:
+            count = convert_json_to_jsonl(json_path, remove_source=not keep_json)
+        except Exception as e:
+            print(f"Error al convertir {json_path}: {e}")
+            continue
+        total += count
+        print(f"{os.path.basename(json_path)}: {count} registros convertidos")
+    
+    print(f"\nTotal de registros convertidos: {total}")
+
+@cli.command()
+@click.option('--older-than', type=int, default=1, help='Archiva los días con al menos esta antigüedad (en días)')
+@click.option('--keep-raw', is_flag=True, help='Conserva los archivos CSV y JSONL originales')
+def archive(older_than, keep_raw):
+    """Compacta los días cerrados en el archivo columnar comprimido (logs/archive)"""
+    logger = open_logger()
+    before_day = (datetime.now() - timedelta(days=max(older_than, 1) - 1)).strftime("%Y%m%d")
+    try:
+        archived = logger.archive_closed_days(before_day=before_day, remove_raw=not keep_raw)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    
+    if not archived:
+        print("No hay días pendientes de archivar.")
+        return
+    
+    rows = [
+        [day, records, f"{raw_bytes / 1024:.1f}", f"{archive_bytes / 1024:.1f}"]
+        for day, records, raw_bytes, archive_bytes in archived
+    ]
+    print(tabulate(rows, headers=['día', 'registros', 'original (KB)', 'archivado (KB)'], tablefmt='psql'))
+
+@cli.command(name='import-db')
+@click.option('--log-dir', default='logs', help='Directorio de los registros')
+def import_db(log_dir):
+    """Importa los registros JSONL/JSON diarios a la base de datos SQLite"""
+    log_files = sorted(glob.glob(os.path.join(log_dir, "accesos_*.jsonl")) + glob.glob(os.path.join(log_dir, "accesos_*.json")))
+    if not log_files:
+        print("No se encontraron registros para importar.")
+        return
+    
+    store = SQLiteLogStore(os.path.join(log_dir, DB_FILE))
+    total = 0
+    for log_path in log_files:
+        # Los archivos solo crecen por el final: se importan los registros que no se importaron antes
+        source = os.path.basename(log_path)
+        entries = read_log_entries(log_path)
+        new_entries = entries[store.imported_count(source):]
+        if new_entries:
+            store.write(new_entries, source=source)
+        total += len(new_entries)
+        print(f"{source}: {len(new_entries)} registros importados ({len(entries) - len(new_entries)} ya estaban)")
+    store.close()
+    
+    print(f"\nTotal de registros importados: {total}")
+    print("Active el backend con Config.ACCESS_LOG_BACKEND = \"sqlite\"")
+
 if __name__ == '__main__':
     cli()
\ No newline at end of file
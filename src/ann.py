@@ -0,0 +1,429 @@
+import os
+import time
+import hashlib
+import numpy as np
+from src.index import CentroidIndex
+
+# Tamaño de bloque para calcular distancias sin reservar matrices enormes
+_CHUNK_SIZE = 8192
+
+def _squared_distances(points, centroids):
+    """Distancias euclídeas al cuadrado entre cada punto y cada centroide"""
+    sq = (np.einsum('ij,ij->i', points, points)[:, None]
+          + np.einsum('ij,ij->i', centroids, centroids)[None, :]
+          - 2.0 * (points @ centroids.T))
+    np.maximum(sq, 0.0, out=sq)
+    return sq
+
+def _assign(points, centroids):
+    """Asigna cada punto a su centroide más cercano procesando por bloques"""
+    labels = np.empty(len(points), dtype=np.intp)
+    for start in range(0, len(points), _CHUNK_SIZE):
+        block = points[start:start + _CHUNK_SIZE]
+        labels[start:start + len(block)] = np.argmin(_squared_distances(block, centroids), axis=1)
+    return labels
+
+def kmeans(points, num_clusters, iterations=20, max_train_points=65536, seed=0):
+    """
+    Entrena k-means (Lloyd) sobre los puntos indicados usando solo NumPy
+
+    Args:
+        points (numpy.ndarray): Matriz de puntos (N x d)
+        num_clusters (int): Número de centroides
+        iterations (int): Número de iteraciones de Lloyd
+        max_train_points (int): Máximo de puntos usados para entrenar (submuestreo)
+        seed (int): Semilla para la inicialización
+
+    Returns:
+        numpy.ndarray: Matriz de centroides float32 (num_clusters x d)
+    """
+    rng = np.random.default_rng(seed)
+    points = np.asarray(points, dtype=np.float32)
+    num_clusters = max(1, min(num_clusters, len(points)))
+
+    if len(points) > max_train_points:
+        points = points[rng.choice(len(points), max_train_points, replace=False)]
+
+    centroids = points[rng.choice(len(points), num_clusters, replace=False)].copy()
+
+    for _ in range(iterations):
+        labels = _assign(points, centroids)
+        counts = np.bincount(labels, minlength=num_clusters)
+        empty = counts == 0
+
+        # Sumas por celda ordenando los puntos por etiqueta (mucho más rápido que np.add.at)
+        order = np.argsort(labels, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums = np.add.reduceat(points[order].astype(np.float64), starts[~empty], axis=0)
+        centroids[~empty] = (sums / counts[~empty, None]).astype(np.float32)
+        # Reinicializar los centroides vacíos con puntos aleatorios
+        if empty.any():
+            centroids[empty] = points[rng.choice(len(points), int(empty.sum()), replace=False)]
+
+    return centroids
+
+def _inverted_lists(labels, num_lists):
+    """Ordena las filas por lista invertida y devuelve (filas, offsets)"""
+    rows = np.argsort(labels, kind='stable')
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(labels, minlength=num_lists))))
+    return rows, offsets
+
+def _top_k(distances, rows, k):
+    """Selecciona los k candidatos más cercanos, rellenando con -1/inf si faltan"""
+    out_dists = np.full(k, np.inf, dtype=np.float32)
+    out_rows = np.full(k, -1, dtype=np.intp)
+    n = min(k, len(rows))
+    if n:
+        best = np.argpartition(distances, n - 1)[:n] if len(rows) > n else np.arange(len(rows))
+        best = best[np.argsort(distances[best], kind='stable')]
+        out_dists[:n] = distances[best]
+        out_rows[:n] = rows[best]
+    return out_dists, out_rows
+
+def gallery_fingerprint(gallery):
+    """
+    Calcula una huella de la galería para detectar índices desactualizados
+
+    Args:
+        gallery (FaceGallery): Galería de rostros conocidos
+
+    Returns:
+        str: Huella hexadecimal de los encodings y nombres
+    """
+    # La galería binaria ya trae su checksum; así no hay que leer la matriz completa
+    if gallery.checksum:
+        return gallery.checksum
+    digest = hashlib.sha1(np.ascontiguousarray(gallery.encodings).tobytes())
+    digest.update("\n".join(gallery.names).encode('utf-8'))
+    return digest.hexdigest()
+
+class BruteForceIndex:
+    """
+    Búsqueda exhaustiva sobre la matriz completa de la galería
+    """
+    backend = "brute"
+
+    def __init__(self, gallery):
+        self.gallery = gallery
+
+    def search(self, face_encodings, k=1):
+        return self.gallery.exact_search(face_encodings, k=k)
+
+class IVFIndex:
+    """
+    Índice de ficheros invertidos (IVF): celdas gruesas k-means y búsqueda en las nprobe más cercanas
+    """
+    backend = "ivf"
+
+    def __init__(self, gallery, nlist=0, nprobe=8, coarse_centroids=None):
+        """
+        Construye el índice IVF
+
+        Args:
+            gallery (FaceGallery): Galería de rostros conocidos
+            nlist (int): Número de celdas. Si es 0, se usa ~4·sqrt(N)
+            nprobe (int): Número de celdas a explorar por consulta
+            coarse_centroids (numpy.ndarray, optional): Centroides ya entrenados (al cargar de disco)
+        """
+        self.gallery = gallery
+        if coarse_centroids is None:
+            nlist = nlist or int(4 * np.sqrt(len(gallery)))
+            coarse_centroids = kmeans(gallery.encodings, nlist)
+        self.coarse_centroids = np.asarray(coarse_centroids, dtype=np.float32)
+        self.nprobe = max(1, min(nprobe, len(self.coarse_centroids)))
+
+        self.labels = _assign(gallery.encodings, self.coarse_centroids)
+        self.rows, self.offsets = _inverted_lists(self.labels, len(self.coarse_centroids))
+
+    @property
+    def nlist(self):
+        return len(self.coarse_centroids)
+
+    def _probe(self, queries):
+        """Devuelve las nprobe celdas más cercanas a cada consulta"""
+        sq = _squared_distances(queries, self.coarse_centroids)
+        if self.nprobe >= self.nlist:
+            return np.argsort(sq, axis=1)
+        return np.argpartition(sq, self.nprobe - 1, axis=1)[:, :self.nprobe]
+
+    def _candidate_rows(self, cells):
+        return np.concatenate([self.rows[self.offsets[c]:self.offsets[c + 1]] for c in cells])
+
+    def search(self, face_encodings, k=1):
+        """
+        Busca los k encodings más cercanos explorando nprobe celdas
+
+        Args:
+            face_encodings (list | numpy.ndarray): Encodings de los rostros detectados
+            k (int): Número de vecinos a devolver
+
+        Returns:
+            tuple: (distancias, índices) como matrices (rostros x k); -1/inf si no hay candidatos
+        """
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, self.gallery.dim)
+        distances = np.empty((len(queries), k), dtype=np.float32)
+        indices = np.empty((len(queries), k), dtype=np.intp)
+
+        for q, cells in enumerate(self._probe(queries)):
+            rows = self._candidate_rows(cells)
+            sq = self.gallery.squared_distances(queries[q], rows=rows)[0]
+            distances[q], indices[q] = _top_k(np.sqrt(sq), rows, k)
+
+        return distances, indices
+
+    def to_arrays(self):
+        return {'coarse_centroids': self.coarse_centroids}
+
+    @classmethod
+    def from_arrays(cls, gallery, arrays, nprobe=8, **params):
+        return cls(gallery, nprobe=nprobe, coarse_centroids=arrays['coarse_centroids'])
+
+class IVFPQIndex(IVFIndex):
+    """
+    Índice IVF con cuantización de producto (PQ) de los residuos y re-ranking exacto final
+    """
+    backend = "ivfpq"
+
+    def __init__(self, gallery, nlist=0, nprobe=8, m=16, rerank=64,
+                 coarse_centroids=None, codebooks=None, codes=None):
+        """
+        Construye el índice IVF-PQ
+
+        Args:
+            gallery (FaceGallery): Galería de rostros conocidos
+            nlist (int): Número de celdas. Si es 0, se usa ~4·sqrt(N)
+            nprobe (int): Número de celdas a explorar por consulta
+            m (int): Número de subespacios PQ (debe dividir la dimensión)
+            rerank (int): Candidatos PQ a re-evaluar con la distancia exacta (0 = sin re-ranking)
+            coarse_centroids (numpy.ndarray, optional): Centroides gruesos ya entrenados
+            codebooks (numpy.ndarray, optional): Diccionarios PQ ya entrenados (m x ksub x d/m)
+            codes (numpy.ndarray, optional): Códigos PQ ya calculados (N x m)
+        """
+        super().__init__(gallery, nlist=nlist, nprobe=nprobe, coarse_centroids=coarse_centroids)
+        if gallery.dim % m != 0:
+            raise ValueError(f"El número de subespacios PQ ({m}) debe dividir la dimensión {gallery.dim}")
+        self.m = m
+        self.rerank = rerank
+
+        residuals = gallery.encodings - self.coarse_centroids[self.labels]
+        sub_dim = gallery.dim // m
+
+        if codebooks is None:
+            ksub = min(256, len(gallery))
+            codebooks = np.stack([
+                kmeans(residuals[:, j * sub_dim:(j + 1) * sub_dim], ksub, max_train_points=64 * ksub, seed=j)
+                for j in range(m)
+            ])
+        self.codebooks = np.asarray(codebooks, dtype=np.float32)
+
+        if codes is None:
+            codes = np.stack([
+                _assign(np.ascontiguousarray(residuals[:, j * sub_dim:(j + 1) * sub_dim]), self.codebooks[j])
+                for j in range(m)
+            ], axis=1).astype(np.uint8)
+        self.codes = np.asarray(codes, dtype=np.uint8)
+
+    def search(self, face_encodings, k=1):
+        """
+        Busca los k encodings más cercanos con distancias asimétricas PQ (ADC)
+
+        Args:
+            face_encodings (list | numpy.ndarray): Encodings de los rostros detectados
+            k (int): Número de vecinos a devolver
+
+        Returns:
+            tuple: (distancias, índices) como matrices (rostros x k); -1/inf si no hay candidatos
+        """
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, self.gallery.dim)
+        distances = np.empty((len(queries), k), dtype=np.float32)
+        indices = np.empty((len(queries), k), dtype=np.intp)
+        sub_dim = self.gallery.dim // self.m
+        subspaces = np.arange(self.m)
+
+        for q, cells in enumerate(self._probe(queries)):
+            rows = self._candidate_rows(cells)
+            if not len(rows):
+                distances[q], indices[q] = _top_k(np.empty(0, dtype=np.float32), rows, k)
+                continue
+
+            # Tablas de distancias del residuo de la consulta en cada celda explorada a cada
+            # código de cada subespacio: (celdas x m x ksub)
+            residuals = (queries[q] - self.coarse_centroids[cells]).reshape(len(cells), self.m, 1, sub_dim)
+            tables = np.sum((self.codebooks[None] - residuals) ** 2, axis=3)
+
+            cell_position = np.empty(self.nlist, dtype=np.intp)
+            cell_position[cells] = np.arange(len(cells))
+            sq = tables[cell_position[self.labels[rows]][:, None], subspaces, self.codes[rows]].sum(axis=1)
+
+            if self.rerank:
+                _, rows = _top_k(sq, rows, max(k, self.rerank))
+                rows = rows[rows >= 0]
+                sq = self.gallery.squared_distances(queries[q], rows=rows)[0]
+
+            distances[q], indices[q] = _top_k(np.sqrt(sq), rows, k)
+
+        return distances, indices
+
+    def to_arrays(self):
+        return {
+            'coarse_centroids': self.coarse_centroids,
+            'codebooks': self.codebooks,
+            'codes': self.codes
+        }
+
+    @classmethod
+    def from_arrays(cls, gallery, arrays, nprobe=8, rerank=64, **params):
+        return cls(
+            gallery, nprobe=nprobe, m=arrays['codes'].shape[1], rerank=rerank,
+            coarse_centroids=arrays['coarse_centroids'],
+            codebooks=arrays['codebooks'],
+            codes=arrays['codes']
+        )
+
+# Backends de búsqueda disponibles
+INDEX_BACKENDS = {
+    'brute': BruteForceIndex,
+    'centroid': CentroidIndex,
+    'ivf': IVFIndex,
+    'ivfpq': IVFPQIndex
+}
+
+# Parámetros que acepta cada backend
+_BACKEND_PARAMS = {
+    'brute': (),
+    'centroid': ('top_k',),
+    'ivf': ('nlist', 'nprobe'),
+    'ivfpq': ('nlist', 'nprobe', 'm', 'rerank')
+}
+
+def _backend_params(backend, params):
+    return {key: value for key, value in params.items() if key in _BACKEND_PARAMS[backend]}
+
+def build_index(gallery, backend="brute", **params):
+    """
+    Construye un índice de búsqueda para la galería
+
+    Args:
+        gallery (FaceGallery): Galería de rostros conocidos
+        backend (str): Backend de búsqueda ('brute', 'centroid', 'ivf' o 'ivfpq')
+        **params: Parámetros del backend (top_k, nlist, nprobe, m, rerank)
+
+    Returns:
+        object: Índice con método search(face_encodings, k)
+    """
+    if backend not in INDEX_BACKENDS:
+        raise ValueError(f"Backend de búsqueda no soportado: {backend}")
+    return INDEX_BACKENDS[backend](gallery, **_backend_params(backend, params))
+
+def save_index(index, gallery, index_file):
+    """
+    Guarda en disco un índice entrenado junto con la huella de su galería
+
+    Args:
+        index (object): Índice construido con build_index
+        gallery (FaceGallery): Galería a partir de la que se construyó
+        index_file (str): Ruta del archivo .npz del índice
+    """
+    arrays = index.to_arrays() if hasattr(index, 'to_arrays') else {}
+    os.makedirs(os.path.dirname(index_file) or ".", exist_ok=True)
+    tmp_file = index_file + ".tmp.npz"
+    np.savez(
+        tmp_file,
+        backend=np.array(index.backend),
+        fingerprint=np.array(gallery_fingerprint(gallery)),
+        **arrays
+    )
+    os.replace(tmp_file, index_file)
+
+def load_index(index_file, gallery, backend, **params):
+    """
+    Carga un índice guardado si corresponde al backend y a la galería actual
+
+    Args:
+        index_file (str): Ruta del archivo .npz del índice
+        gallery (FaceGallery): Galería actual
+        backend (str): Backend esperado
+        **params: Parámetros de búsqueda (nprobe, rerank...)
+
+    Returns:
+        object: Índice cargado, o None si no existe o está desactualizado
+    """
+    if not os.path.exists(index_file):
+        return None
+    try:
+        with np.load(index_file, allow_pickle=False) as data:
+            if str(data['backend']) != backend or str(data['fingerprint']) != gallery_fingerprint(gallery):
+                return None
+            arrays = {key: data[key] for key in data.files if key not in ('backend', 'fingerprint')}
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Error al cargar el índice {index_file}: {e}")
+        return None
+
+    cls = INDEX_BACKENDS[backend]
+    if not hasattr(cls, 'from_arrays'):
+        return None
+    return cls.from_arrays(gallery, arrays, **_backend_params(backend, params))
+
+def prepare_index(gallery, backend, index_file=None, **params):
+    """
+    Obtiene el índice de la galería: lo carga de disco si está al día o lo construye
+
+    Args:
+        gallery (FaceGallery): Galería de rostros conocidos
+        backend (str): Backend de búsqueda
+        index_file (str, optional): Ruta del índice guardado junto a los encodings
+        **params: Parámetros del backend
+
+    Returns:
+        object: Índice listo para asignar a gallery.index, o None si la galería está vacía
+    """
+    if len(gallery) == 0:
+        return None
+    if backend == 'brute':
+        return None
+    if index_file:
+        index = load_index(index_file, gallery, backend, **params)
+        if index is not None:
+            return index
+    return build_index(gallery, backend, **params)
+
+def evaluate_recall(gallery, index, queries=None, k=1, num_queries=1000, noise=0.03, seed=0):
+    """
+    Mide el recall@k de un índice frente a la búsqueda exacta y la latencia de ambos
+
+    Args:
+        gallery (FaceGallery): Galería de rostros conocidos
+        index (object): Índice a evaluar
+        queries (numpy.ndarray, optional): Consultas. Si es None, se generan perturbando filas de la galería
+        k (int): Número de vecinos a comparar
+        num_queries (int): Número de consultas sintéticas
+        noise (float): Desviación típica del ruido añadido a las consultas sintéticas
+        seed (int): Semilla para generar las consultas
+
+    Returns:
+        dict: recall, latencias medias por consulta (ms) y aceleración
+    """
+    if queries is None:
+        rng = np.random.default_rng(seed)
+        rows = rng.integers(0, len(gallery), min(num_queries, max(len(gallery), 1)))
+        queries = gallery.encodings[rows] + rng.normal(0, noise, (len(rows), gallery.dim)).astype(np.float32)
+    queries = np.asarray(queries, dtype=np.float32).reshape(-1, gallery.dim)
+
+    # Consultas una a una, como en el reconocimiento de cada frame
+    start = time.perf_counter()
+    exact_indices = np.vstack([gallery.exact_search(query, k=k)[1] for query in queries])
+    exact_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    approx_indices = np.vstack([index.search(query, k=k)[1] for query in queries])
+    approx_time = time.perf_counter() - start
+
+    hits = sum(len(set(e) & set(a)) for e, a in zip(exact_indices.tolist(), approx_indices.tolist()))
+    total = exact_indices.size
+
+    return {
+        'recall': hits / total if total else 1.0,
+        'exact_ms': 1000.0 * exact_time / max(len(queries), 1),
+        'index_ms': 1000.0 * approx_time / max(len(queries), 1),
+        'speedup': exact_time / approx_time if approx_time > 0 else float('inf')
+    }
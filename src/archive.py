@@ -0,0 +1,217 @@
+import os
+import json
+import calendar
+from datetime import datetime, timedelta
+import numpy as np
+
+ARCHIVE_DIR = "archive"
+MANIFEST_FILE = "manifest.json"
+ARCHIVE_PREFIX = "accesos_"
+
+_EPOCH = datetime(1970, 1, 1)
+
+def timestamp_to_int(timestamp_str):
+    """Convierte una marca de tiempo "%Y-%m-%d %H:%M:%S" a segundos (sin zona horaria, ida y vuelta exacta)"""
+    return calendar.timegm(datetime.strptime(timestamp_str, "%Y-%m-%d %H:%M:%S").timetuple())
+
+def int_to_timestamp(seconds):
+    """Inversa de timestamp_to_int"""
+    return (_EPOCH + timedelta(seconds=int(seconds))).strftime("%Y-%m-%d %H:%M:%S")
+
+def _dictionary_encode(values):
+    """Codifica una columna como tabla de valores distintos e índice de cada fila"""
+    table = sorted(set(values))
+    positions = {value: i for i, value in enumerate(table)}
+    ids = np.fromiter((positions[value] for value in values), dtype=np.uint32, count=len(values))
+    return table, ids
+
+def write_day_archive(path, entries):
+    """
+    Guarda los registros de un día en formato columnar comprimido (.npz)
+
+    Columnas: marca de tiempo entera, nombre/acceso/cámara codificados con diccionario,
+    confianza float32 y el resto de campos como JSON por fila.
+
+    Args:
+        path (str): Ruta del archivo .npz
+        entries (list): Registros del día
+
+    Returns:
+        dict: Entrada del mapa de zonas (registros, marca de tiempo mínima y máxima, nombres)
+    """
+    timestamps = np.array([timestamp_to_int(entry['timestamp']) for entry in entries], dtype=np.int64)
+    order = np.argsort(timestamps, kind='stable')
+    entries = [entries[i] for i in order]
+    timestamps = timestamps[order]
+
+    names, name_ids = _dictionary_encode([entry['nombre'] for entry in entries])
+    accesses, access_ids = _dictionary_encode([entry['acceso'] for entry in entries])
+    cameras, camera_ids = _dictionary_encode([json.dumps(entry['camara_id']) for entry in entries])
+    base_fields = ('timestamp', 'nombre', 'acceso', 'confianza', 'camara_id')
+    extras = [
+        json.dumps({key: value for key, value in entry.items() if key not in base_fields}, ensure_ascii=False)
+        for entry in entries
+    ]
+
+    tmp_path = path + ".tmp.npz"
+    np.savez_compressed(
+        tmp_path,
+        timestamp=timestamps,
+        name_ids=name_ids,
+        names=np.array(names, dtype=str),
+        access_ids=access_ids.astype(np.uint8),
+        accesses=np.array(accesses, dtype=str),
+        camera_ids=camera_ids,
+        cameras=np.array(cameras, dtype=str),
+        confidence=np.array([entry.get('confianza') or 0.0 for entry in entries], dtype=np.float32),
+        extra=np.array(extras, dtype=str)
+    )
+    os.replace(tmp_path, path)
+
+    return {
+        'file': os.path.basename(path),
+        'records': len(entries),
+        'min_timestamp': int(timestamps[0]) if len(entries) else None,
+        'max_timestamp': int(timestamps[-1]) if len(entries) else None,
+        'names': names
+    }
+
+def iter_day_archive(path, name=None, start=None, end=None, access_type=None, camera_id=None):
+    """
+    Recorre los registros de un archivo columnar aplicando los filtros sobre las columnas
+
+    Solo se descomprimen las columnas necesarias para filtrar y, si alguna fila cumple
+    los criterios, las necesarias para reconstruir esos registros.
+
+    Args:
+        path (str): Ruta del archivo .npz
+        name (str, optional): Filtrar por nombre
+        start (int, optional): Marca de tiempo mínima (ver timestamp_to_int)
+        end (int, optional): Marca de tiempo máxima
+        access_type (str, optional): 'PERMITIDO' o 'DENEGADO'
+        camera_id (int | str, optional): Filtrar por cámara
+
+    Yields:
+        dict: Registros en orden cronológico
+    """
+    with np.load(path, allow_pickle=False) as data:
+        timestamps = data['timestamp']
+        mask = np.ones(len(timestamps), dtype=bool)
+        if start is not None:
+            mask &= timestamps >= start
+        if end is not None:
+            mask &= timestamps <= end
+
+        names = data['names'].tolist()
+        if name:
+            if name not in names:
+                return
+            mask &= data['name_ids'] == names.index(name)
+
+        accesses = data['accesses'].tolist()
+        if access_type:
+            if access_type not in accesses:
+                return
+            mask &= data['access_ids'] == accesses.index(access_type)
+
+        cameras = data['cameras'].tolist()
+        if camera_id is not None:
+            key = json.dumps(camera_id)
+            if key not in cameras:
+                return
+            mask &= data['camera_ids'] == cameras.index(key)
+
+        rows = np.flatnonzero(mask)
+        if not rows.size:
+            return
+
+        name_ids = data['name_ids'][rows]
+        access_ids = data['access_ids'][rows]
+        camera_ids = data['camera_ids'][rows]
+        confidences = data['confidence'][rows]
+        extras = data['extra'][rows]
+        camera_values = [json.loads(camera) for camera in cameras]
+
+        for i, row in enumerate(rows):
+            entry = {
+                'timestamp': int_to_timestamp(timestamps[row]),
+                'nombre': names[name_ids[i]],
+                'acceso': accesses[access_ids[i]],
+                'confianza': round(float(confidences[i]), 4),
+                'camara_id': camera_values[camera_ids[i]]
+            }
+            extra = str(extras[i])
+            if extra != "{}":
+                entry.update(json.loads(extra))
+            yield entry
+
+class ArchiveManifest:
+    """
+    Índice de los archivos columnares con su mapa de zonas (marca de tiempo mínima/máxima y nombres)
+    """
+    def __init__(self, log_dir):
+        """
+        Args:
+            log_dir (str): Directorio de los registros (el archivo vive en log_dir/archive)
+        """
+        self.archive_dir = os.path.join(log_dir, ARCHIVE_DIR)
+        self.path = os.path.join(self.archive_dir, MANIFEST_FILE)
+        self.days = {}
+        self._mtime = None
+
+    def refresh(self):
+        """Vuelve a leer el manifiesto si cambió en disco"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            self.days = {}
+            self._mtime = None
+            return self
+        if mtime != self._mtime:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.days = json.load(f).get('days', {})
+            self._mtime = mtime
+        return self
+
+    def day_path(self, day):
+        return os.path.join(self.archive_dir, f"{ARCHIVE_PREFIX}{day}.npz")
+
+    def add(self, day, zone):
+        """Registra (o sustituye) el archivo de un día y guarda el manifiesto de forma atómica"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        self.refresh()
+        self.days[day] = zone
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'days': self.days}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+        self._mtime = os.stat(self.path).st_mtime_ns
+
+    def matching_days(self, start_day=None, end_day=None, start=None, end=None, name=None):
+        """
+        Días archivados que pueden contener registros de la consulta según el mapa de zonas
+
+        Args:
+            start_day (str, optional): Primer día "AAAAMMDD"
+            end_day (str, optional): Último día "AAAAMMDD"
+            start (int, optional): Marca de tiempo mínima
+            end (int, optional): Marca de tiempo máxima
+            name (str, optional): Nombre buscado
+
+        Returns:
+            list: Días en orden cronológico
+        """
+        days = []
+        for day, zone in self.days.items():
+            if (start_day and day < start_day) or (end_day and day > end_day):
+                continue
+            if not zone['records']:
+                continue
+            if start is not None and zone['max_timestamp'] < start:
+                continue
+            if end is not None and zone['min_timestamp'] > end:
+                continue
+            if name and name not in zone['names']:
+                continue
+            days.append(day)
+        return sorted(days)
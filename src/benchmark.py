@@ -0,0 +1,222 @@
+import os
+import cv2
+import time
+import tempfile
+import subprocess
+import numpy as np
+import face_recognition
+from src.gallery import FaceGallery, ENCODING_DIM
+from src.ann import prepare_index
+from src.recognition import recognize_faces
+
+# Percentiles que se informan para cada etapa
+PERCENTILES = (50, 95, 99)
+
+def synthetic_gallery(size, photos_per_employee=5, spread=0.09, noise=0.03, seed=0, known_encodings=None,
+                      known_names=None):
+    """
+    Crea una galería sintética con encodings agrupados por empleado
+
+    Cada empleado es un centro aleatorio y sus fotos son perturbaciones pequeñas de él,
+    de modo que los índices (centroide, IVF) trabajan con una estructura parecida a la real.
+    Los encodings conocidos (rostros reales) ocupan las primeras filas y el resto se rellena
+    con empleados sintéticos.
+
+    Args:
+        size (int): Número total de encodings
+        photos_per_employee (int): Encodings por empleado
+        spread (float): Desviación típica de los centros de empleado
+        noise (float): Desviación típica de cada foto respecto a su centro
+        seed (int): Semilla
+        known_encodings (list, optional): Encodings reales a incluir (como mucho size)
+        known_names (list, optional): Nombre de cada encoding real
+
+    Returns:
+        FaceGallery: Galería con size encodings
+    """
+    known = np.asarray(known_encodings if known_encodings is not None else [], dtype=np.float32)
+    known = known.reshape(-1, ENCODING_DIM)[:size]
+    known_names = list(known_names or [])[:len(known)]
+
+    filler = size - len(known)
+    rng = np.random.default_rng(seed)
+    num_employees = max(1, -(-filler // photos_per_employee))
+    centers = rng.normal(0.0, spread, (num_employees, ENCODING_DIM)).astype(np.float32)
+    owners = np.arange(filler) // photos_per_employee
+    encodings = centers[owners] + rng.normal(0.0, noise, (filler, ENCODING_DIM)).astype(np.float32)
+    names = [f"Sintetico_{owner:06d}" for owner in owners]
+    return FaceGallery(np.concatenate([known, encodings]), known_names + names)
+
+def encode_benchmark_faces(frames, detector=None, resize_factor=0.25, max_faces=100):
+    """
+    Encodings de los rostros que aparecen en los frames del benchmark
+
+    Se calculan igual que en recognize_faces (frame reducido, RGB y el mismo detector), de
+    modo que una galería que los incluya reconoce a las personas del vídeo y el benchmark
+    mide también la coincidencia y el registro de accesos.
+
+    Args:
+        frames (list): Frames BGR
+        detector (callable, optional): Detector de rostros
+        resize_factor (float): Factor de redimensionado del frame
+        max_faces (int): Número máximo de encodings (se toman frames repartidos por la secuencia)
+
+    Returns:
+        tuple: (lista de encodings, lista de nombres "Benchmark_NNNN")
+    """
+    detect_fn = detector or face_recognition.face_locations
+    encodings = []
+    for frame in frames[::max(1, len(frames) // max_faces)]:
+        small_frame = cv2.resize(frame, (0, 0), fx=resize_factor, fy=resize_factor)
+        rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+        face_locations = detect_fn(rgb_small_frame)
+        if face_locations:
+            encodings.extend(face_recognition.face_encodings(rgb_small_frame, face_locations))
+        if len(encodings) >= max_faces:
+            break
+    encodings = encodings[:max_faces]
+    return encodings, [f"Benchmark_{i:04d}" for i in range(len(encodings))]
+
+class StageTimings:
+    """
+    Muestras de duración por etapa (receptor de timings de recognize_faces)
+    """
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def summary(self):
+        """
+        Resume las muestras de cada etapa
+
+        Returns:
+            dict: etapa -> {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}
+        """
+        return {stage: summarize_latencies(samples) for stage, samples in self.samples.items()}
+
+def summarize_latencies(samples):
+    """
+    Resume una lista de duraciones en segundos
+
+    Returns:
+        dict: Número de muestras, media, percentiles y máximo en milisegundos
+    """
+    values = np.asarray(samples, dtype=np.float64) * 1000.0
+    summary = {'count': int(len(values)), 'mean_ms': round(float(values.mean()), 4) if len(values) else None}
+    for p in PERCENTILES:
+        summary[f'p{p}_ms'] = round(float(np.percentile(values, p)), 4) if len(values) else None
+    summary['max_ms'] = round(float(values.max()), 4) if len(values) else None
+    return summary
+
+def git_revision(path=None):
+    """Commit actual del repositorio (o None si no se puede obtener)"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=path or os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmark(frames, gallery, tolerance=0.45, resize_factor=0.25, detector=None, tracker_factory=None,
+                  motion_factory=None, quality_gate=None, logger_factory=None, warmup=5):
+    """
+    Reproduce una secuencia de frames a máxima velocidad por recognize_faces y mide cada etapa
+
+    Args:
+        frames (list): Frames BGR ya decodificados (así la lectura no cuenta en las latencias)
+        gallery (FaceGallery): Galería contra la que se busca (con su índice ya asignado)
+        tolerance (float): Tolerancia del reconocimiento
+        resize_factor (float): Factor de redimensionado del frame
+        detector (callable, optional): Detector de rostros
+        tracker_factory (callable, optional): Crea el tracker de la ejecución (None = sin tracker)
+        motion_factory (callable, optional): Crea el detector de movimiento (None = sin él)
+        quality_gate (FaceQualityGate, optional): Filtro de calidad
+        logger_factory (callable, optional): Recibe un directorio temporal y crea el AccessLogger
+        warmup (int): Frames iniciales que se procesan pero no se miden
+
+    Returns:
+        dict: Frames, rostros, frames/s, rostros/s y latencias por etapa y por frame
+    """
+    timings = StageTimings()
+    frame_times = []
+    faces = matches = unknowns = 0
+    tracker = tracker_factory() if tracker_factory else None
+    motion_detector = motion_factory() if motion_factory else None
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        access_logger = logger_factory(log_dir) if logger_factory else None
+        try:
+            elapsed = 0.0
+            for i, frame in enumerate(frames):
+                measured = i >= warmup
+                start = time.perf_counter()
+                results = recognize_faces(
+                    frame, gallery, None, tolerance=tolerance, resize_factor=resize_factor,
+                    access_logger=access_logger, tracker=tracker, motion_detector=motion_detector,
+                    detector=detector, quality_gate=quality_gate, timings=timings if measured else None
+                )
+                duration = time.perf_counter() - start
+                if not measured:
+                    continue
+                elapsed += duration
+                frame_times.append(duration)
+                faces += len(results)
+                matches += sum(1 for _, _, _, access_text in results if access_text.startswith("ACCESO PERMITIDO"))
+                unknowns += sum(1 for _, _, _, access_text in results if access_text == "ACCESO DENEGADO")
+        finally:
+            if access_logger is not None:
+                access_logger.close()
+
+    return {
+        'gallery_size': len(gallery),
+        'frames': len(frame_times),
+        'faces': faces,
+        'matches': matches,
+        'unknowns': unknowns,
+        'elapsed_s': round(elapsed, 4),
+        'frames_per_s': round(len(frame_times) / elapsed, 3) if elapsed else None,
+        'faces_per_s': round(faces / elapsed, 3) if elapsed else None,
+        'frame': summarize_latencies(frame_times),
+        'stages': timings.summary()
+    }
+
+def prepare_synthetic_gallery(size, search_index="brute", index_params=None, seed=0, known_encodings=None,
+                              known_names=None):
+    """
+    Crea una galería sintética (con los encodings reales indicados) y le asigna el índice de búsqueda
+
+    Returns:
+        tuple: (galería, segundos que tardó en construirse el índice)
+    """
+    gallery = synthetic_gallery(size, seed=seed, known_encodings=known_encodings, known_names=known_names)
+    start = time.perf_counter()
+    gallery.index = prepare_index(gallery, search_index, **(index_params or {}))
+    return gallery, time.perf_counter() - start
+
+def compare_results(current, baseline):
+    """
+    Compara dos ejecuciones del benchmark por tamaño de galería
+
+    Args:
+        current (dict): Resultado actual (salida JSON del benchmark)
+        baseline (dict): Resultado de referencia
+
+    Returns:
+        list: Filas (tamaño, frames/s de referencia, frames/s actual, variación %, p95 de referencia, p95 actual)
+    """
+    previous = {run['gallery_size']: run for run in baseline.get('runs', [])}
+    rows = []
+    for run in current.get('runs', []):
+        old = previous.get(run['gallery_size'])
+        if old is None or not old.get('frames_per_s') or not run.get('frames_per_s'):
+            continue
+        change = (run['frames_per_s'] / old['frames_per_s'] - 1.0) * 100.0
+        rows.append((
+            run['gallery_size'], old['frames_per_s'], run['frames_per_s'], round(change, 1),
+            old['frame']['p95_ms'], run['frame']['p95_ms']
+        ))
+    return rows
@@ -6,16 +6,142 @@ class Config:
     
     # Configuraciones de video
     CAMERA_ID = 0
+    CAMERA_SOURCES = []  # Varias fuentes (IDs o URLs) para el modo multicámara en un solo proceso
+    MULTICAM_RECOGNITION_THREADS = 1  # Hilos de reconocimiento compartidos entre cámaras
     FRAME_WIDTH = 640
     FRAME_HEIGHT = 480
+    RECOGNITION_QUEUE_SIZE = 1  # Frames pendientes de reconocer (se descartan los más antiguos)
+    RECOGNITION_WORKERS = 0  # Procesos de reconocimiento (0 = hilo único en el proceso principal)
     
     # Rutas de archivos
     EMPLOYEES_DIR = os.path.join(BASE_DIR, "data", "empleados")
-    ENCODINGS_FILE = os.path.join(BASE_DIR, "data", "encodings", "empleados_encodings.pkl")
+    ENCODINGS_FILE = os.path.join(BASE_DIR, "data", "encodings", "empleados_gallery")  # Galería binaria (directorio)
+    LEGACY_ENCODINGS_FILE = os.path.join(BASE_DIR, "data", "encodings", "empleados_encodings.pkl")  # Formato pickle heredado
+    INDEX_FILE = os.path.join(BASE_DIR, "data", "encodings", "empleados_index.npz")
+    
+    # Generación de encodings
+    ENCODING_WORKERS = 0  # Procesos para codificar fotos en paralelo (0 = en serie)
+    ENCODING_CHUNK_SIZE = 16  # Fotos por bloque de trabajo en el modo paralelo
+    GALLERY_RELOAD_INTERVAL = 2.0  # Segundos entre comprobaciones de cambios en la galería (0 = sin recarga en caliente)
     
     # Parámetros de reconocimiento facial
     FACE_RECOGNITION_TOLERANCE = 0.45  # Más estricto (valores más bajos = más estricto)
-    MIN_FACE_SIZE = 20
+    MIN_FACE_SIZE = 20  # Lado mínimo del rostro para codificarlo (píxeles del frame reducido)
+    
+    # Filtro de calidad previo al encoding
+    FACE_QUALITY_GATING = True
+    FACE_MIN_SHARPNESS = 20.0  # Varianza mínima del Laplaciano del rostro (0 = sin comprobar la nitidez)
+    FACE_MAX_YAW = 0.35  # Giro lateral máximo (desplazamiento de la nariz / distancia entre ojos; 0 = sin comprobar)
+    FACE_MAX_ROLL = 25.0  # Inclinación máxima de la línea de los ojos (grados)
+    
+    # Detector de rostros
+    FACE_DETECTOR = "hog"  # "hog" (dlib), "haar" (cascadas de OpenCV 4.x, el más rápido en CPU) o "dnn" (OpenCV DNN)
+    HOG_UPSAMPLE = 1  # Ampliaciones de la imagen para el detector HOG
+    HAAR_SCALE_FACTOR = 1.1
+    HAAR_MIN_NEIGHBORS = 5
+    HAAR_MIN_SIZE = 20  # Lado mínimo del rostro (píxeles del frame reducido)
+    DNN_MODEL_FILE = os.path.join(BASE_DIR, "models", "res10_300x300_ssd_iter_140000.caffemodel")
+    DNN_CONFIG_FILE = os.path.join(BASE_DIR, "models", "deploy.prototxt")
+    DNN_CONFIDENCE = 0.5
+    
+    # Índice de búsqueda en la galería
+    SEARCH_INDEX = "centroid"  # "brute" (exhaustiva), "centroid" (dos etapas por empleado), "ivf" o "ivfpq"
+    CENTROID_TOP_K = 5  # Empleados candidatos a re-evaluar por rostro
+    IVF_NLIST = 0  # Número de celdas k-means (0 = automático, ~4·sqrt(N))
+    IVF_NPROBE = 8  # Celdas exploradas por consulta (más = más recall y más lento)
+    PQ_M = 16  # Subespacios de la cuantización de producto
+    PQ_RERANK = 64  # Candidatos PQ re-evaluados con la distancia exacta
+    
+    # Seguimiento de rostros entre frames
+    TRACKING_ENABLED = True
+    TRACK_REENCODE_INTERVAL = 15  # Frames tras los que se re-identifica un rostro seguido
+    TRACK_IOU_THRESHOLD = 0.3  # IoU mínima para asociar una detección a un track
+    TRACK_MAX_MOVE = 0.3  # Desplazamiento relativo al tamaño que fuerza re-codificar
+    TRACK_MAX_SCALE_CHANGE = 0.3  # Cambio relativo de tamaño que fuerza re-codificar
+    TRACK_MAX_MISSED = 5  # Frames sin detección antes de descartar un track
+    
+    # Detección condicionada al movimiento
+    MOTION_GATING = True
+    MOTION_THUMB_WIDTH = 64  # Ancho de la miniatura en la que se mide el movimiento
+    MOTION_THRESHOLD = 25  # Diferencia de gris mínima (0-255) para considerar que un píxel cambió
+    MOTION_MIN_AREA = 0.002  # Fracción mínima de la miniatura que debe cambiar
+    MOTION_LEARNING_RATE = 0.05  # Velocidad de adaptación del modelo de fondo
+    MOTION_MAX_COVERAGE = 0.5  # Fracción de frame con movimiento a partir de la cual se analiza completo
+    MOTION_FULL_DETECT_INTERVAL = 30  # Frames entre detecciones completas de seguridad (0 = nunca)
+    
+    # Métricas del camino caliente
+    METRICS_ENABLED = False  # También con main.py --metrics
+    METRICS_HOST = "127.0.0.1"
+    METRICS_PORT = 9108  # Endpoint /metrics en formato Prometheus (0 = sin endpoint)
+    METRICS_WINDOW = 2048  # Muestras recientes por etapa para calcular p50/p95/p99
+    METRICS_REPORT_INTERVAL = 60.0  # Segundos entre líneas de estadísticas en el log (0 = sin línea periódica)
+    
+    @classmethod
+    def detector_params(cls, backend=None):
+        """Parámetros del detector de rostros indicado (por defecto, el configurado)"""
+        backend = backend or cls.FACE_DETECTOR
+        if backend == "haar":
+            return {
+                'scale_factor': cls.HAAR_SCALE_FACTOR,
+                'min_neighbors': cls.HAAR_MIN_NEIGHBORS,
+                'min_size': cls.HAAR_MIN_SIZE
+            }
+        if backend == "dnn":
+            return {
+                'model_file': cls.DNN_MODEL_FILE,
+                'config_file': cls.DNN_CONFIG_FILE,
+                'confidence': cls.DNN_CONFIDENCE
+            }
+        return {'upsample': cls.HOG_UPSAMPLE}
+    
+    @classmethod
+    def quality_params(cls):
+        """Parámetros del filtro de calidad de rostros"""
+        return {
+            'min_size': cls.MIN_FACE_SIZE,
+            'min_sharpness': cls.FACE_MIN_SHARPNESS,
+            'max_yaw': cls.FACE_MAX_YAW,
+            'max_roll': cls.FACE_MAX_ROLL
+        }
+    
+    @classmethod
+    def index_params(cls):
+        """Parámetros del índice de búsqueda configurado"""
+        return {
+            'top_k': cls.CENTROID_TOP_K,
+            'nlist': cls.IVF_NLIST,
+            'nprobe': cls.IVF_NPROBE,
+            'm': cls.PQ_M,
+            'rerank': cls.PQ_RERANK
+        }
+    
+    # Registro de accesos
+    ACCESS_LOG_BACKEND = "files"  # "files" (CSV + JSONL diarios) o "sqlite" (logs/accesos.db, consultas indexadas)
+    ACCESS_LOG_FORMAT = "jsonl"  # "jsonl" (un registro por línea, solo se añade) o "json" (array heredado)
+    ACCESS_LOG_ASYNC = True  # Escritura por lotes en un hilo aparte (no bloquea el reconocimiento)
+    ACCESS_LOG_QUEUE_SIZE = 10000  # Registros pendientes como máximo
+    ACCESS_LOG_BATCH_SIZE = 256  # Registros por lote como máximo
+    ACCESS_LOG_FLUSH_INTERVAL = 0.5  # Segundos máximos que espera un registro antes de escribirse
+    ACCESS_LOG_FSYNC = "none"  # "none" o "batch" (fsync tras cada lote)
+    ACCESS_ROLLUPS = True  # Contadores diarios agregados para las estadísticas (view_logs.py stats)
+    ACCESS_DEDUP_WINDOW = 0.0  # Segundos entre dos eventos de la misma persona y cámara (0 = registrar todos; p. ej. 30)
+    ACCESS_DEDUP_UNKNOWN_DISTANCE = 0.5  # Distancia máxima entre encodings para agrupar a un mismo desconocido
+    
+    @classmethod
+    def access_log_params(cls):
+        """Parámetros del registro de accesos"""
+        return {
+            'backend': cls.ACCESS_LOG_BACKEND,
+            'rollups': cls.ACCESS_ROLLUPS,
+            'log_format': cls.ACCESS_LOG_FORMAT,
+            'async_writes': cls.ACCESS_LOG_ASYNC,
+            'queue_size': cls.ACCESS_LOG_QUEUE_SIZE,
+            'batch_size': cls.ACCESS_LOG_BATCH_SIZE,
+            'flush_interval': cls.ACCESS_LOG_FLUSH_INTERVAL,
+            'fsync_policy': cls.ACCESS_LOG_FSYNC,
+            'dedup_window': cls.ACCESS_DEDUP_WINDOW,
+            'unknown_distance': cls.ACCESS_DEDUP_UNKNOWN_DISTANCE
+        }
     
     # Configuraciones de interfaz
     WINDOW_NAME = "Sistema de Acceso"
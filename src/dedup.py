@@ -0,0 +1,131 @@
+import numpy as np
+
+UNKNOWN_NAME = "Desconocido"
+
+class _Episode:
+    """Detecciones consecutivas de una misma identidad en una cámara"""
+    __slots__ = ('key', 'name', 'camera_id', 'encoding', 'count', 'first_seen', 'last_seen', 'emitted_at')
+
+    def __init__(self, key, name, camera_id, encoding, now):
+        self.key = key
+        self.name = name
+        self.camera_id = camera_id
+        self.encoding = encoding
+        self.count = 0
+        self.first_seen = now
+        self.last_seen = now
+        self.emitted_at = now
+
+    def summary(self):
+        return {
+            'nombre': self.name,
+            'camara_id': self.camera_id,
+            'detecciones': self.count,
+            'primera': self.first_seen,
+            'ultima': self.last_seen
+        }
+
+class AccessEventCoalescer:
+    """
+    Agrupa las detecciones repetidas de una persona para registrar un solo acceso por ventana
+
+    Cada identidad de cada cámara emite un evento de acceso como máximo cada `window`
+    segundos; las detecciones intermedias solo actualizan el resumen del episodio
+    (número de detecciones, primera y última). Los desconocidos se distinguen entre sí
+    por la distancia entre sus encodings en lugar de por el nombre.
+    """
+    def __init__(self, window=30.0, unknown_distance=0.5):
+        """
+        Inicializa el agrupador
+
+        Args:
+            window (float): Segundos mínimos entre dos eventos de la misma identidad y cámara
+            unknown_distance (float): Distancia máxima entre encodings para considerar
+                que dos desconocidos son la misma persona
+        """
+        self.window = window
+        self.unknown_distance = unknown_distance
+        self._episodes = {}  # (camara, identidad) -> _Episode
+        self._unknowns = {}  # camara -> lista de episodios de desconocidos
+        self._next_unknown = 0
+
+    def _unknown_key(self, camera_id, encoding):
+        """Busca el episodio del desconocido más parecido o crea una clave nueva"""
+        candidates = self._unknowns.get(camera_id, [])
+        if candidates:
+            distances = np.linalg.norm(
+                np.stack([episode.encoding for episode in candidates]) - encoding, axis=1
+            )
+            best = int(np.argmin(distances))
+            if distances[best] <= self.unknown_distance:
+                return candidates[best].key
+        self._next_unknown += 1
+        return (camera_id, f"{UNKNOWN_NAME}#{self._next_unknown}")
+
+    def observe(self, name, camera_id, timestamp, face_encoding=None):
+        """
+        Registra una detección y decide si debe emitirse un evento de acceso
+
+        Args:
+            name (str): Nombre reconocido (o "Desconocido")
+            camera_id (int): ID de la cámara
+            timestamp (float): Marca de tiempo de la detección (segundos)
+            face_encoding (numpy.ndarray, optional): Encoding del rostro, para agrupar desconocidos
+
+        Returns:
+            tuple: (emitir evento, lista de resúmenes de episodios cerrados)
+        """
+        closed = self.expire(timestamp)
+
+        encoding = None
+        if name == UNKNOWN_NAME and face_encoding is not None:
+            encoding = np.asarray(face_encoding, dtype=np.float32)
+            key = self._unknown_key(camera_id, encoding)
+        else:
+            key = (camera_id, name)
+
+        episode = self._episodes.get(key)
+        emit = False
+        if episode is None:
+            episode = _Episode(key, name, camera_id, encoding, timestamp)
+            self._episodes[key] = episode
+            if encoding is not None:
+                self._unknowns.setdefault(camera_id, []).append(episode)
+            emit = True
+        elif timestamp - episode.emitted_at >= self.window:
+            episode.emitted_at = timestamp
+            emit = True
+
+        episode.count += 1
+        episode.last_seen = timestamp
+        if encoding is not None:
+            # El encoding más reciente sigue mejor los cambios de pose e iluminación
+            episode.encoding = encoding
+        return emit, closed
+
+    def expire(self, now):
+        """
+        Cierra los episodios sin detecciones durante más de una ventana
+
+        Args:
+            now (float): Marca de tiempo actual (segundos)
+
+        Returns:
+            list: Resúmenes de los episodios cerrados
+        """
+        expired = [episode for episode in self._episodes.values() if now - episode.last_seen > self.window]
+        return [self._close(episode) for episode in expired]
+
+    def close_all(self):
+        """Cierra todos los episodios abiertos y devuelve sus resúmenes"""
+        return [self._close(episode) for episode in list(self._episodes.values())]
+
+    def _close(self, episode):
+        del self._episodes[episode.key]
+        if episode.encoding is not None:
+            self._unknowns[episode.camera_id].remove(episode)
+        return episode.summary()
+
+    def active_summaries(self):
+        """Resúmenes de los episodios abiertos"""
+        return [episode.summary() for episode in self._episodes.values()]
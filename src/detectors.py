@@ -0,0 +1,139 @@
+import os
+import cv2
+import numpy as np
+import face_recognition
+from src.tracker import iou_matrix
+
+class HOGDetector:
+    """
+    Detector HOG de dlib (el de face_recognition por defecto)
+    """
+    backend = "hog"
+
+    def __init__(self, upsample=1, model="hog"):
+        """
+        Args:
+            upsample (int): Veces que se amplía la imagen para encontrar rostros pequeños
+            model (str): "hog" (CPU) o "cnn" (dlib CNN, requiere GPU para ir rápido)
+        """
+        self.upsample = upsample
+        self.model = model
+
+    def __call__(self, rgb_image):
+        """
+        Detecta rostros en una imagen RGB
+
+        Returns:
+            list: Cajas (top, right, bottom, left)
+        """
+        return face_recognition.face_locations(rgb_image, number_of_times_to_upsample=self.upsample, model=self.model)
+
+class HaarDetector:
+    """
+    Detector de cascadas Haar de OpenCV (muy rápido en CPU, menos preciso con rostros girados)
+    """
+    backend = "haar"
+
+    def __init__(self, cascade_file=None, scale_factor=1.1, min_neighbors=5, min_size=20):
+        """
+        Args:
+            cascade_file (str, optional): Cascada XML (por defecto, la frontal incluida con OpenCV)
+            scale_factor (float): Factor de escala entre niveles de la pirámide
+            min_neighbors (int): Detecciones vecinas necesarias para aceptar un rostro
+            min_size (int): Lado mínimo del rostro en píxeles
+        """
+        if not hasattr(cv2, 'CascadeClassifier') or (cascade_file is None and not hasattr(cv2, 'data')):
+            raise ValueError("Esta versión de OpenCV no incluye las cascadas Haar (use opencv-python 4.x o FACE_DETECTOR = \"hog\")")
+        cascade_file = cascade_file or os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+        self.cascade = cv2.CascadeClassifier(cascade_file)
+        if self.cascade.empty():
+            raise ValueError(f"No se pudo cargar la cascada Haar: {cascade_file}")
+        self.scale_factor = scale_factor
+        self.min_neighbors = min_neighbors
+        self.min_size = min_size
+
+    def __call__(self, rgb_image):
+        gray = cv2.cvtColor(rgb_image, cv2.COLOR_RGB2GRAY)
+        faces = self.cascade.detectMultiScale(
+            gray, scaleFactor=self.scale_factor, minNeighbors=self.min_neighbors,
+            minSize=(self.min_size, self.min_size)
+        )
+        return [(int(y), int(x + w), int(y + h), int(x)) for x, y, w, h in faces]
+
+class DNNDetector:
+    """
+    Detector SSD de OpenCV DNN cargado desde un modelo local (por ejemplo, res10_300x300_ssd)
+    """
+    backend = "dnn"
+
+    def __init__(self, model_file, config_file=None, confidence=0.5, input_size=300):
+        """
+        Args:
+            model_file (str): Pesos del modelo (.caffemodel, .pb u .onnx)
+            config_file (str, optional): Definición de la red (.prototxt o .pbtxt)
+            confidence (float): Confianza mínima de una detección
+            input_size (int): Lado de la imagen de entrada de la red
+        """
+        if not model_file or not os.path.exists(model_file):
+            raise ValueError(f"No se encontró el modelo del detector DNN: {model_file}")
+        self.net = cv2.dnn.readNet(model_file, config_file or "")
+        self.confidence = confidence
+        self.input_size = input_size
+
+    def __call__(self, rgb_image):
+        height, width = rgb_image.shape[:2]
+        # El modelo espera BGR con la media de ImageNet restada; swapRB convierte desde RGB
+        blob = cv2.dnn.blobFromImage(
+            rgb_image, 1.0, (self.input_size, self.input_size), (104.0, 177.0, 123.0), swapRB=True, crop=False
+        )
+        self.net.setInput(blob)
+        detections = self.net.forward().reshape(-1, 7)
+        detections = detections[detections[:, 2] >= self.confidence]
+
+        boxes = []
+        for _, _, _, x1, y1, x2, y2 in detections:
+            left, top = int(np.clip(x1, 0, 1) * width), int(np.clip(y1, 0, 1) * height)
+            right, bottom = int(np.clip(x2, 0, 1) * width), int(np.clip(y2, 0, 1) * height)
+            if right > left and bottom > top:
+                boxes.append((top, right, bottom, left))
+        return boxes
+
+DETECTOR_BACKENDS = {
+    'hog': HOGDetector,
+    'haar': HaarDetector,
+    'dnn': DNNDetector
+}
+
+def create_detector(backend="hog", **params):
+    """
+    Crea un detector de rostros
+
+    Todos los detectores son invocables con una imagen RGB y devuelven cajas
+    (top, right, bottom, left), igual que face_recognition.face_locations.
+
+    Args:
+        backend (str): "hog", "haar" o "dnn"
+        **params: Parámetros del backend
+
+    Returns:
+        callable: Detector de rostros
+    """
+    if backend not in DETECTOR_BACKENDS:
+        raise ValueError(f"Detector de rostros no soportado: {backend}")
+    return DETECTOR_BACKENDS[backend](**params)
+
+def match_detections(boxes, reference_boxes, iou_threshold=0.5):
+    """
+    Cuenta las cajas de referencia que tienen una detección con IoU suficiente
+
+    Args:
+        boxes (list): Cajas detectadas (top, right, bottom, left)
+        reference_boxes (list): Cajas de referencia
+        iou_threshold (float): IoU mínima para considerar que coinciden
+
+    Returns:
+        int: Cajas de referencia encontradas
+    """
+    if not boxes or not reference_boxes:
+        return 0
+    return int((iou_matrix(reference_boxes, boxes).max(axis=1) >= iou_threshold).sum())
@@ -0,0 +1,148 @@
+import os
+import hashlib
+import numpy as np
+
+CACHE_FILE = "photo_cache.npz"
+
+def file_signature(photo_path):
+    """
+    Obtiene la firma rápida de una foto (fecha de modificación y tamaño)
+
+    Args:
+        photo_path (str): Ruta a la foto
+
+    Returns:
+        tuple: (mtime en nanosegundos, tamaño en bytes)
+    """
+    stat = os.stat(photo_path)
+    return stat.st_mtime_ns, stat.st_size
+
+def content_hash(photo_path):
+    """Calcula el hash SHA-1 del contenido de una foto"""
+    digest = hashlib.sha1()
+    with open(photo_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class PhotoEncodingCache:
+    """
+    Caché de encodings por foto, indexada por ruta relativa y validada por mtime/tamaño o hash de contenido
+    """
+    def __init__(self, cache_dir, dim=128):
+        """
+        Inicializa la caché
+
+        Args:
+            cache_dir (str): Directorio donde se guarda la caché (el de la galería)
+            dim (int): Dimensión de los encodings
+        """
+        self.cache_path = os.path.join(cache_dir, CACHE_FILE)
+        self.dim = dim
+        self.entries = {}  # ruta -> (mtime_ns, tamaño, hash, encoding o None si no hay rostro)
+
+    def load(self):
+        """
+        Carga la caché de disco; si no existe o está dañada, empieza vacía
+
+        Returns:
+            int: Número de fotos en caché
+        """
+        self.entries = {}
+        if not os.path.exists(self.cache_path):
+            return 0
+        try:
+            # Cada acceso a un miembro del npz lo vuelve a leer del zip: se extraen una sola vez
+            with np.load(self.cache_path, allow_pickle=False) as data:
+                paths = data['paths'].tolist()
+                mtimes = data['mtimes'].tolist()
+                sizes = data['sizes'].tolist()
+                hashes = data['hashes'].tolist()
+                has_face = data['has_face'].tolist()
+                encodings = data['encodings']
+            for i, path in enumerate(paths):
+                encoding = encodings[i] if has_face[i] else None
+                self.entries[path] = (mtimes[i], sizes[i], hashes[i], encoding)
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Caché de encodings no válida, se regenerará: {e}")
+            self.entries = {}
+        return len(self.entries)
+
+    def lookup(self, rel_path, photo_path):
+        """
+        Busca el encoding de una foto sin cambios
+
+        Si la fecha o el tamaño cambiaron pero el contenido es idéntico (por ejemplo,
+        la foto se copió o se tocó), se reutiliza el encoding y se actualiza la firma.
+
+        Args:
+            rel_path (str): Ruta relativa de la foto (clave de la caché)
+            photo_path (str): Ruta absoluta de la foto
+
+        Returns:
+            tuple: (encontrada, encoding o None si la foto no tiene rostro)
+        """
+        entry = self.entries.get(rel_path)
+        if entry is None:
+            return False, None
+
+        mtime, size = file_signature(photo_path)
+        if entry[0] == mtime and entry[1] == size:
+            return True, entry[3]
+
+        digest = content_hash(photo_path)
+        if entry[2] == digest:
+            self.entries[rel_path] = (mtime, size, digest, entry[3])
+            return True, entry[3]
+        return False, None
+
+    def store(self, rel_path, photo_path, encoding):
+        """
+        Guarda el resultado de codificar una foto
+
+        Args:
+            rel_path (str): Ruta relativa de la foto
+            photo_path (str): Ruta absoluta de la foto
+            encoding (numpy.ndarray): Encoding, o None si no se detectó ningún rostro
+        """
+        mtime, size = file_signature(photo_path)
+        self.entries[rel_path] = (mtime, size, content_hash(photo_path), encoding)
+
+    def prune(self, keep_paths):
+        """
+        Elimina de la caché las fotos que ya no existen
+
+        Args:
+            keep_paths (set): Rutas relativas de las fotos actuales
+
+        Returns:
+            int: Número de entradas eliminadas
+        """
+        removed = [path for path in self.entries if path not in keep_paths]
+        for path in removed:
+            del self.entries[path]
+        return len(removed)
+
+    def save(self):
+        """Guarda la caché en disco de forma atómica"""
+        paths = sorted(self.entries)
+        encodings = np.zeros((len(paths), self.dim), dtype=np.float32)
+        has_face = np.zeros(len(paths), dtype=bool)
+        for i, path in enumerate(paths):
+            encoding = self.entries[path][3]
+            if encoding is not None:
+                encodings[i] = encoding
+                has_face[i] = True
+
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + ".tmp.npz"
+        np.savez(
+            tmp_path,
+            paths=np.array(paths, dtype=str),
+            mtimes=np.array([self.entries[p][0] for p in paths], dtype=np.int64),
+            sizes=np.array([self.entries[p][1] for p in paths], dtype=np.int64),
+            hashes=np.array([self.entries[p][2] for p in paths], dtype=str),
+            has_face=has_face,
+            encodings=encodings
+        )
+        os.replace(tmp_path, self.cache_path)
@@ -0,0 +1,138 @@
+import numpy as np
+
+# Dimensión de los encodings generados por face_recognition
+ENCODING_DIM = 128
+
+class FaceGallery:
+    """
+    Galería de rostros conocidos almacenada como una única matriz contigua float32
+    """
+    def __init__(self, encodings, names, checksum=None, generation=None):
+        """
+        Inicializa la galería a partir de los encodings y nombres conocidos
+
+        Si encodings ya es una matriz float32 contigua (por ejemplo, mapeada en memoria
+        desde la galería binaria) se usa directamente, sin copiarla.
+
+        Args:
+            encodings (list | numpy.ndarray): Encodings conocidos (uno por fila)
+            names (list): Nombres correspondientes a cada encoding
+            checksum (str, optional): Checksum de la galería en disco, si se cargó de ella
+            generation (int, optional): Generación de la galería en disco, si se cargó de ella
+        """
+        self.names = list(names)
+        self.checksum = checksum
+        self.generation = generation
+
+        matrix = np.asarray(encodings, dtype=np.float32)
+        if matrix.size == 0:
+            matrix = np.empty((0, ENCODING_DIM), dtype=np.float32)
+        else:
+            matrix = matrix.reshape(len(matrix), -1)
+        self.encodings = np.ascontiguousarray(matrix)
+
+        if len(self.encodings) != len(self.names):
+            raise ValueError(
+                f"El número de encodings ({len(self.encodings)}) no coincide "
+                f"con el número de nombres ({len(self.names)})"
+            )
+
+        # Normas al cuadrado precalculadas para la expansión |a-b|² = |a|² + |b|² - 2ab
+        self.sq_norms = np.einsum('ij,ij->i', self.encodings, self.encodings)
+
+        # Índice de búsqueda opcional (si es None se usa la búsqueda exhaustiva)
+        self.index = None
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def dim(self):
+        """Dimensión de los encodings de la galería"""
+        return self.encodings.shape[1]
+
+    def squared_distances(self, face_encodings, rows=None):
+        """
+        Calcula las distancias euclídeas al cuadrado de cada rostro a la galería
+
+        Args:
+            face_encodings (list | numpy.ndarray): Encodings de los rostros detectados
+            rows (numpy.ndarray, optional): Filas de la galería a considerar. Si es None, se usan todas.
+
+        Returns:
+            numpy.ndarray: Matriz (rostros x filas) de distancias al cuadrado
+        """
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, self.dim)
+        matrix = self.encodings if rows is None else self.encodings[rows]
+        sq_norms = self.sq_norms if rows is None else self.sq_norms[rows]
+
+        query_sq_norms = np.einsum('ij,ij->i', queries, queries)
+        sq_dists = query_sq_norms[:, None] + sq_norms[None, :] - 2.0 * (queries @ matrix.T)
+
+        # Los errores de redondeo pueden producir valores ligeramente negativos
+        np.maximum(sq_dists, 0.0, out=sq_dists)
+        return sq_dists
+
+    def search(self, face_encodings, k=1):
+        """
+        Busca los k encodings más cercanos usando el índice configurado
+
+        Args:
+            face_encodings (list | numpy.ndarray): Encodings de los rostros detectados
+            k (int): Número de vecinos a devolver
+
+        Returns:
+            tuple: (distancias, índices) como matrices (rostros x k), ordenadas de menor a mayor
+        """
+        if self.index is not None:
+            return self.index.search(face_encodings, k=k)
+        return self.exact_search(face_encodings, k=k)
+
+    def exact_search(self, face_encodings, k=1):
+        """
+        Busca los k encodings más cercanos de la galería para cada rostro (búsqueda exacta)
+
+        Args:
+            face_encodings (list | numpy.ndarray): Encodings de los rostros detectados
+            k (int): Número de vecinos a devolver
+
+        Returns:
+            tuple: (distancias, índices) como matrices (rostros x k), ordenadas de menor a mayor
+        """
+        sq_dists = self.squared_distances(face_encodings)
+        k = min(k, len(self))
+
+        if k == 1:
+            indices = np.argmin(sq_dists, axis=1)[:, None]
+        else:
+            indices = np.argpartition(sq_dists, k - 1, axis=1)[:, :k]
+            order = np.argsort(np.take_along_axis(sq_dists, indices, axis=1), axis=1)
+            indices = np.take_along_axis(indices, order, axis=1)
+
+        distances = np.sqrt(np.take_along_axis(sq_dists, indices, axis=1))
+        return distances, indices
+
+    def match(self, face_encodings, tolerance=0.45):
+        """
+        Obtiene la mejor coincidencia de la galería para todos los rostros de un frame
+
+        Args:
+            face_encodings (list | numpy.ndarray): Encodings de los rostros detectados
+            tolerance (float): Distancia máxima para aceptar una coincidencia
+
+        Returns:
+            tuple: (índices, distancias, aceptados) con un elemento por rostro
+        """
+        num_faces = len(face_encodings)
+        if num_faces == 0 or len(self) == 0:
+            return (
+                np.full(num_faces, -1, dtype=np.intp),
+                np.full(num_faces, np.inf, dtype=np.float32),
+                np.zeros(num_faces, dtype=bool)
+            )
+
+        distances, indices = self.search(face_encodings, k=1)
+        best_indices = indices[:, 0]
+        best_distances = distances[:, 0]
+
+        return best_indices, best_distances, best_distances <= tolerance
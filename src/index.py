@@ -0,0 +1,107 @@
+import numpy as np
+from src.gallery import FaceGallery
+
+# Margen para absorber errores de redondeo float32 en la cota inferior
+_BOUND_EPSILON = 1e-4
+
+class CentroidIndex:
+    """
+    Índice de dos etapas: centroide por empleado y re-ranking sobre sus fotos
+    """
+    backend = "centroid"
+
+    def __init__(self, gallery, top_k=5):
+        """
+        Construye el índice de centroides a partir de una galería
+
+        Args:
+            gallery (FaceGallery): Galería con un encoding por foto
+            top_k (int): Número de empleados candidatos a re-evaluar por rostro
+        """
+        self.gallery = gallery
+        self.top_k = max(1, top_k)
+
+        # Agrupar las filas de la galería por nombre de empleado
+        names = np.asarray(gallery.names, dtype=object)
+        employee_names, labels = np.unique(names, return_inverse=True)
+        self.employee_names = list(employee_names)
+
+        order = np.argsort(labels, kind='stable')
+        counts = np.bincount(labels, minlength=len(self.employee_names))
+        self.rows = order
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        # Centroide y dispersión (radio máximo y distancia media) por empleado
+        dim = gallery.dim
+        sums = np.zeros((len(self.employee_names), dim), dtype=np.float64)
+        np.add.at(sums, labels, gallery.encodings)
+        centroids = (sums / np.maximum(counts, 1)[:, None]).astype(np.float32)
+
+        deltas = gallery.encodings - centroids[labels]
+        row_dists = np.sqrt(np.einsum('ij,ij->i', deltas, deltas))
+        self.radii = np.zeros(len(self.employee_names), dtype=np.float32)
+        np.maximum.at(self.radii, labels, row_dists)
+        self.mean_spread = (np.bincount(labels, weights=row_dists, minlength=len(self.employee_names))
+                            / np.maximum(counts, 1)).astype(np.float32)
+
+        self.centroids = FaceGallery(centroids, self.employee_names)
+
+    def __len__(self):
+        return len(self.employee_names)
+
+    def _employee_rows(self, employees):
+        """Devuelve las filas de la galería pertenecientes a los empleados indicados"""
+        return np.concatenate([self.rows[self.offsets[e]:self.offsets[e + 1]] for e in employees])
+
+    def search(self, face_encodings, k=1):
+        """
+        Busca los k encodings más cercanos con el mismo resultado que la búsqueda exhaustiva
+
+        Se preseleccionan los top_k empleados más cercanos por centroide y se re-evalúan sus
+        fotos. Cualquier otro empleado cuya cota inferior (distancia al centroide menos su
+        radio) no supere la k-ésima mejor distancia también se re-evalúa, por lo que el
+        resultado es exacto.
+
+        Args:
+            face_encodings (list | numpy.ndarray): Encodings de los rostros detectados
+            k (int): Número de vecinos a devolver
+
+        Returns:
+            tuple: (distancias, índices) como matrices (rostros x k), ordenadas de menor a mayor
+        """
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, self.gallery.dim)
+        k = min(k, len(self.gallery))
+
+        centroid_dists = np.sqrt(self.centroids.squared_distances(queries))
+        lower_bounds = centroid_dists - self.radii[None, :]
+
+        distances = np.empty((len(queries), k), dtype=np.float32)
+        indices = np.empty((len(queries), k), dtype=np.intp)
+
+        for q in range(len(queries)):
+            by_centroid = np.argsort(centroid_dists[q])
+            shortlist = by_centroid[:self.top_k]
+
+            rows = self._employee_rows(shortlist)
+            # Garantizar al menos k filas candidatas
+            next_employee = len(shortlist)
+            while len(rows) < k:
+                rows = np.concatenate((rows, self._employee_rows(by_centroid[next_employee:next_employee + 1])))
+                next_employee += 1
+
+            sq_dists = self.gallery.squared_distances(queries[q], rows=rows)[0]
+            kth_best = np.sqrt(np.partition(sq_dists, k - 1)[k - 1])
+
+            # Empleados fuera de la preselección que aún podrían mejorar el resultado
+            rest = by_centroid[next_employee:]
+            extra = rest[lower_bounds[q, rest] <= kth_best + _BOUND_EPSILON]
+            if len(extra):
+                extra_rows = self._employee_rows(extra)
+                rows = np.concatenate((rows, extra_rows))
+                sq_dists = np.concatenate((sq_dists, self.gallery.squared_distances(queries[q], rows=extra_rows)[0]))
+
+            best = np.argsort(sq_dists, kind='stable')[:k]
+            distances[q] = np.sqrt(sq_dists[best])
+            indices[q] = rows[best]
+
+        return distances, indices
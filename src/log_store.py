@@ -0,0 +1,220 @@
+import json
+import sqlite3
+import threading
+
+DB_FILE = "accesos.db"
+
+# Columnas fijas del registro; el resto de campos se guarda como JSON en 'extra'
+BASE_FIELDS = ('timestamp', 'nombre', 'acceso', 'confianza', 'camara_id')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS accesos (
+    id INTEGER PRIMARY KEY,
+    timestamp TEXT NOT NULL,
+    nombre TEXT NOT NULL,
+    acceso TEXT NOT NULL,
+    confianza REAL,
+    camara_id,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_accesos_timestamp ON accesos (timestamp);
+CREATE INDEX IF NOT EXISTS idx_accesos_nombre ON accesos (nombre, timestamp);
+CREATE INDEX IF NOT EXISTS idx_accesos_camara ON accesos (camara_id, timestamp);
+CREATE TABLE IF NOT EXISTS importaciones (
+    archivo TEXT PRIMARY KEY,
+    registros INTEGER NOT NULL
+);
+"""
+
+class SQLiteLogStore:
+    """
+    Almacén de registros de acceso en SQLite (modo WAL) con índices por fecha, nombre y cámara
+
+    Las escrituras se agrupan en una transacción por lote; las consultas usan una
+    conexión propia por hilo, de modo que leer no bloquea al escritor.
+    """
+    def __init__(self, db_path, synchronous="NORMAL"):
+        """
+        Abre (o crea) la base de datos
+
+        Args:
+            db_path (str): Ruta al archivo de la base de datos
+            synchronous (str): Modo PRAGMA synchronous ("NORMAL" o "FULL")
+        """
+        self.db_path = db_path
+        self.synchronous = synchronous
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        # Todas las conexiones abiertas, para cerrarlas (y hacer el checkpoint del WAL) al final
+        self._connections = set()
+        self._connections_lock = threading.Lock()
+
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+        conn.commit()
+
+    def _connection(self):
+        """Conexión del hilo actual (cada conexión solo se usa desde el hilo que la abrió)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or conn not in self._connections:
+            # check_same_thread=False solo para que close() pueda cerrarla desde otro hilo
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            with self._connections_lock:
+                self._connections.add(conn)
+            self._local.conn = conn
+        return conn
+
+    def write(self, entries, source=None):
+        """
+        Inserta un lote de registros en una sola transacción
+
+        Args:
+            entries (list): Registros (diccionarios con al menos los campos base)
+            source (str, optional): Archivo importado del que proceden; en la misma transacción
+                                    se suman a los registros ya importados de él (ver imported_count)
+        """
+        rows = []
+        for entry in entries:
+            extra = {key: value for key, value in entry.items() if key not in BASE_FIELDS}
+            rows.append((
+                entry['timestamp'], entry['nombre'], entry['acceso'], entry.get('confianza'),
+                entry.get('camara_id'), json.dumps(extra, ensure_ascii=False) if extra else None
+            ))
+        with self._write_lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO accesos (timestamp, nombre, acceso, confianza, camara_id, extra) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows
+                )
+                if source is not None:
+                    conn.execute(
+                        "INSERT INTO importaciones (archivo, registros) VALUES (?, ?) "
+                        "ON CONFLICT (archivo) DO UPDATE SET registros = registros + excluded.registros",
+                        (source, len(rows))
+                    )
+
+    def imported_count(self, source):
+        """
+        Registros ya importados de un archivo
+
+        Args:
+            source (str): Nombre del archivo importado
+
+        Returns:
+            int: Registros importados (0 si nunca se importó)
+        """
+        row = self._connection().execute(
+            "SELECT registros FROM importaciones WHERE archivo = ?", (source,)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def iter_query(self, name=None, start=None, end=None, access_type=None, camera_id=None, limit=None, offset=0):
+        """
+        Recorre los registros con filtros resueltos por los índices, sin cargarlos todos en memoria
+
+        Args:
+            name (str, optional): Filtrar por nombre
+            start (str, optional): Marca de tiempo mínima ("%Y-%m-%d %H:%M:%S")
+            end (str, optional): Marca de tiempo máxima ("%Y-%m-%d %H:%M:%S")
+            access_type (str, optional): 'PERMITIDO' o 'DENEGADO'
+            camera_id (int | str, optional): Filtrar por cámara
+            limit (int, optional): Número máximo de registros
+            offset (int): Registros a saltar antes del primero devuelto
+
+        Yields:
+            dict: Registros en orden cronológico
+        """
+        conditions, params = [], []
+        if name:
+            conditions.append("nombre = ?")
+            params.append(name)
+        if camera_id is not None:
+            conditions.append("camara_id = ?")
+            params.append(camera_id)
+        if start:
+            conditions.append("timestamp >= ?")
+            params.append(start)
+        if end:
+            conditions.append("timestamp <= ?")
+            params.append(end)
+        if access_type:
+            conditions.append("acceso = ?")
+            params.append(access_type)
+
+        sql = "SELECT timestamp, nombre, acceso, confianza, camara_id, extra FROM accesos"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY timestamp, id"
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend([-1 if limit is None else limit, offset])
+
+        for row in self._connection().execute(sql, params):
+            record = dict(zip(BASE_FIELDS, row[:5]))
+            if row[5]:
+                record.update(json.loads(row[5]))
+            yield record
+
+    def query(self, name=None, start=None, end=None, access_type=None, camera_id=None, limit=None, offset=0):
+        """
+        Consulta los registros con filtros resueltos por los índices
+
+        Returns:
+            list: Registros en orden cronológico (ver iter_query)
+        """
+        return list(self.iter_query(name, start, end, access_type, camera_id, limit, offset))
+
+    def count(self, start=None, end=None):
+        """
+        Número de registros, opcionalmente dentro de un rango de marcas de tiempo
+
+        Args:
+            start (str, optional): Marca de tiempo mínima
+            end (str, optional): Marca de tiempo máxima
+
+        Returns:
+            int: Número de registros
+        """
+        sql, params = "SELECT COUNT(*) FROM accesos WHERE 1 = 1", []
+        if start:
+            sql += " AND timestamp >= ?"
+            params.append(start)
+        if end:
+            sql += " AND timestamp <= ?"
+            params.append(end)
+        return self._connection().execute(sql, params).fetchone()[0]
+
+    def days(self, start=None, end=None):
+        """
+        Días con registros dentro de un rango de marcas de tiempo
+
+        Returns:
+            list: Días "AAAAMMDD" en orden cronológico
+        """
+        sql, params = "SELECT DISTINCT substr(timestamp, 1, 10) FROM accesos WHERE 1 = 1", []
+        if start:
+            sql += " AND timestamp >= ?"
+            params.append(start)
+        if end:
+            sql += " AND timestamp <= ?"
+            params.append(end)
+        sql += " ORDER BY 1"
+        return [row[0].replace('-', '') for row in self._connection().execute(sql, params)]
+
+    def close(self):
+        """
+        Cierra las conexiones de todos los hilos
+
+        Al cerrarse la última, SQLite vuelca el WAL a la base de datos. Un hilo que
+        vuelva a usar el almacén después abre una conexión nueva.
+        """
+        with self._write_lock, self._connections_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            conn.close()
+        self._local.conn = None
@@ -1,15 +1,287 @@
 import os
 import csv
+import glob
 import json
+import time
+import queue
+import atexit
 import logging
 from datetime import datetime
 import threading
+from src.dedup import AccessEventCoalescer
+from src.log_store import SQLiteLogStore, DB_FILE
+from src.rollups import RollupStore
+from src.archive import ArchiveManifest, write_day_archive, iter_day_archive, timestamp_to_int
+
+# Formatos del registro de accesos: "jsonl" (un registro por línea, solo se añade) o "json" (array heredado)
+LOG_FORMATS = ("jsonl", "json")
+
+# Prefijo de las particiones diarias: accesos_AAAAMMDD.csv / .jsonl / .json
+PARTITION_PREFIX = "accesos_"
+
+# Almacenamiento: archivos diarios CSV + JSONL/JSON, o base de datos SQLite indexada
+LOG_BACKENDS = ("files", "sqlite")
+
+# Políticas de fsync: "none" (lo decide el sistema operativo) o "batch" (tras cada lote escrito)
+FSYNC_POLICIES = ("none", "batch")
+
+def iter_log_entries(path):
+    """
+    Recorre los registros de un archivo de accesos, en formato JSONL o array JSON heredado
+
+    Los archivos JSONL se leen línea a línea, sin cargarlos completos en memoria.
+
+    Args:
+        path (str): Ruta al archivo (.jsonl o .json)
+
+    Yields:
+        dict: Registros del archivo (ninguno si no existe)
+    """
+    if not os.path.exists(path):
+        return
+    if path.endswith(".jsonl"):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # Línea incompleta (por ejemplo, escritura interrumpida): se ignora
+                    continue
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError:
+            data = []
+    yield from data
+
+def read_log_entries(path):
+    """
+    Lee los registros de un archivo de accesos, en formato JSONL o array JSON heredado
+
+    Args:
+        path (str): Ruta al archivo (.jsonl o .json)
+
+    Returns:
+        list: Registros del archivo (lista vacía si no existe)
+    """
+    return list(iter_log_entries(path))
+
+def list_partitions(log_dir, extension, start_day=None, end_day=None):
+    """
+    Lista las particiones diarias (accesos_AAAAMMDD.<ext>) que se solapan con un rango de fechas
+
+    Args:
+        log_dir (str): Directorio de los registros
+        extension (str): Extensión de las particiones ("jsonl", "json" o "csv")
+        start_day (str, optional): Primer día incluido ("AAAAMMDD")
+        end_day (str, optional): Último día incluido ("AAAAMMDD")
+
+    Returns:
+        list: Tuplas (día "AAAAMMDD", ruta) en orden cronológico
+    """
+    partitions = []
+    for path in glob.glob(os.path.join(log_dir, f"{PARTITION_PREFIX}[0-9]*.{extension}")):
+        day = os.path.basename(path)[len(PARTITION_PREFIX):-len(extension) - 1]
+        if len(day) != 8 or not day.isdigit():
+            continue
+        if (start_day and day < start_day) or (end_day and day > end_day):
+            continue
+        partitions.append((day, path))
+    return sorted(partitions)
+
+def convert_json_to_jsonl(json_path, jsonl_path=None, remove_source=False):
+    """
+    Convierte un archivo de accesos en formato array JSON a JSONL
+
+    Si el archivo JSONL de destino ya existe, los registros convertidos se colocan
+    delante de los que ya contiene, conservando el orden cronológico.
+
+    Args:
+        json_path (str): Ruta al archivo .json heredado
+        jsonl_path (str, optional): Ruta de destino (por defecto, la misma con extensión .jsonl)
+        remove_source (bool): Si es True, elimina el archivo .json tras convertirlo
+
+    Returns:
+        int: Número de registros convertidos
+    """
+    jsonl_path = jsonl_path or os.path.splitext(json_path)[0] + ".jsonl"
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, list):
+        raise ValueError(f"El archivo {json_path} no contiene un array de registros")
+
+    existing = read_log_entries(jsonl_path)
+    tmp_path = jsonl_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for entry in data + existing:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, jsonl_path)
+
+    if remove_source:
+        os.remove(json_path)
+    return len(data)
+
+def _day_bounds(day):
+    """Primera y última marca de tiempo de un día (formato AAAAMMDD)"""
+    date_str = f"{day[:4]}-{day[4:6]}-{day[6:]}"
+    return f"{date_str} 00:00:00", f"{date_str} 23:59:59"
+
+def _format_time(value):
+    """Convierte una fecha (datetime o texto) al formato de las marcas de tiempo del registro"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+class AsyncLogWriter(threading.Thread):
+    """
+    Hilo que guarda los registros de acceso por lotes (group commit)
+
+    Los registros se encolan en una cola acotada; el hilo los agrupa hasta reunir
+    batch_size registros o hasta que pasen flush_interval segundos desde el primero
+    y los escribe con una sola apertura de cada archivo. Si la cola se llena, put()
+    espera a que haya sitio: nunca se descarta un registro.
+    """
+    _STOP = object()
+
+    def __init__(self, write_batch, queue_size=10000, batch_size=256, flush_interval=0.5):
+        """
+        Inicializa el hilo escritor
+
+        Args:
+            write_batch (callable): Función que guarda una lista de registros
+            queue_size (int): Registros pendientes como máximo
+            batch_size (int): Registros por lote como máximo
+            flush_interval (float): Segundos máximos que espera un registro antes de escribirse
+        """
+        super().__init__(name="access-log-writer", daemon=True)
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._close_lock = threading.Lock()
+        self._closed = False
+
+        self.records_written = 0
+        self.batches = 0
+        self.max_batch_size = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+
+    def put(self, entry):
+        """
+        Encola un registro para escribirlo en el siguiente lote
+
+        Si el escritor ya se cerró, el registro se escribe directamente en el hilo que
+        llama para no perderlo.
+        """
+        with self._close_lock:
+            closed = self._closed
+            if not closed:
+                self._queue.put(entry)
+        if closed:
+            self._flush([entry])
+
+    def run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch = []
+            if item is self._STOP:
+                stopping = True
+            else:
+                batch.append(item)
+
+            # Agrupar hasta llenar el lote o agotar el intervalo de espera
+            deadline = time.monotonic() + self.flush_interval
+            while not stopping and len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                else:
+                    batch.append(item)
+
+            # Al cerrar se vacía todo lo que quede en la cola
+            if stopping:
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+            if batch:
+                self._flush(batch)
+            for _ in range(len(batch) + (1 if stopping else 0)):
+                self._queue.task_done()
+
+    def _flush(self, batch):
+        start = time.perf_counter()
+        try:
+            self.write_batch(batch)
+        except Exception as e:
+            logging.getLogger("access_logger").error(f"Error al escribir lote de accesos: {e}")
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+
+        self.records_written += len(batch)
+        self.batches += 1
+        self.max_batch_size = max(self.max_batch_size, len(batch))
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self._total_flush_ms += elapsed_ms
+
+    def flush(self):
+        """Espera a que se hayan escrito todos los registros encolados"""
+        if self.is_alive():
+            self._queue.join()
+
+    def stats(self):
+        """
+        Estadísticas del escritor
+
+        Returns:
+            dict: Profundidad de la cola, registros y lotes escritos, tamaño medio/máximo
+                  de lote y latencia de volcado (última, media y máxima, en ms)
+        """
+        return {
+            'queue_depth': self._queue.qsize(),
+            'records_written': self.records_written,
+            'batches': self.batches,
+            'avg_batch_size': self.records_written / self.batches if self.batches else 0.0,
+            'max_batch_size': self.max_batch_size,
+            'last_flush_ms': self.last_flush_ms,
+            'avg_flush_ms': self._total_flush_ms / self.batches if self.batches else 0.0,
+            'max_flush_ms': self.max_flush_ms
+        }
+
+    def close(self):
+        """Escribe los registros pendientes y detiene el hilo (se puede llamar varias veces)"""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self.is_alive():
+            self._queue.put(self._STOP)
+            self.join()
 
 class AccessLogger:
     """
     Clase para gestionar el registro de accesos al sistema
     """
-    def __init__(self, log_dir="logs", csv_filename=None, json_filename=None):
+    def __init__(self, log_dir="logs", csv_filename=None, json_filename=None, log_format="jsonl",
+                 async_writes=False, queue_size=10000, batch_size=256, flush_interval=0.5, fsync_policy="none",
+                 dedup_window=0.0, unknown_distance=0.5, backend="files", rollups=True):
         """
         Inicializa el logger de accesos
         
@@ -17,22 +289,53 @@ class AccessLogger:
             log_dir (str): Directorio donde se guardarán los logs
             csv_filename (str, optional): Nombre del archivo CSV para logs
             json_filename (str, optional): Nombre del archivo JSON para logs
+            log_format (str): Formato del registro estructurado ("jsonl" o "json")
+            async_writes (bool): Si es True, los registros se escriben por lotes en un hilo aparte
+            queue_size (int): Registros pendientes como máximo en modo asíncrono
+            batch_size (int): Registros por lote como máximo en modo asíncrono
+            flush_interval (float): Segundos máximos que espera un registro antes de escribirse
+            fsync_policy (str): "none" o "batch" (fsync tras cada escritura)
+            dedup_window (float): Segundos entre dos eventos de la misma persona y cámara (0 = registrar todos)
+            unknown_distance (float): Distancia máxima entre encodings para agrupar a un mismo desconocido
+            backend (str): "files" (CSV + JSONL/JSON diarios) o "sqlite" (base de datos indexada en log_dir)
+            rollups (bool): Si es True, mantiene contadores diarios agregados para las estadísticas
         """
+        if backend not in LOG_BACKENDS:
+            raise ValueError(f"Backend de log no soportado: {backend}")
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f"Formato de log no soportado: {log_format}")
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"Política de fsync no soportada: {fsync_policy}")
         self.log_dir = log_dir
+        self.log_format = log_format
+        self.fsync_policy = fsync_policy
+        self.backend = backend
         os.makedirs(log_dir, exist_ok=True)
         
-        # Configurar nombres de archivos
+        # Nombres fijos de archivo (desactivan la partición diaria) si se indican
         date_str = datetime.now().strftime("%Y%m%d")
-        self.csv_filename = csv_filename or f"accesos_{date_str}.csv"
-        self.json_filename = json_filename or f"accesos_{date_str}.json"
+        self.csv_filename = csv_filename
+        self.json_filename = json_filename
         
-        # Rutas completas
-        self.csv_path = os.path.join(log_dir, self.csv_filename)
-        self.json_path = os.path.join(log_dir, self.json_filename)
+        # Inicializar archivos (o la base de datos) si no existen
+        self.store = None
+        if backend == "sqlite":
+            self.store = SQLiteLogStore(
+                os.path.join(log_dir, DB_FILE), synchronous="FULL" if fsync_policy == "batch" else "NORMAL"
+            )
+        else:
+            self._init_csv_file(self.csv_path)
+            self._init_json_file(self.json_path)
         
-        # Inicializar archivos si no existen
-        self._init_csv_file()
-        self._init_json_file()
+        # Archivo columnar de los días cerrados
+        self.archive = ArchiveManifest(log_dir)
+        
+        # Contadores agregados por día (no aplican con un archivo fijo que mezcla días)
+        self.rollups = None
+        if rollups and not json_filename:
+            self.rollups = RollupStore(log_dir)
+        # Tamaño de los datos de cada día ya validado contra sus contadores (ver _write_batch)
+        self._source_sizes = {}
         
         # Mutex para acceso concurrente
         self.lock = threading.Lock()
@@ -45,32 +348,86 @@ class AccessLogger:
             handler.setFormatter(formatter)
             self.logger.addHandler(handler)
             self.logger.setLevel(logging.INFO)
+        
+        # Agrupación de detecciones repetidas de una misma persona
+        self.coalescer = AccessEventCoalescer(dedup_window, unknown_distance) if dedup_window > 0 else None
+        self._dedup_lock = threading.Lock()
+        
+        # Escritor asíncrono; al salir del intérprete (también tras Ctrl+C) se vacía la cola
+        self.writer = None
+        if async_writes:
+            self.writer = AsyncLogWriter(
+                self._write_batch, queue_size=queue_size, batch_size=batch_size, flush_interval=flush_interval
+            )
+            self.writer.start()
+            atexit.register(self.close)
     
-    def _init_csv_file(self):
+    def partition_paths(self, day):
+        """
+        Rutas de los archivos CSV y JSONL/JSON de un día
+        
+        Args:
+            day (str): Día en formato "AAAAMMDD"
+            
+        Returns:
+            tuple: (ruta CSV, ruta JSONL/JSON)
+        """
+        csv_filename = self.csv_filename or f"{PARTITION_PREFIX}{day}.csv"
+        json_filename = self.json_filename or f"{PARTITION_PREFIX}{day}.{self.log_format}"
+        return os.path.join(self.log_dir, csv_filename), os.path.join(self.log_dir, json_filename)
+    
+    @property
+    def csv_path(self):
+        """Archivo CSV del día actual"""
+        return self.partition_paths(datetime.now().strftime("%Y%m%d"))[0]
+    
+    @property
+    def json_path(self):
+        """Archivo JSONL/JSON del día actual"""
+        return self.partition_paths(datetime.now().strftime("%Y%m%d"))[1]
+    
+    def _init_csv_file(self, csv_path):
         """Inicializa el archivo CSV si no existe"""
-        if not os.path.exists(self.csv_path):
-            with open(self.csv_path, 'w', newline='') as f:
+        if not os.path.exists(csv_path):
+            with open(csv_path, 'w', newline='') as f:
                 writer = csv.writer(f)
                 writer.writerow(['timestamp', 'nombre', 'acceso', 'confianza', 'camara_id'])
     
-    def _init_json_file(self):
+    def _init_json_file(self, json_path):
         """Inicializa el archivo JSON si no existe"""
-        if not os.path.exists(self.json_path):
-            with open(self.json_path, 'w') as f:
-                json.dump([], f)
+        if not os.path.exists(json_path):
+            with open(json_path, 'w') as f:
+                if self.log_format == "json":
+                    json.dump([], f)
     
-    def log_access(self, name, access_granted, confidence=0.0, camera_id=0, extra_data=None):
+    def log_access(self, name, access_granted, confidence=0.0, camera_id=0, extra_data=None, face_encoding=None,
+                   timestamp=None):
         """
         Registra un acceso en los archivos de log
         
+        Con escritura asíncrona, el registro se encola y la llamada vuelve de inmediato;
+        el hilo escritor lo guarda junto con los demás registros de su lote. Con la
+        agrupación activa, las detecciones repetidas dentro de la ventana no se registran.
+        
         Args:
             name (str): Nombre de la persona
             access_granted (bool): Si se concedió acceso o no
             confidence (float): Nivel de confianza del reconocimiento
             camera_id (int): ID de la cámara utilizada
             extra_data (dict, optional): Datos adicionales para incluir en el log
+            face_encoding (numpy.ndarray, optional): Encoding del rostro, para agrupar desconocidos
+            timestamp (datetime, optional): Momento del acceso (por defecto, ahora); al procesar
+                grabaciones es la hora del frame en la grabación
         """
-        timestamp = datetime.now()
+        timestamp = timestamp or datetime.now()
+        
+        if self.coalescer is not None:
+            with self._dedup_lock:
+                emit, closed = self.coalescer.observe(name, camera_id, timestamp.timestamp(), face_encoding)
+            self._log_summaries(closed)
+            if not emit:
+                return
+        
         timestamp_str = timestamp.strftime("%Y-%m-%d %H:%M:%S")
         
         # Crear registro
@@ -86,94 +443,435 @@ class AccessLogger:
         if extra_data and isinstance(extra_data, dict):
             log_entry.update(extra_data)
         
+        if self.writer is not None:
+            self.writer.put(log_entry)
+        else:
+            self._write_batch([log_entry])
+    
+    def _write_batch(self, entries):
+        """
+        Guarda un lote de registros abriendo cada archivo una sola vez
+        
+        Args:
+            entries (list): Registros a guardar, en orden de llegada
+        """
         # Registrar en el logger de sistema
-        access_status = "PERMITIDO" if access_granted else "DENEGADO"
-        self.logger.info(f"Acceso {access_status} - Usuario: {name} - Confianza: {confidence:.4f}")
+        for entry in entries:
+            self.logger.info(
+                f"Acceso {entry['acceso']} - Usuario: {entry['nombre']} - Confianza: {entry['confianza']:.4f}"
+            )
+        
+        # Cada registro va a la partición de su día (cambio de día sin reiniciar)
+        partitions = {}
+        for entry in entries:
+            partitions.setdefault(entry['timestamp'][:10].replace('-', ''), []).append(entry)
         
         # Usar lock para evitar problemas de concurrencia
         with self.lock:
-            # Guardar en CSV
-            try:
-                with open(self.csv_path, 'a', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow([
-                        timestamp_str, 
-                        name, 
-                        'PERMITIDO' if access_granted else 'DENEGADO',
-                        round(confidence, 4),
-                        camera_id
-                    ])
-            except Exception as e:
-                self.logger.error(f"Error al escribir en CSV: {e}")
+            # Los contadores deben reflejar los datos previos al lote antes de sumarlo. Se
+            # validan la primera vez que se escribe en un día (al arrancar o al cambiar de
+            # día); después el tamaño se sigue a partir de lo que añade cada lote
+            for day in partitions:
+                if day not in self._source_sizes:
+                    self._ensure_rollup(day)
             
-            # Guardar en JSON
-            try:
-                # Leer datos existentes
-                with open(self.json_path, 'r') as f:
+            if self.store is not None:
+                # Base de datos: todo el lote en una transacción
+                try:
+                    self.store.write(entries)
+                except Exception as e:
+                    self.logger.error(f"Error al escribir en la base de datos: {e}")
+                    return
+                appended = {day: len(day_entries) for day, day_entries in partitions.items()}
+            else:
+                appended = {day: self._write_partition(day, day_entries) for day, day_entries in partitions.items()}
+            
+            if self.rollups is not None:
+                for day, day_entries in partitions.items():
                     try:
-                        data = json.load(f)
-                    except json.JSONDecodeError:
-                        data = []
+                        source_size = self._next_source_size(day, appended[day])
+                        self.rollups.update(day, day_entries, source_size=source_size)
+                        self._source_sizes[day] = source_size
+                    except Exception as e:
+                        self._source_sizes.pop(day, None)
+                        self.logger.error(f"Error al actualizar los contadores: {e}")
+    
+    def _next_source_size(self, day, appended):
+        """
+        Tamaño de los datos de un día tras añadir un lote
+        
+        Args:
+            day (str): Día "AAAAMMDD"
+            appended (int): Bytes o filas añadidos por el lote (None si no se conocen)
+            
+        Returns:
+            int | str: Tamaño validado más lo añadido, o el tamaño leído de disco si no se puede sumar
+        """
+        known = self._source_sizes.get(day)
+        if isinstance(known, int) and appended is not None:
+            return known + appended
+        return self._source_size(day)
+    
+    def _source_size(self, day):
+        """Tamaño de los datos originales de un día: bytes del archivo, registros archivados o filas de la base de datos"""
+        if self.store is not None:
+            start, end = _day_bounds(day)
+            return self.store.count(start, end)
+        zone = self.archive.refresh().days.get(day)
+        if zone is not None:
+            return f"archive:{zone['records']}"
+        json_path = self.partition_paths(day)[1]
+        return os.path.getsize(json_path) if os.path.exists(json_path) else 0
+    
+    def _raw_days(self, start_day=None, end_day=None):
+        """Días con registros originales dentro del rango"""
+        if self.store is not None:
+            start = _day_bounds(start_day)[0] if start_day else None
+            end = _day_bounds(end_day)[1] if end_day else None
+            return self.store.days(start, end)
+        days = {day for day, _ in list_partitions(self.log_dir, self.log_format, start_day, end_day)}
+        days.update(day for day in self.archive.refresh().days
+                    if (not start_day or day >= start_day) and (not end_day or day <= end_day))
+        return sorted(days)
+    
+    def archive_closed_days(self, before_day=None, remove_raw=True):
+        """
+        Compacta las particiones de días cerrados en el archivo columnar comprimido
+        
+        Args:
+            before_day (str, optional): Se archivan los días anteriores a este ("AAAAMMDD"; por defecto, hoy)
+            remove_raw (bool): Si es True, elimina los archivos CSV y JSONL/JSON ya archivados
+            
+        Returns:
+            list: Tuplas (día, registros, bytes originales, bytes archivados) de cada día archivado
+        """
+        if self.store is not None or self.json_filename:
+            raise ValueError("El archivo columnar solo está disponible con particiones diarias en archivos")
+        self.flush()
+        before_day = before_day or datetime.now().strftime("%Y%m%d")
+        
+        archived = []
+        with self.lock:
+            self.archive.refresh()
+            for day, json_path in list_partitions(self.log_dir, self.log_format, end_day=before_day):
+                if day >= before_day or day in self.archive.days:
+                    continue
+                csv_path = self.partition_paths(day)[0]
+                raw_bytes = os.path.getsize(json_path) + (os.path.getsize(csv_path) if os.path.exists(csv_path) else 0)
                 
-                # Añadir nuevo registro
-                data.append(log_entry)
+                archive_path = self.archive.day_path(day)
+                os.makedirs(os.path.dirname(archive_path), exist_ok=True)
+                zone = write_day_archive(archive_path, read_log_entries(json_path))
+                self.archive.add(day, zone)
                 
-                # Guardar datos actualizados
-                with open(self.json_path, 'w') as f:
-                    json.dump(data, f, indent=2)
-            except Exception as e:
-                self.logger.error(f"Error al escribir en JSON: {e}")
+                if remove_raw:
+                    for path in (json_path, csv_path):
+                        if os.path.exists(path):
+                            os.remove(path)
+                
+                # Los contadores pasan a apuntar al archivo columnar
+                self._ensure_rollup(day)
+                archived.append((day, zone['records'], raw_bytes, os.path.getsize(archive_path)))
+        return archived
     
-    def get_access_history(self, name=None, start_date=None, end_date=None, access_type=None):
+    def _ensure_rollup(self, day, rebuild=False):
         """
-        Obtiene el historial de accesos con filtros opcionales
+        Devuelve los contadores de un día, recalculándolos desde los registros si faltan o no cuadran
+        
+        Args:
+            day (str): Día "AAAAMMDD"
+            rebuild (bool): Si es True, los recalcula siempre
+            
+        Returns:
+            dict: Contadores del día, o None si los contadores están desactivados
+        """
+        if self.rollups is None:
+            return None
+        try:
+            rollup = self.rollups.load(day)
+            source_size = self._source_size(day)
+            if rebuild or rollup is None or rollup.get('source_size') != source_size:
+                start, end = _day_bounds(day)
+                rollup = self.rollups.rebuild(day, self._iter_records(start_str=start, end_str=end), source_size)
+            self._source_sizes[day] = source_size
+            return rollup
+        except Exception as e:
+            self.logger.error(f"Error al recalcular los contadores del día {day}: {e}")
+            return None
+    
+    def get_rollups(self, start_date=None, end_date=None, rebuild=False):
+        """
+        Contadores agregados por día (día × acceso, usuario × acceso, cámara × hora)
+        
+        Solo se recorren los registros originales de los días cuyos contadores faltan
+        o no coinciden con los datos (o de todos si se pide reconstruirlos).
         
         Args:
-            name (str, optional): Filtrar por nombre
             start_date (datetime, optional): Fecha de inicio
             end_date (datetime, optional): Fecha de fin
-            access_type (str, optional): Tipo de acceso ('PERMITIDO' o 'DENEGADO')
+            rebuild (bool): Si es True, recalcula los contadores desde los registros
             
         Returns:
-            list: Lista de registros que cumplen los criterios
+            dict: Día "AAAAMMDD" -> contadores (ver src.rollups)
+        """
+        if self.rollups is None:
+            return {}
+        self.flush()
+        
+        start_day = _format_time(start_date)[:10].replace('-', '') if start_date else None
+        end_day = _format_time(end_date)[:10].replace('-', '') if end_date else None
+        
+        result = {}
+        with self.lock:
+            raw_days = set(self._raw_days(start_day, end_day))
+            for day in sorted(raw_days | set(self.rollups.days(start_day, end_day))):
+                # Días sin registros originales: los contadores guardados son la única fuente
+                rollup = self._ensure_rollup(day, rebuild) if day in raw_days else self.rollups.load(day)
+                if rollup is not None:
+                    result[day] = rollup
+        return result
+    
+    def _write_partition(self, day, entries):
+        """
+        Añade registros a los archivos de un día, creándolos si es necesario
+        
+        Returns:
+            int: Bytes añadidos al archivo JSONL, o None si no se conocen (formato JSON o error)
         """
+        csv_path, json_path = self.partition_paths(day)
+        self._init_csv_file(csv_path)
+        self._init_json_file(json_path)
+        
+        # Guardar en CSV
         try:
-            with open(self.json_path, 'r') as f:
-                data = json.load(f)
+            with open(csv_path, 'a', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerows([
+                    [entry['timestamp'], entry['nombre'], entry['acceso'], entry['confianza'], entry['camara_id']]
+                    for entry in entries
+                ])
+                self._sync(f)
+        except Exception as e:
+            self.logger.error(f"Error al escribir en CSV: {e}")
+        
+        # Guardar en JSONL: una línea por registro, sin reescribir el archivo
+        if self.log_format == "jsonl":
+            data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries).encode('utf-8')
+            try:
+                with open(json_path, 'ab') as f:
+                    f.write(data)
+                    self._sync(f)
+            except Exception as e:
+                self.logger.error(f"Error al escribir en JSONL: {e}")
+                return None
+            return len(data)
+        
+        # Guardar en JSON (formato heredado: reescribe el array completo)
+        try:
+            # Leer datos existentes
+            with open(json_path, 'r') as f:
+                try:
+                    data = json.load(f)
+                except json.JSONDecodeError:
+                    data = []
+            
+            # Añadir nuevos registros
+            data.extend(entries)
             
-            # Aplicar filtros
-            filtered_data = data
+            # Guardar datos actualizados
+            with open(json_path, 'w') as f:
+                json.dump(data, f, indent=2)
+                self._sync(f)
+        except Exception as e:
+            self.logger.error(f"Error al escribir en JSON: {e}")
+        return None
+    
+    def _log_summaries(self, summaries):
+        """Registra en el log de sistema el resumen de los episodios cerrados"""
+        for summary in summaries:
+            first = datetime.fromtimestamp(summary['primera']).strftime("%Y-%m-%d %H:%M:%S")
+            last = datetime.fromtimestamp(summary['ultima']).strftime("%Y-%m-%d %H:%M:%S")
+            self.logger.info(
+                f"Resumen - Usuario: {summary['nombre']} - Cámara: {summary['camara_id']} - "
+                f"Detecciones: {summary['detecciones']} - Desde {first} hasta {last}"
+            )
+    
+    def _sync(self, f):
+        """Fuerza el volcado a disco si la política de fsync lo requiere"""
+        if self.fsync_policy == "batch":
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def flush(self):
+        """Espera a que se hayan guardado todos los registros encolados"""
+        if self.writer is not None:
+            self.writer.flush()
+    
+    def stats(self):
+        """
+        Estadísticas de la escritura asíncrona
+        
+        Returns:
+            dict: Profundidad de la cola, lotes, tamaño de lote y latencia de volcado (vacío en modo síncrono)
+        """
+        return self.writer.stats() if self.writer is not None else {}
+    
+    def close(self):
+        """Cierra los episodios abiertos, vacía la cola de registros pendientes y detiene el hilo escritor"""
+        if self.coalescer is not None:
+            with self._dedup_lock:
+                closed = self.coalescer.close_all()
+            self._log_summaries(closed)
+        if self.writer is not None:
+            self.writer.close()
+        if self.store is not None:
+            self.store.close()
+    
+    def _iter_file_records(self, name=None, start_str=None, end_str=None, access_type=None, camera_id=None):
+        """
+        Registros de las particiones diarias y del archivo columnar que cumplen los filtros
+        
+        Solo se abren las particiones que se solapan con el rango y, de los días archivados,
+        los que el mapa de zonas no descarta.
+        
+        Yields:
+            dict: Registros en orden cronológico
+        """
+        if self.json_filename:
+            sources = [(None, os.path.join(self.log_dir, self.json_filename), False)]
+        else:
+            start_day = start_str[:10].replace('-', '') if start_str else None
+            end_day = end_str[:10].replace('-', '') if end_str else None
+            self.archive.refresh()
             
-            if name:
-                filtered_data = [entry for entry in filtered_data if entry['nombre'] == name]
+            # Un día archivado se lee del archivo columnar aunque queden sus archivos originales
+            sources = [
+                (day, path, False)
+                for day, path in list_partitions(self.log_dir, self.log_format, start_day, end_day)
+                if day not in self.archive.days
+            ]
+            start_int = timestamp_to_int(start_str) if start_str else None
+            end_int = timestamp_to_int(end_str) if end_str else None
+            sources.extend(
+                (day, self.archive.day_path(day), True)
+                for day in self.archive.matching_days(start_day, end_day, start_int, end_int, name)
+            )
+            sources.sort()
+        
+        for _, path, archived in sources:
+            if archived:
+                yield from iter_day_archive(
+                    path, name=name, access_type=access_type, camera_id=camera_id,
+                    start=timestamp_to_int(start_str) if start_str else None,
+                    end=timestamp_to_int(end_str) if end_str else None
+                )
+                continue
             
-            if start_date:
-                if isinstance(start_date, str):
-                    start_date = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S")
-                start_str = start_date.strftime("%Y-%m-%d %H:%M:%S")
-                filtered_data = [entry for entry in filtered_data if entry['timestamp'] >= start_str]
+            for entry in iter_log_entries(path):
+                if name and entry['nombre'] != name:
+                    continue
+                if camera_id is not None and entry['camara_id'] != camera_id:
+                    continue
+                if start_str and entry['timestamp'] < start_str:
+                    continue
+                if end_str and entry['timestamp'] > end_str:
+                    continue
+                if access_type and entry['acceso'] != access_type:
+                    continue
+                yield entry
+    
+    def iter_access_history(self, name=None, start_date=None, end_date=None, access_type=None, camera_id=None,
+                            limit=None, offset=0):
+        """
+        Recorre el historial de accesos de forma perezosa, aplicando todos los filtros en una pasada
+        
+        Los registros se leen partición a partición y línea a línea, por lo que la memoria
+        usada no depende del tamaño del historial.
+        
+        Args:
+            name (str, optional): Filtrar por nombre
+            start_date (datetime, optional): Fecha de inicio
+            end_date (datetime, optional): Fecha de fin
+            access_type (str, optional): Tipo de acceso ('PERMITIDO' o 'DENEGADO')
+            camera_id (int, optional): Filtrar por cámara
+            limit (int, optional): Número máximo de registros
+            offset (int): Registros que cumplen los filtros a saltar antes del primero devuelto
             
-            if end_date:
-                if isinstance(end_date, str):
-                    end_date = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S")
-                end_str = end_date.strftime("%Y-%m-%d %H:%M:%S")
-                filtered_data = [entry for entry in filtered_data if entry['timestamp'] <= end_str]
+        Yields:
+            dict: Registros que cumplen los criterios, en orden cronológico
+        """
+        # Los registros aún encolados también forman parte del historial
+        self.flush()
+        
+        yield from self._iter_records(
+            name=name, start_str=_format_time(start_date), end_str=_format_time(end_date),
+            access_type=access_type, camera_id=camera_id, limit=limit, offset=offset
+        )
+    
+    def _iter_records(self, name=None, start_str=None, end_str=None, access_type=None, camera_id=None,
+                      limit=None, offset=0):
+        """Recorre los registros guardados sin esperar a los encolados (ver iter_access_history)"""
+        # Base de datos: los filtros, el límite y el desplazamiento se resuelven en SQL
+        if self.store is not None:
+            yield from self.store.iter_query(
+                name=name, start=start_str, end=end_str, access_type=access_type, camera_id=camera_id,
+                limit=limit, offset=offset
+            )
+            return
+        
+        if limit is not None and limit <= 0:
+            return
+        
+        skipped = 0
+        returned = 0
+        for entry in self._iter_file_records(name, start_str, end_str, access_type, camera_id):
+            if skipped < offset:
+                skipped += 1
+                continue
             
-            if access_type:
-                filtered_data = [entry for entry in filtered_data if entry['acceso'] == access_type]
+            yield entry
+            returned += 1
+            if limit is not None and returned >= limit:
+                return
+    
+    def get_access_history(self, name=None, start_date=None, end_date=None, access_type=None, camera_id=None,
+                           limit=None, offset=0):
+        """
+        Obtiene el historial de accesos con filtros opcionales
+        
+        Args:
+            name (str, optional): Filtrar por nombre
+            start_date (datetime, optional): Fecha de inicio
+            end_date (datetime, optional): Fecha de fin
+            access_type (str, optional): Tipo de acceso ('PERMITIDO' o 'DENEGADO')
+            camera_id (int, optional): Filtrar por cámara
+            limit (int, optional): Número máximo de registros
+            offset (int): Registros a saltar antes del primero devuelto
             
-            return filtered_data
+        Returns:
+            list: Lista de registros que cumplen los criterios
+        """
+        try:
+            return list(self.iter_access_history(
+                name=name, start_date=start_date, end_date=end_date, access_type=access_type,
+                camera_id=camera_id, limit=limit, offset=offset
+            ))
         except Exception as e:
             self.logger.error(f"Error al obtener historial: {e}")
             return []
     
-    def generate_report(self, output_file=None, format_type='csv'):
+    def generate_report(self, output_file=None, format_type='csv', start_date=None, end_date=None):
         """
         Genera un informe de accesos
         
+        Sin fechas, el informe incluye todo el historial; para el informe de un día
+        hay que indicar sus límites (ver generate_final_report en main.py).
+        
         Args:
             output_file (str, optional): Ruta del archivo de salida
             format_type (str): Formato del informe ('csv' o 'json')
+            start_date (datetime, optional): Primer instante incluido (por defecto, el más antiguo)
+            end_date (datetime, optional): Último instante incluido (por defecto, el más reciente)
             
         Returns:
             str: Ruta del archivo generado
@@ -183,24 +881,28 @@ class AccessLogger:
             output_file = os.path.join(self.log_dir, f"reporte_accesos_{timestamp}.{format_type}")
         
         try:
-            data = self.get_access_history()
+            if format_type.lower() not in ('csv', 'json'):
+                raise ValueError(f"Formato no soportado: {format_type}")
+            
+            # El informe se escribe a medida que se leen los registros (memoria constante)
+            records = self.iter_access_history(start_date=start_date, end_date=end_date)
             
             if format_type.lower() == 'csv':
                 with open(output_file, 'w', newline='') as f:
-                    writer = csv.writer(f)
-                    # Escribir encabezados
-                    if data:
-                        writer.writerow(data[0].keys())
-                        # Escribir datos
-                        for entry in data:
-                            writer.writerow(entry.values())
-            
-            elif format_type.lower() == 'json':
-                with open(output_file, 'w') as f:
-                    json.dump(data, f, indent=2)
+                    writer = None
+                    for entry in records:
+                        # Encabezados a partir del primer registro
+                        if writer is None:
+                            writer = csv.DictWriter(f, fieldnames=list(entry.keys()), extrasaction='ignore', restval='')
+                            writer.writeheader()
+                        writer.writerow(entry)
             
             else:
-                raise ValueError(f"Formato no soportado: {format_type}")
+                with open(output_file, 'w') as f:
+                    f.write("[")
+                    for i, entry in enumerate(records):
+                        f.write(("," if i else "") + "\n  " + json.dumps(entry))
+                    f.write("\n]\n")
             
             self.logger.info(f"Reporte generado: {output_file}")
             return output_file
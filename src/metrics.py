@@ -0,0 +1,261 @@
+import logging
+import threading
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Etapas del camino caliente, en el orden en que las recorre un frame
+STAGES = ('grab', 'resize', 'cvtcolor', 'detect', 'quality', 'encode', 'match', 'log', 'draw', 'display')
+
+# Contadores por cámara
+COUNTERS = ('frames', 'faces', 'matches', 'unknowns', 'rejected')
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+class RollingHistogram:
+    """
+    Últimas N duraciones de una etapa en un buffer circular, más totales acumulados
+
+    Añadir una muestra es una escritura en un array preasignado; los percentiles solo
+    se calculan al consultarlos (endpoint o línea de estadísticas).
+    """
+    def __init__(self, window=2048):
+        self._values = np.zeros(window, dtype=np.float64)
+        self._position = 0
+        self._filled = 0
+        self._lock = threading.Lock()
+        self.count = 0
+        self.sum = 0.0
+
+    def add(self, seconds):
+        with self._lock:
+            self._values[self._position] = seconds
+            self._position = (self._position + 1) % len(self._values)
+            if self._filled < len(self._values):
+                self._filled += 1
+            self.count += 1
+            self.sum += seconds
+
+    def quantiles(self, quantiles=QUANTILES):
+        """
+        Percentiles de la ventana actual
+
+        Returns:
+            list: Valores en segundos alineados con quantiles, o None si no hay muestras
+        """
+        with self._lock:
+            if not self._filled:
+                return None
+            values = self._values[:self._filled].copy()
+        return [float(value) for value in np.quantile(values, quantiles)]
+
+class CameraMetrics:
+    """
+    Métricas de una cámara: histogramas por etapa, contadores y frames descartados
+
+    Sirve como receptor de tiempos de recognize_faces (método add).
+    """
+    def __init__(self, camera_id, window=2048):
+        self.camera_id = camera_id
+        self.window = window
+        self.stages = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self._dropped_fn = None
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        """Registra la duración de una etapa"""
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.stages.setdefault(stage, RollingHistogram(self.window))
+        histogram.add(seconds)
+
+    def observe_results(self, results):
+        """
+        Actualiza los contadores con los resultados de un frame reconocido
+
+        Args:
+            results (list): Tuplas (nombre, coordenadas, color, texto_acceso) de recognize_faces
+        """
+        matches = unknowns = rejected = 0
+        for _, _, _, access_text in results:
+            if access_text.startswith("ACCESO PERMITIDO"):
+                matches += 1
+            elif access_text == "ACCESO DENEGADO":
+                unknowns += 1
+            else:
+                rejected += 1
+        with self._lock:
+            self.counters['frames'] += 1
+            self.counters['faces'] += len(results)
+            self.counters['matches'] += matches
+            self.counters['unknowns'] += unknowns
+            self.counters['rejected'] += rejected
+
+    def track_dropped(self, dropped_fn):
+        """
+        Indica de dónde leer los frames descartados de la cámara
+
+        Args:
+            dropped_fn (callable): Devuelve el total de frames descartados hasta el momento
+        """
+        self._dropped_fn = dropped_fn
+
+    @property
+    def dropped(self):
+        return int(self._dropped_fn()) if self._dropped_fn else 0
+
+class MetricsRegistry:
+    """
+    Registro de métricas del sistema, agrupadas por cámara
+    """
+    def __init__(self, window=2048):
+        """
+        Args:
+            window (int): Muestras recientes que conserva cada histograma
+        """
+        self.window = window
+        self.cameras = {}
+        self._lock = threading.Lock()
+
+    def camera(self, camera_id):
+        """Métricas de una cámara (se crean la primera vez)"""
+        with self._lock:
+            metrics = self.cameras.get(camera_id)
+            if metrics is None:
+                metrics = self.cameras[camera_id] = CameraMetrics(camera_id, self.window)
+            return metrics
+
+    def render_prometheus(self):
+        """
+        Métricas en formato de texto de Prometheus
+
+        Returns:
+            str: Exposición de las métricas
+        """
+        lines = [
+            "# HELP vision_stage_seconds Duración de cada etapa del procesado de frames",
+            "# TYPE vision_stage_seconds summary"
+        ]
+        cameras = list(self.cameras.values())
+        for metrics in cameras:
+            camera = _label(metrics.camera_id)
+            stages = dict(metrics.stages)
+            for stage in _ordered_stages(stages):
+                histogram = stages[stage]
+                labels = f'camera="{camera}",stage="{stage}"'
+                values = histogram.quantiles()
+                if values is not None:
+                    for quantile, value in zip(QUANTILES, values):
+                        lines.append(f'vision_stage_seconds{{{labels},quantile="{quantile}"}} {value:.6f}')
+                lines.append(f'vision_stage_seconds_sum{{{labels}}} {histogram.sum:.6f}')
+                lines.append(f'vision_stage_seconds_count{{{labels}}} {histogram.count}')
+
+        descriptions = {
+            'frames': "Frames reconocidos",
+            'faces': "Rostros en los frames reconocidos",
+            'matches': "Rostros con acceso permitido",
+            'unknowns': "Rostros desconocidos (acceso denegado)",
+            'rejected': "Rostros descartados por calidad insuficiente"
+        }
+        for counter in COUNTERS:
+            lines.append(f"# HELP vision_{counter}_total {descriptions[counter]}")
+            lines.append(f"# TYPE vision_{counter}_total counter")
+            for metrics in cameras:
+                lines.append(f'vision_{counter}_total{{camera="{_label(metrics.camera_id)}"}} {metrics.counters[counter]}')
+
+        lines.append("# HELP vision_dropped_frames_total Frames descartados antes de reconocerlos")
+        lines.append("# TYPE vision_dropped_frames_total counter")
+        for metrics in cameras:
+            lines.append(f'vision_dropped_frames_total{{camera="{_label(metrics.camera_id)}"}} {metrics.dropped}')
+        return "\n".join(lines) + "\n"
+
+    def stats_lines(self):
+        """
+        Resumen legible de cada cámara (p50/p95/p99 en ms por etapa y contadores)
+
+        Returns:
+            list: Una línea por cámara
+        """
+        lines = []
+        for metrics in list(self.cameras.values()):
+            parts = []
+            stages = dict(metrics.stages)
+            for stage in _ordered_stages(stages):
+                values = stages[stage].quantiles()
+                if values is not None:
+                    parts.append(f"{stage} " + "/".join(f"{value * 1000:.1f}" for value in values))
+            counters = metrics.counters
+            lines.append(
+                f"[cámara {metrics.camera_id}] ms p50/p95/p99: {', '.join(parts) or '-'} | "
+                f"frames {counters['frames']}, rostros {counters['faces']}, permitidos {counters['matches']}, "
+                f"desconocidos {counters['unknowns']}, descartados por calidad {counters['rejected']}, "
+                f"frames perdidos {metrics.dropped}"
+            )
+        return lines
+
+def _ordered_stages(stages):
+    """Etapas conocidas en orden del camino caliente, seguidas de las demás"""
+    return [stage for stage in STAGES if stage in stages] + sorted(set(stages) - set(STAGES))
+
+def _label(value):
+    """Escapa un valor de etiqueta de Prometheus"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = None
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Sin una línea de log por cada consulta de Prometheus
+        pass
+
+class MetricsServer(threading.Thread):
+    """
+    Servidor HTTP local que expone las métricas en /metrics (formato de texto de Prometheus)
+    """
+    def __init__(self, registry, host="127.0.0.1", port=9108):
+        super().__init__(name="metrics-server", daemon=True)
+        handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry})
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def run(self):
+        self.server.serve_forever(poll_interval=0.5)
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+class StatsReporter(threading.Thread):
+    """
+    Hilo que escribe periódicamente en el log un resumen de las métricas de cada cámara
+    """
+    def __init__(self, registry, interval=60.0):
+        super().__init__(name="metrics-reporter", daemon=True)
+        self.registry = registry
+        self.interval = interval
+        self.logger = logging.getLogger("metrics")
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            for line in self.registry.stats_lines():
+                self.logger.info(line)
+
+    def stop(self):
+        self._stop_event.set()
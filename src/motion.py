@@ -0,0 +1,176 @@
+import cv2
+import numpy as np
+
+def _merge_regions(regions):
+    """Une las regiones (top, right, bottom, left) que se solapan hasta que no quede ninguna superpuesta"""
+    regions = [list(region) for region in regions]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(regions)):
+            for j in range(i + 1, len(regions)):
+                a, b = regions[i], regions[j]
+                if a[0] < b[2] and b[0] < a[2] and a[3] < b[1] and b[3] < a[1]:
+                    regions[i] = [min(a[0], b[0]), max(a[1], b[1]), max(a[2], b[2]), min(a[3], b[3])]
+                    del regions[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return [tuple(region) for region in regions]
+
+def _overlaps(box, regions):
+    """Indica si una caja (top, right, bottom, left) se solapa con alguna región"""
+    top, right, bottom, left = box
+    return any(top < r[2] and r[0] < bottom and left < r[1] and r[3] < right for r in regions)
+
+class MotionDetector:
+    """
+    Detector de movimiento barato que decide dónde (y si) hay que buscar rostros
+
+    Compara una miniatura en escala de grises con un modelo de fondo (media móvil).
+    Sin movimiento se reutilizan los rostros del frame anterior sin ejecutar el detector;
+    con movimiento solo se buscan rostros dentro de las regiones que cambiaron, y los
+    rostros detectados antes fuera de esas regiones se conservan.
+    """
+    def __init__(self, thumb_width=64, threshold=25, min_area=0.002, learning_rate=0.05,
+                 padding=0.25, min_region_size=48, max_coverage=0.5, full_detect_interval=30):
+        """
+        Inicializa el detector de movimiento
+
+        Args:
+            thumb_width (int): Ancho de la miniatura en la que se mide el movimiento
+            threshold (int): Diferencia de gris mínima (0-255) para considerar que un píxel cambió
+            min_area (float): Fracción mínima de la miniatura que debe cambiar para haber movimiento
+            learning_rate (float): Velocidad de adaptación del modelo de fondo
+            padding (float): Margen añadido a cada región, relativo a su tamaño
+            min_region_size (int): Lado mínimo (en píxeles de la imagen analizada) de cada región
+            max_coverage (float): Si las regiones cubren más de esta fracción, se analiza el frame completo
+            full_detect_interval (int): Cada cuántos frames se analiza el frame completo igualmente (0 = nunca)
+        """
+        self.thumb_width = thumb_width
+        self.threshold = threshold
+        self.min_area = min_area
+        self.learning_rate = learning_rate
+        self.padding = padding
+        self.min_region_size = min_region_size
+        self.max_coverage = max_coverage
+        self.full_detect_interval = full_detect_interval
+
+        self.last_face_locations = []
+        self._background = None
+        self._frames_since_full = 0
+
+        self.frames = 0
+        self.skipped_frames = 0
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.searched_pixels = 0
+        self.total_pixels = 0
+
+    def reset(self):
+        """Olvida el modelo de fondo y los rostros del frame anterior"""
+        self._background = None
+        self.last_face_locations = []
+        self._frames_since_full = 0
+
+    def motion_regions(self, image):
+        """
+        Actualiza el modelo de fondo y devuelve las regiones con movimiento
+
+        Args:
+            image (numpy.ndarray): Imagen RGB analizada
+
+        Returns:
+            list: Regiones (top, right, bottom, left) en coordenadas de la imagen, o None
+                  si aún no hay modelo de fondo (primer frame)
+        """
+        height, width = image.shape[:2]
+        scale = width / float(self.thumb_width)
+        thumb_height = max(1, int(round(height / scale)))
+        thumb = cv2.resize(image, (self.thumb_width, thumb_height), interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(thumb, cv2.COLOR_RGB2GRAY), (3, 3), 0).astype(np.float32)
+
+        if self._background is None or self._background.shape != gray.shape:
+            self._background = gray
+            return None
+
+        diff = cv2.absdiff(gray, self._background)
+        cv2.accumulateWeighted(gray, self._background, self.learning_rate)
+
+        mask = (diff > self.threshold).astype(np.uint8)
+        if mask.sum() < self.min_area * mask.size:
+            return []
+
+        mask = cv2.dilate(mask, np.ones((3, 3), np.uint8), iterations=2)
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        regions = []
+        for contour in contours:
+            x, y, w, h = cv2.boundingRect(contour)
+            # Pasar a coordenadas de la imagen con margen y tamaño mínimo
+            pad_x = max(w * scale * self.padding, (self.min_region_size - w * scale) / 2.0, 0)
+            pad_y = max(h * scale * self.padding, (self.min_region_size - h * scale) / 2.0, 0)
+            top = max(0, int(y * scale - pad_y))
+            bottom = min(height, int((y + h) * scale + pad_y))
+            left = max(0, int(x * scale - pad_x))
+            right = min(width, int((x + w) * scale + pad_x))
+            regions.append((top, right, bottom, left))
+        return _merge_regions(regions)
+
+    def detect_faces(self, image, detect_fn):
+        """
+        Detecta rostros ejecutando el detector solo donde hace falta
+
+        Args:
+            image (numpy.ndarray): Imagen RGB analizada
+            detect_fn (callable): Detector que recibe una imagen y devuelve cajas (top, right, bottom, left)
+
+        Returns:
+            list: Cajas (top, right, bottom, left) en coordenadas de la imagen
+        """
+        height, width = image.shape[:2]
+        regions = self.motion_regions(image)
+        self.frames += 1
+        self.total_pixels += height * width
+        self._frames_since_full += 1
+
+        full = regions is None or (self.full_detect_interval and self._frames_since_full >= self.full_detect_interval)
+        if not full and not regions:
+            # Escena estática: los rostros siguen donde estaban
+            self.skipped_frames += 1
+            return list(self.last_face_locations)
+
+        coverage = 0.0 if full else sum((r[2] - r[0]) * (r[1] - r[3]) for r in regions) / float(height * width)
+        if full or coverage > self.max_coverage:
+            face_locations = list(detect_fn(image))
+            self._frames_since_full = 0
+            self.full_frames += 1
+            self.searched_pixels += height * width
+        else:
+            # Rostros estáticos fuera de las regiones con movimiento + rostros dentro de ellas
+            face_locations = [box for box in self.last_face_locations if not _overlaps(box, regions)]
+            for top, right, bottom, left in regions:
+                crop = np.ascontiguousarray(image[top:bottom, left:right])
+                for c_top, c_right, c_bottom, c_left in detect_fn(crop):
+                    face_locations.append((c_top + top, c_right + left, c_bottom + top, c_left + left))
+                self.searched_pixels += (bottom - top) * (right - left)
+            self.roi_frames += 1
+
+        self.last_face_locations = face_locations
+        return list(face_locations)
+
+    def stats(self):
+        """
+        Estadísticas del detector
+
+        Returns:
+            dict: Frames analizados, omitidos, con regiones y completos, y fracción de píxeles buscados
+        """
+        return {
+            'frames': self.frames,
+            'skipped_frames': self.skipped_frames,
+            'roi_frames': self.roi_frames,
+            'full_frames': self.full_frames,
+            'searched_fraction': self.searched_pixels / self.total_pixels if self.total_pixels else 0.0
+        }
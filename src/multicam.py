@@ -0,0 +1,220 @@
+import time
+import threading
+from src.pipeline import FrameGrabber
+
+def parse_sources(sources):
+    """
+    Convierte una lista de fuentes separada por comas en IDs de cámara o URLs
+
+    Args:
+        sources (str | list): Por ejemplo "0,1,rtsp://camara/stream"
+
+    Returns:
+        list: Fuentes para cv2.VideoCapture (int para cámaras locales, str para el resto)
+    """
+    if not sources:
+        return []
+    if isinstance(sources, str):
+        sources = [s.strip() for s in sources.split(',') if s.strip()]
+    return [int(s) if isinstance(s, str) and s.isdigit() else s for s in sources]
+
+class _CameraSlot:
+    """
+    Receptor de frames de una cámara para el planificador (solo conserva el más reciente)
+    """
+    def __init__(self, scheduler, camera_id):
+        self.scheduler = scheduler
+        self.camera_id = camera_id
+
+    def put(self, item):
+        return self.scheduler._offer(self.camera_id, item)
+
+    def close(self):
+        self.scheduler._camera_closed(self.camera_id)
+
+class FairFrameScheduler:
+    """
+    Planificador de reconocimiento equitativo entre cámaras (round-robin sobre el último frame de cada una)
+
+    Cada cámara conserva solo su frame más reciente y nunca tiene más de un frame en
+    proceso a la vez, de modo que una cámara rápida no puede acaparar el reconocimiento
+    y el estado por cámara (por ejemplo, su tracker) no se comparte entre hilos.
+    """
+    def __init__(self, camera_ids):
+        self.camera_ids = list(camera_ids)
+        self.dropped = {camera_id: 0 for camera_id in self.camera_ids}
+        self._latest = {}
+        self._busy = set()
+        self._open = set(self.camera_ids)
+        self._next = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def slot(self, camera_id):
+        """Devuelve el receptor de frames para suscribirlo al grabber de la cámara"""
+        return _CameraSlot(self, camera_id)
+
+    def _offer(self, camera_id, item):
+        with self._cond:
+            dropped = camera_id in self._latest
+            if dropped:
+                self.dropped[camera_id] += 1
+            self._latest[camera_id] = item
+            self._cond.notify()
+            return dropped
+
+    def _camera_closed(self, camera_id):
+        with self._cond:
+            self._open.discard(camera_id)
+            self._cond.notify_all()
+
+    def next_job(self, timeout=None):
+        """
+        Obtiene el siguiente frame a reconocer siguiendo el turno entre cámaras
+
+        Args:
+            timeout (float, optional): Tiempo máximo de espera en segundos
+
+        Returns:
+            tuple: (camera_id, secuencia, frame), o None si no hay trabajo disponible
+        """
+        with self._cond:
+            job = self._take()
+            if job is None and not self._closed:
+                self._cond.wait(timeout)
+                job = self._take()
+            return job
+
+    def _take(self):
+        num_cameras = len(self.camera_ids)
+        for offset in range(num_cameras):
+            position = (self._next + offset) % num_cameras
+            camera_id = self.camera_ids[position]
+            if camera_id in self._busy or camera_id not in self._latest:
+                continue
+            seq, frame = self._latest.pop(camera_id)
+            self._busy.add(camera_id)
+            self._next = (position + 1) % num_cameras
+            return camera_id, seq, frame
+        return None
+
+    def done(self, camera_id):
+        """Marca como terminado el frame en proceso de una cámara"""
+        with self._cond:
+            self._busy.discard(camera_id)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+class MultiCameraOrchestrator:
+    """
+    Orquestador de varias cámaras en un solo proceso con una galería compartida
+    """
+    def __init__(self, sources, recognize_fn, frame_width=None, frame_height=None, num_threads=1, metrics=None):
+        """
+        Inicializa un bucle de captura por fuente y un planificador de reconocimiento común
+
+        Args:
+            sources (list): Fuentes de vídeo (IDs de cámara o URLs); cada una se usa como camera_id
+            recognize_fn (callable): Función (frame, camera_id) -> lista de tuplas (nombre, coordenadas, color, texto_acceso)
+            frame_width (int, optional): Ancho del frame
+            frame_height (int, optional): Alto del frame
+            num_threads (int): Hilos de reconocimiento que comparten el planificador
+            metrics (MetricsRegistry, optional): Registro donde medir la captura y los frames descartados
+        """
+        self.sources = list(sources)
+        self.recognize_fn = recognize_fn
+        self.scheduler = FairFrameScheduler(self.sources)
+        self.grabbers = {}
+        for source in self.sources:
+            timings = metrics.camera(source) if metrics is not None else None
+            if timings is not None:
+                timings.track_dropped(lambda source=source: self.scheduler.dropped[source])
+            grabber = FrameGrabber(source, frame_width, frame_height, timings=timings)
+            grabber.subscribe(self.scheduler.slot(source))
+            self.grabbers[source] = grabber
+
+        self.frames_processed = {source: 0 for source in self.sources}
+        self._results = {source: [] for source in self.sources}
+        self._last_seq = {source: 0 for source in self.sources}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._recognition_loop, name=f"recognition-{i}", daemon=True)
+            for i in range(max(1, num_threads))
+        ]
+
+    def _recognition_loop(self):
+        while not self._stop_event.is_set():
+            job = self.scheduler.next_job(timeout=0.1)
+            if job is None:
+                continue
+
+            camera_id, _, frame = job
+            try:
+                results = self.recognize_fn(frame, camera_id)
+            except Exception as e:
+                print(f"Error en el reconocimiento facial (cámara {camera_id}): {e}")
+                results = []
+            finally:
+                self.scheduler.done(camera_id)
+
+            with self._lock:
+                self._results[camera_id] = results
+                self.frames_processed[camera_id] += 1
+
+    def start(self):
+        for grabber in self.grabbers.values():
+            grabber.start()
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        self.scheduler.close()
+        for grabber in self.grabbers.values():
+            grabber.stop()
+        for grabber in self.grabbers.values():
+            grabber.join(timeout=2.0)
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+
+    def failed_sources(self):
+        """Devuelve las fuentes cuya captura terminó por un error irrecuperable"""
+        return [source for source, grabber in self.grabbers.items() if grabber.error is not None]
+
+    @property
+    def alive(self):
+        """Indica si queda alguna cámara capturando"""
+        return any(grabber.is_alive() for grabber in self.grabbers.values())
+
+    def new_frames(self):
+        """
+        Devuelve los frames nuevos de cada cámara desde la última llamada
+
+        Returns:
+            list: Tuplas (camera_id, frame, resultados) con los últimos resultados de cada cámara
+        """
+        frames = []
+        for source, grabber in self.grabbers.items():
+            item = grabber.wait_frame(self._last_seq[source], timeout=0)
+            if item is None:
+                continue
+            self._last_seq[source] = item[0]
+            with self._lock:
+                results = self._results[source]
+            frames.append((source, item[1], results))
+        return frames
+
+    def wait_new_frames(self, timeout=1.0, poll_interval=0.005):
+        """Espera hasta que alguna cámara tenga un frame nuevo"""
+        deadline = time.time() + timeout
+        while True:
+            frames = self.new_frames()
+            if frames or time.time() >= deadline or not self.alive:
+                return frames
+            time.sleep(poll_interval)
@@ -0,0 +1,369 @@
+import cv2
+import time
+import threading
+from collections import deque
+
+class DropOldestQueue:
+    """
+    Cola acotada en la que, si está llena, el elemento más antiguo se descarta al insertar
+    """
+    def __init__(self, maxsize=1):
+        self.maxsize = max(1, maxsize)
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        """
+        Inserta un elemento descartando el más antiguo si la cola está llena
+
+        Returns:
+            bool: True si se descartó algún elemento
+        """
+        with self._cond:
+            dropped = False
+            while len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+                dropped = True
+            self._items.append(item)
+            self._cond.notify()
+            return dropped
+
+    def get(self, timeout=None):
+        """
+        Extrae el elemento más antiguo, esperando como mucho timeout segundos
+
+        Returns:
+            object: Elemento extraído, o None si se agotó la espera o la cola está cerrada
+        """
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def close(self):
+        """Cierra la cola y despierta a los consumidores en espera"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+class FrameGrabber(threading.Thread):
+    """
+    Hilo de captura que lee continuamente de la cámara y conserva siempre el frame más reciente
+    """
+    def __init__(self, source, frame_width=None, frame_height=None, reconnect_attempts=3, timings=None):
+        """
+        Inicializa el hilo de captura
+
+        Args:
+            source (int | str): ID de cámara o URL/ruta de vídeo para cv2.VideoCapture
+            frame_width (int, optional): Ancho del frame
+            frame_height (int, optional): Alto del frame
+            reconnect_attempts (int): Reintentos de reconexión antes de rendirse
+            timings (CameraMetrics, optional): Receptor de la duración de cada lectura (etapa 'grab')
+        """
+        super().__init__(name=f"grabber-{source}", daemon=True)
+        self.source = source
+        self.frame_width = frame_width
+        self.frame_height = frame_height
+        self.reconnect_attempts = reconnect_attempts
+        self.timings = timings
+        self.error = None
+        self.frames_read = 0
+
+        self._cap = None
+        self._latest = None  # (secuencia, frame, marca_de_tiempo)
+        self._cond = threading.Condition()
+        self._subscribers = []
+        self._stop_event = threading.Event()
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.source)
+        if self.frame_width:
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.frame_width)
+        if self.frame_height:
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.frame_height)
+        # Minimizar el buffer interno para no acumular frames atrasados
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def _reconnect(self):
+        """
+        Reintenta abrir la cámara unas cuantas veces antes de rendirse
+
+        Returns:
+            tuple: (ret, frame) del primer frame leído tras reconectar
+        """
+        print("Error al capturar el frame. Reintentando...")
+        for _ in range(self.reconnect_attempts):
+            if self._stop_event.wait(0.5):
+                break
+            self._cap.release()
+            self._cap = self._open()
+            ret, frame = self._cap.read()
+            if ret:
+                return ret, frame
+        return False, None
+
+    def subscribe(self, frame_queue):
+        """
+        Registra una cola que recibirá cada nuevo frame como (secuencia, frame)
+
+        Args:
+            frame_queue (DropOldestQueue): Cola del consumidor
+        """
+        self._subscribers.append(frame_queue)
+
+    def run(self):
+        self._cap = self._open()
+        try:
+            while not self._stop_event.is_set():
+                start = time.perf_counter()
+                ret, frame = self._cap.read()
+                if ret and self.timings is not None:
+                    self.timings.add('grab', time.perf_counter() - start)
+                if not ret:
+                    ret, frame = self._reconnect()
+                    if not ret:
+                        if not self._stop_event.is_set():
+                            self.error = Exception("No se pudo recuperar la conexión con la cámara")
+                        break
+
+                self.frames_read += 1
+                with self._cond:
+                    self._latest = (self.frames_read, frame, time.time())
+                    self._cond.notify_all()
+
+                for frame_queue in self._subscribers:
+                    frame_queue.put((self.frames_read, frame))
+        finally:
+            self._cap.release()
+            with self._cond:
+                self._cond.notify_all()
+            for frame_queue in self._subscribers:
+                frame_queue.close()
+
+    def wait_frame(self, last_seq=0, timeout=None):
+        """
+        Espera un frame más reciente que last_seq
+
+        Args:
+            last_seq (int): Secuencia del último frame consumido
+            timeout (float, optional): Tiempo máximo de espera en segundos
+
+        Returns:
+            tuple: (secuencia, frame), o None si no llegó un frame nuevo
+        """
+        with self._cond:
+            if self._latest is None or self._latest[0] <= last_seq:
+                if self.is_alive():
+                    self._cond.wait(timeout)
+            if self._latest is None or self._latest[0] <= last_seq:
+                return None
+            return self._latest[0], self._latest[1]
+
+    def stop(self):
+        self._stop_event.set()
+
+class RecognitionStage(threading.Thread):
+    """
+    Hilo de reconocimiento alimentado por una cola acotada que descarta los frames antiguos
+    """
+    def __init__(self, recognize_fn, frame_queue):
+        """
+        Inicializa el hilo de reconocimiento
+
+        Args:
+            recognize_fn (callable): Función frame -> lista de tuplas (nombre, coordenadas, color, texto_acceso)
+            frame_queue (DropOldestQueue): Cola de frames a procesar
+        """
+        super().__init__(name="recognition", daemon=True)
+        self.recognize_fn = recognize_fn
+        self.frame_queue = frame_queue
+        self.frames_processed = 0
+        self.fps = 0.0
+
+        self._results = (0, [])
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        window_start = time.time()
+        window_count = 0
+
+        while not self._stop_event.is_set():
+            item = self.frame_queue.get(timeout=0.1)
+            if item is None:
+                continue
+
+            seq, frame = item
+            try:
+                results = self.recognize_fn(frame)
+            except Exception as e:
+                print(f"Error en el reconocimiento facial: {e}")
+                results = []
+
+            with self._lock:
+                self._results = (seq, results)
+            self.frames_processed += 1
+
+            # Calcular FPS de reconocimiento
+            window_count += 1
+            elapsed = time.time() - window_start
+            if elapsed >= 1.0:
+                self.fps = window_count / elapsed
+                window_count = 0
+                window_start = time.time()
+
+    def latest_results(self):
+        """
+        Devuelve el último resultado de reconocimiento disponible
+
+        Returns:
+            tuple: (secuencia del frame reconocido, lista de resultados)
+        """
+        with self._lock:
+            return self._results
+
+    def stop(self):
+        self._stop_event.set()
+
+class PooledRecognitionStage(RecognitionStage):
+    """
+    Etapa de reconocimiento que mantiene varios frames en vuelo en un RecognitionPool
+    """
+    def __init__(self, pool, frame_queue, camera_id=0):
+        """
+        Inicializa la etapa
+
+        Args:
+            pool (RecognitionPool): Pool de procesos de reconocimiento
+            frame_queue (DropOldestQueue): Cola de frames a procesar
+            camera_id (int): ID de la cámara de los frames
+        """
+        super().__init__(None, frame_queue)
+        self.pool = pool
+        self.camera_id = camera_id
+        self._frame_seqs = {}
+
+    def run(self):
+        window_start = time.time()
+        window_count = 0
+
+        while not self._stop_event.is_set():
+            # Mantener un frame en vuelo por trabajador
+            while self.pool.in_flight < self.pool.num_workers:
+                item = self.frame_queue.get(timeout=0.005 if self.pool.in_flight else 0.1)
+                if item is None:
+                    break
+                seq, frame = item
+                self._frame_seqs[self.pool.submit(frame, self.camera_id)] = seq
+
+            if not self.pool.in_flight:
+                continue
+
+            try:
+                done = self.pool.next_result(timeout=0.05)
+            except Exception as e:
+                print(f"Error en el reconocimiento facial: {e}")
+                continue
+            if done is None:
+                continue
+
+            order, results = done
+            with self._lock:
+                self._results = (self._frame_seqs.pop(order), results)
+            self.frames_processed += 1
+
+            # Calcular FPS de reconocimiento
+            window_count += 1
+            elapsed = time.time() - window_start
+            if elapsed >= 1.0:
+                self.fps = window_count / elapsed
+                window_count = 0
+                window_start = time.time()
+
+class RecognitionPipeline:
+    """
+    Pipeline por etapas: captura, reconocimiento y visualización en hilos separados
+    """
+    def __init__(self, source, recognize_fn, frame_width=None, frame_height=None, queue_size=1, pool=None,
+                 timings=None):
+        """
+        Inicializa el pipeline
+
+        Args:
+            source (int | str): Fuente de vídeo para cv2.VideoCapture
+            recognize_fn (callable): Función frame -> lista de tuplas (nombre, coordenadas, color, texto_acceso)
+            frame_width (int, optional): Ancho del frame
+            frame_height (int, optional): Alto del frame
+            queue_size (int): Tamaño de la cola de frames pendientes de reconocer
+            pool (RecognitionPool, optional): Pool de procesos. Si se indica, sustituye a recognize_fn
+            timings (CameraMetrics, optional): Métricas de la cámara (tiempo de captura y frames descartados)
+        """
+        self.grabber = FrameGrabber(source, frame_width, frame_height, timings=timings)
+        if pool is not None:
+            self.frame_queue = DropOldestQueue(max(queue_size, pool.num_workers))
+            self.recognizer = PooledRecognitionStage(pool, self.frame_queue, camera_id=source)
+        else:
+            self.frame_queue = DropOldestQueue(queue_size)
+            self.recognizer = RecognitionStage(recognize_fn, self.frame_queue)
+        self.grabber.subscribe(self.frame_queue)
+        if timings is not None:
+            timings.track_dropped(lambda: self.frame_queue.dropped)
+        self._last_seq = 0
+
+    def start(self):
+        self.grabber.start()
+        self.recognizer.start()
+        return self
+
+    def stop(self):
+        self.grabber.stop()
+        self.recognizer.stop()
+        self.frame_queue.close()
+        self.grabber.join(timeout=2.0)
+        self.recognizer.join(timeout=2.0)
+
+    @property
+    def failed(self):
+        """Indica si la captura terminó por un error irrecuperable"""
+        return self.grabber.error is not None
+
+    def next_frame(self, timeout=1.0):
+        """
+        Devuelve el siguiente frame nuevo para la etapa de visualización
+
+        Returns:
+            tuple: (secuencia, frame), o None si no llegó un frame nuevo a tiempo
+        """
+        item = self.grabber.wait_frame(self._last_seq, timeout)
+        if item is not None:
+            self._last_seq = item[0]
+        return item
+
+    def latest_results(self):
+        """Devuelve los últimos resultados de reconocimiento para reutilizarlos en cada frame"""
+        return self.recognizer.latest_results()[1]
+
+    def stats(self):
+        """
+        Devuelve estadísticas del pipeline
+
+        Returns:
+            dict: Frames capturados, procesados, descartados y FPS de reconocimiento
+        """
+        return {
+            'frames_read': self.grabber.frames_read,
+            'frames_processed': self.recognizer.frames_processed,
+            'frames_dropped': self.frame_queue.dropped,
+            'recognition_fps': self.recognizer.fps
+        }
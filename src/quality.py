@@ -0,0 +1,129 @@
+import math
+import cv2
+import numpy as np
+import face_recognition
+
+class FaceQualityGate:
+    """
+    Filtro de calidad entre la detección y la codificación de rostros
+
+    Descarta los rostros que nunca darían una coincidencia fiable antes de pagar el
+    encoding y la búsqueda en la galería. Las comprobaciones van de la más barata a la
+    más cara y cada una solo se aplica a los rostros que pasaron las anteriores:
+    tamaño de la caja, nitidez (varianza del Laplaciano) y orientación aproximada a
+    partir de los 5 puntos faciales del modelo pequeño de dlib.
+    """
+    def __init__(self, min_size=20, min_sharpness=20.0, max_yaw=0.35, max_roll=25.0):
+        """
+        Inicializa el filtro de calidad
+
+        Args:
+            min_size (int): Lado mínimo de la caja en píxeles de la imagen analizada
+            min_sharpness (float): Varianza mínima del Laplaciano del rostro (0 = sin comprobar)
+            max_yaw (float): Desplazamiento horizontal máximo de la nariz respecto al centro de
+                los ojos, relativo a la distancia entre ojos (0 = sin comprobar la orientación)
+            max_roll (float): Inclinación máxima de la línea de los ojos en grados
+        """
+        self.min_size = min_size
+        self.min_sharpness = min_sharpness
+        self.max_yaw = max_yaw
+        self.max_roll = max_roll
+
+        self.faces = 0
+        self.rejected = {'size': 0, 'sharpness': 0, 'pose': 0}
+
+    def sharpness(self, gray_image, box):
+        """
+        Nitidez de un rostro como varianza del Laplaciano de su recorte en gris
+
+        Args:
+            gray_image (numpy.ndarray): Imagen en escala de grises
+            box (tuple): Caja (top, right, bottom, left)
+
+        Returns:
+            float: Varianza del Laplaciano (más alta = más nítido)
+        """
+        top, right, bottom, left = box
+        crop = gray_image[max(0, top):bottom, max(0, left):right]
+        if crop.size == 0:
+            return 0.0
+        return float(cv2.Laplacian(crop, cv2.CV_64F).var())
+
+    @staticmethod
+    def pose(landmarks):
+        """
+        Orientación aproximada del rostro a partir de los puntos del modelo pequeño
+
+        Args:
+            landmarks (dict): Puntos 'left_eye', 'right_eye' y 'nose_tip' (face_landmarks, model="small")
+
+        Returns:
+            tuple: (giro lateral relativo a la distancia entre ojos, inclinación en grados)
+        """
+        left_eye = np.mean(landmarks['left_eye'], axis=0)
+        right_eye = np.mean(landmarks['right_eye'], axis=0)
+        nose = np.mean(landmarks['nose_tip'], axis=0)
+
+        eye_vector = right_eye - left_eye
+        eye_distance = max(float(np.hypot(*eye_vector)), 1e-6)
+        roll = math.degrees(math.atan2(eye_vector[1], eye_vector[0]))
+        # Fuera del rango (-90, 90] los ojos están invertidos respecto a la convención de dlib
+        roll = (roll + 90.0) % 180.0 - 90.0
+
+        # Distancia de la nariz a la mediatriz de los ojos: 0 de frente, ~0.5 o más de perfil
+        midpoint = (left_eye + right_eye) / 2.0
+        yaw = abs(float(np.dot(nose - midpoint, eye_vector))) / (eye_distance ** 2)
+        return yaw, roll
+
+    def filter(self, rgb_image, face_locations):
+        """
+        Indica qué rostros tienen calidad suficiente para codificarlos
+
+        Args:
+            rgb_image (numpy.ndarray): Imagen RGB analizada
+            face_locations (list): Cajas (top, right, bottom, left) a evaluar
+
+        Returns:
+            list: Booleanos alineados con face_locations
+        """
+        accepted = [True] * len(face_locations)
+        self.faces += len(face_locations)
+
+        for i, (top, right, bottom, left) in enumerate(face_locations):
+            if min(bottom - top, right - left) < self.min_size:
+                accepted[i] = False
+                self.rejected['size'] += 1
+
+        if self.min_sharpness:
+            gray_image = None
+            for i, box in enumerate(face_locations):
+                if not accepted[i]:
+                    continue
+                if gray_image is None:
+                    gray_image = cv2.cvtColor(rgb_image, cv2.COLOR_RGB2GRAY)
+                if self.sharpness(gray_image, box) < self.min_sharpness:
+                    accepted[i] = False
+                    self.rejected['sharpness'] += 1
+
+        if self.max_yaw:
+            pending = [i for i, ok in enumerate(accepted) if ok]
+            if pending:
+                all_landmarks = face_recognition.face_landmarks(
+                    rgb_image, [face_locations[i] for i in pending], model="small"
+                )
+                for i, landmarks in zip(pending, all_landmarks):
+                    yaw, roll = self.pose(landmarks)
+                    if yaw > self.max_yaw or abs(roll) > self.max_roll:
+                        accepted[i] = False
+                        self.rejected['pose'] += 1
+
+        return accepted
+
+    def stats(self):
+        """
+        Estadísticas del filtro
+
+        Returns:
+            dict: Rostros evaluados y descartados por cada motivo
+        """
+        return dict(faces=self.faces, **{f'rejected_{reason}': count for reason, count in self.rejected.items()})
@@ -2,25 +2,43 @@ import cv2
 import face_recognition
 import pickle
 import os
-import numpy as np
+import time
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from src.gallery import FaceGallery
+from src.ann import build_index, save_index, evaluate_recall
+from src.store import (is_gallery_store, open_gallery_store, write_gallery_store, migrate_pickle_store,
+                       store_checksum, compute_checksum)
+from src.encoding_cache import PhotoEncodingCache
 
-def load_encodings(encodings_file):
+def load_encodings(encodings_file, legacy_file=None):
     """
-    Carga los encodings conocidos desde el archivo
+    Carga los encodings conocidos desde la galería binaria (sin copiar la matriz)
     
     Args:
-        encodings_file (str): Ruta al archivo de encodings
+        encodings_file (str): Ruta al directorio de la galería (o a un archivo .pkl heredado)
+        legacy_file (str, optional): Archivo .pkl heredado a migrar si la galería aún no existe
         
     Returns:
-        tuple: (encodings, nombres) de los rostros conocidos
+        tuple: (encodings, nombres) de los rostros conocidos; encodings es una matriz float32 mapeada en memoria
     """
     print("Cargando encodings de empleados...")
     try:
-        if not os.path.exists(encodings_file):
+        # Migración única desde el archivo pickle heredado
+        if not is_gallery_store(encodings_file) and legacy_file and os.path.exists(legacy_file):
+            print(f"Migrando encodings desde {legacy_file}...")
+            migrate_pickle_store(legacy_file, encodings_file)
+        
+        if is_gallery_store(encodings_file):
+            matrix, names, _ = open_gallery_store(encodings_file)
+            print(f"Encodings cargados: {len(names)} rostros")
+            return matrix, names
+        
+        if not os.path.isfile(encodings_file):
             print("No se encontró el archivo de encodings. Se creará uno nuevo cuando se registren empleados.")
             return [], []
             
+        # Formato pickle heredado
         with open(encodings_file, 'rb') as f:
             data = pickle.load(f)
             
@@ -40,13 +58,147 @@ def load_encodings(encodings_file):
         print(f"Error inesperado al cargar encodings: {e}")
         return [], []
 
-def generate_encodings(employees_dir, encodings_file):
+def build_search_index(encodings, names, index_file, backend, checksum=None, **params):
+    """
+    Construye offline el índice de búsqueda, lo guarda junto a los encodings e informa del recall
+    
+    Args:
+        encodings (list): Encodings conocidos
+        names (list): Nombres correspondientes a los encodings
+        index_file (str): Ruta donde se guardará el índice
+        backend (str): Backend de búsqueda ('ivf' o 'ivfpq'; el resto no requiere índice en disco)
+        checksum (str, optional): Checksum de la galería guardada (identifica la galería del índice)
+        **params: Parámetros del backend (nlist, nprobe, m, rerank)
+        
+    Returns:
+        dict: Métricas de recall y latencia frente a la búsqueda exacta, o None si no se construyó
+    """
+    if backend not in ('ivf', 'ivfpq'):
+        return None
+        
+    try:
+        print(f"Construyendo índice de búsqueda '{backend}'...")
+        gallery = FaceGallery(encodings, names, checksum=checksum)
+        index = build_index(gallery, backend, **params)
+        save_index(index, gallery, index_file)
+        
+        metrics = evaluate_recall(gallery, index, num_queries=min(len(gallery), 500))
+        print(f"  - Recall@1 frente a búsqueda exacta: {metrics['recall']:.3f}")
+        print(f"  - Latencia por consulta: {metrics['index_ms']:.3f} ms (exacta: {metrics['exact_ms']:.3f} ms)")
+        return metrics
+    except Exception as e:
+        print(f"Error al construir el índice de búsqueda: {e}")
+        return None
+
+def _scan_employee_photos(employees_dir):
+    """
+    Recorre el directorio de empleados en orden estable
+
+    Returns:
+        list: Tuplas (empleado, [(nombre_foto, ruta_relativa, ruta_absoluta), ...])
+    """
+    employees = []
+    for employee_name in sorted(os.listdir(employees_dir)):
+        employee_dir = os.path.join(employees_dir, employee_name)
+        if not os.path.isdir(employee_dir):
+            continue
+        photos = []
+        for photo_name in sorted(os.listdir(employee_dir)):
+            if not photo_name.lower().endswith(('.png', '.jpg', '.jpeg')):
+                continue
+            photos.append((photo_name, f"{employee_name}/{photo_name}", os.path.join(employee_dir, photo_name)))
+        employees.append((employee_name, photos))
+    return employees
+
+def _encode_photo(photo_path):
+    """
+    Calcula el encoding del primer rostro de una foto
+
+    Returns:
+        tuple: (encoding o None si no hay rostro, mensaje de error o None)
+    """
+    try:
+        image = face_recognition.load_image_file(photo_path)
+        encodings = face_recognition.face_encodings(image)
+        return (encodings[0] if len(encodings) > 0 else None), None
+    except Exception as e:
+        return None, str(e)
+
+def _encode_photo_chunk(photo_paths):
+    """Codifica un bloque de fotos dentro de un proceso trabajador"""
+    return [_encode_photo(photo_path) for photo_path in photo_paths]
+
+def _encode_photos(pending, workers=0, chunk_size=16):
+    """
+    Codifica las fotos pendientes mostrando el progreso y el rendimiento
+    
+    Args:
+        pending (list): Tuplas (ruta_relativa, ruta_absoluta) a codificar
+        workers (int): Procesos a utilizar (0 = en serie en el proceso actual)
+        chunk_size (int): Fotos por bloque de trabajo enviado a cada proceso
+        
+    Returns:
+        dict: ruta_relativa -> (encoding o None, mensaje de error o None)
+    """
+    results = {}
+    total = len(pending)
+    if total == 0:
+        return results
+    
+    start_time = time.time()
+    last_report = start_time
+    
+    def report_progress(done, force=False):
+        nonlocal last_report
+        now = time.time()
+        if force or now - last_report >= 1.0:
+            rate = done / max(now - start_time, 1e-6)
+            print(f"  Progreso: {done}/{total} fotos ({rate:.1f} fotos/s)")
+            last_report = now
+    
+    if workers and workers > 1 and total > 1:
+        print(f"Codificando {total} fotos con {workers} procesos...")
+        chunks = [pending[i:i + chunk_size] for i in range(0, total, chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(_encode_photo_chunk, [photo_path for _, photo_path in chunk]): chunk
+                for chunk in chunks
+            }
+            for future in as_completed(futures):
+                chunk = futures[future]
+                try:
+                    chunk_results = future.result()
+                except Exception as e:
+                    chunk_results = [(None, str(e))] * len(chunk)
+                for (rel_path, _), result in zip(chunk, chunk_results):
+                    results[rel_path] = result
+                report_progress(len(results))
+    else:
+        print(f"Codificando {total} fotos...")
+        for rel_path, photo_path in pending:
+            results[rel_path] = _encode_photo(photo_path)
+            report_progress(len(results))
+    
+    report_progress(len(results), force=True)
+    return results
+
+def generate_encodings(employees_dir, encodings_file, index_file=None, index_backend=None, index_params=None,
+                       full_rebuild=False, workers=0, chunk_size=16):
     """
-    Genera encodings para todas las fotos de empleados
+    Genera encodings para las fotos de empleados de forma incremental
+    
+    Solo se decodifican y codifican las fotos nuevas o modificadas; el resto se toma
+    de la caché por foto guardada junto a la galería, y las fotos eliminadas se quitan.
     
     Args:
         employees_dir (str): Directorio donde se almacenan las fotos de empleados
         encodings_file (str): Ruta donde se guardará el archivo de encodings
+        index_file (str, optional): Ruta donde se guardará el índice de búsqueda
+        index_backend (str, optional): Backend del índice a construir ('ivf' o 'ivfpq')
+        index_params (dict, optional): Parámetros del índice de búsqueda
+        full_rebuild (bool): Si es True, ignora la caché y vuelve a codificar todas las fotos
+        workers (int): Procesos para codificar en paralelo (0 = en serie); el resultado es idéntico
+        chunk_size (int): Fotos por bloque de trabajo en el modo paralelo
         
     Returns:
         int: Número de encodings generados
@@ -62,34 +214,52 @@ def generate_encodings(employees_dir, encodings_file):
     known_names = []
     
     try:
+        employees = _scan_employee_photos(employees_dir)
+        
+        # Cargar la caché por foto (salvo reconstrucción completa)
+        cache = PhotoEncodingCache(encodings_file)
+        if not full_rebuild:
+            cache.load()
+        
+        # Separar las fotos que ya están en caché de las que hay que codificar
+        cached = {}
+        pending = []
+        for _, photos in employees:
+            for _, rel_path, photo_path in photos:
+                found, encoding = cache.lookup(rel_path, photo_path)
+                if found:
+                    cached[rel_path] = encoding
+                else:
+                    pending.append((rel_path, photo_path))
+        
+        # Codificar las fotos pendientes (en serie o repartidas entre procesos)
+        encoded_results = _encode_photos(pending, workers=workers, chunk_size=chunk_size)
+        
         # Recorrer directorio de empleados
         employee_count = 0
-        for employee_name in os.listdir(employees_dir):
-            employee_dir = os.path.join(employees_dir, employee_name)
-            if not os.path.isdir(employee_dir):
-                continue
-                
+        reused = encoded = 0
+        for employee_name, photos in employees:
             print(f"Procesando fotos de {employee_name}")
             photo_count = 0
             
-            for photo_name in os.listdir(employee_dir):
-                if not photo_name.lower().endswith(('.png', '.jpg', '.jpeg')):
-                    continue
-                    
-                photo_path = os.path.join(employee_dir, photo_name)
+            for photo_name, rel_path, photo_path in photos:
+                if rel_path in cached:
+                    encoding = cached[rel_path]
+                    reused += 1
+                else:
+                    encoding, error = encoded_results[rel_path]
+                    if error:
+                        print(f"  - Error al procesar {photo_name}: {error}")
+                        continue
+                    cache.store(rel_path, photo_path, encoding)
+                    encoded += 1
                 
-                try:
-                    image = face_recognition.load_image_file(photo_path)
-                    encodings = face_recognition.face_encodings(image)
-                    
-                    if len(encodings) > 0:
-                        known_encodings.append(encodings[0])
-                        known_names.append(employee_name)
-                        photo_count += 1
-                    else:
-                        print(f"  - No se detectó ningún rostro en {photo_name}")
-                except Exception as e:
-                    print(f"  - Error al procesar {photo_name}: {e}")
+                if encoding is not None:
+                    known_encodings.append(encoding)
+                    known_names.append(employee_name)
+                    photo_count += 1
+                else:
+                    print(f"  - No se detectó ningún rostro en {photo_name}")
             
             if photo_count > 0:
                 print(f"  - Se procesaron {photo_count} fotos con éxito")
@@ -97,27 +267,37 @@ def generate_encodings(employees_dir, encodings_file):
             else:
                 print(f"  - No se pudo procesar ninguna foto para {employee_name}")
         
+        removed = cache.prune({rel_path for _, photos in employees for _, rel_path, _ in photos})
+        print(f"\nFotos codificadas: {encoded}, reutilizadas de la caché: {reused}, eliminadas: {removed}")
+        
         if employee_count == 0:
             print("No se encontraron empleados con fotos válidas")
             return 0
+        
+        # Si el resultado coincide con la galería en disco, no hay nada que reescribir
+        if not full_rebuild and store_checksum(encodings_file) == compute_checksum(known_encodings, known_names):
+            cache.save()
+            print("La galería ya está actualizada.")
+            return len(known_encodings)
     
         # Guardar encodings
         print(f"\nGuardando {len(known_encodings)} encodings...")
-        os.makedirs(os.path.dirname(encodings_file), exist_ok=True)
-        
-        with open(encodings_file, 'wb') as f:
-            pickle.dump({
-                'encodings': known_encodings,
-                'names': known_names
-            }, f)
+        header = write_gallery_store(encodings_file, known_encodings, known_names)
+        cache.save()
         
         print("¡Encodings generados y guardados exitosamente!")
+        
+        # Construir el índice de búsqueda aproximada si se ha configurado
+        if index_file and index_backend:
+            build_search_index(known_encodings, known_names, index_file, index_backend,
+                               checksum=header['checksum'], **(index_params or {}))
+        
         return len(known_encodings)
     except Exception as e:
         print(f"Error al generar encodings: {e}")
         return 0
 
-def capture_employee_photos(name, camera_id, frame_width, frame_height, employees_dir, num_photos=5):
+def capture_employee_photos(name, camera_id, frame_width, frame_height, employees_dir, num_photos=5, detector=None):
     """
     Captura fotos del empleado usando la webcam
     
@@ -128,6 +308,7 @@ def capture_employee_photos(name, camera_id, frame_width, frame_height, employee
         frame_height (int): Alto del frame
         employees_dir (str): Directorio donde se guardarán las fotos
         num_photos (int): Número de fotos a capturar
+        detector (callable, optional): Detector de rostros (ver src.detectors); por defecto, HOG de face_recognition
         
     Returns:
         bool: True si se capturaron fotos, False en caso contrario
@@ -182,7 +363,7 @@ def capture_employee_photos(name, camera_id, frame_width, frame_height, employee
             
             # Detectar rostros en tiempo real
             rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            face_locations = face_recognition.face_locations(rgb_frame)
+            face_locations = (detector or face_recognition.face_locations)(rgb_frame)
             
             # Mostrar rectángulos alrededor de los rostros
             for top, right, bottom, left in face_locations:
@@ -224,99 +405,169 @@ def capture_employee_photos(name, camera_id, frame_width, frame_height, employee
     
     return photos_taken > 0
 
-def recognize_faces(frame, known_face_encodings, known_face_names, tolerance=0.45, resize_factor=0.25, access_logger=None, camera_id=0):
+def recognize_faces(frame, known_face_encodings, known_face_names, tolerance=0.45, resize_factor=0.25, access_logger=None, camera_id=0, tracker=None, motion_detector=None, detector=None, quality_gate=None, timings=None, timestamp=None):
     """
     Reconoce rostros en un frame y registra los accesos
     
     Args:
         frame (numpy.ndarray): Frame de video a analizar
-        known_face_encodings (list): Lista de encodings conocidos
+        known_face_encodings (FaceGallery | list): Galería de rostros conocidos o lista de encodings
         known_face_names (list): Lista de nombres correspondientes a los encodings
         tolerance (float): Tolerancia para el reconocimiento facial (menor = más estricto)
         resize_factor (float): Factor para redimensionar el frame para procesamiento más rápido
         access_logger (AccessLogger, optional): Logger para registrar accesos
         camera_id (int): ID de la cámara utilizada
+        tracker (FaceTracker, optional): Tracker entre frames. Si se indica, solo se codifican los
+            rostros nuevos o los que toca re-identificar; el resto reutiliza la última identidad
+            y no vuelve a registrarse el acceso
+        motion_detector (MotionDetector, optional): Detector de movimiento. Si se indica, el detector
+            de rostros solo se ejecuta en las zonas con movimiento y se omite en frames estáticos
+        detector (callable, optional): Detector de rostros (ver src.detectors); por defecto, HOG de face_recognition
+        quality_gate (FaceQualityGate, optional): Filtro de calidad. Si se indica, los rostros pequeños,
+            borrosos o girados no se codifican ni se registran; un rostro seguido conserva su identidad anterior
+        timings (object, optional): Receptor de tiempos por etapa; se llama a timings.add(etapa, segundos)
+            para resize, cvtcolor, detect, quality, encode, match y log (solo las etapas ejecutadas)
+        timestamp (datetime, optional): Momento del frame para los registros (por defecto, ahora)
         
     Returns:
         list: Lista de tuplas (nombre, coordenadas, color, texto_acceso)
     """
     if frame is None:
         return []
+    
+    # Reutilizar la galería si ya viene construida; si no, construirla a partir de las listas
+    if isinstance(known_face_encodings, FaceGallery):
+        gallery = known_face_encodings
+    else:
+        if known_face_encodings is None or known_face_names is None:
+            return []
+        gallery = FaceGallery(known_face_encodings, known_face_names)
         
-    if not known_face_encodings or not known_face_names:
+    if len(gallery) == 0:
         return []
         
     results = []
+    # Duración de cada etapa ejecutada (perf_counter es lo bastante barato para medir siempre)
+    clock = time.perf_counter
+    stage_times = {}
     
     try:
         # Redimensionar frame para procesamiento más rápido
+        start = clock()
         small_frame = cv2.resize(frame, (0, 0), fx=resize_factor, fy=resize_factor)
+        stage_times['resize'] = clock() - start
         
         # Convertir de BGR (OpenCV) a RGB (face_recognition)
+        start = clock()
         rgb_small_frame = cv2.cvtColor(small_frame, cv2.COLOR_BGR2RGB)
+        stage_times['cvtcolor'] = clock() - start
+        
+        # Detectar rostros en el frame (solo donde hay movimiento si hay detector de movimiento)
+        start = clock()
+        detect_fn = detector or face_recognition.face_locations
+        if motion_detector is not None:
+            face_locations = motion_detector.detect_faces(rgb_small_frame, detect_fn)
+        else:
+            face_locations = detect_fn(rgb_small_frame)
+        stage_times['detect'] = clock() - start
+        
+        # Decidir qué rostros hay que codificar (todos si no hay tracker)
+        if tracker is not None:
+            assignments = tracker.update(face_locations)
+            to_encode = [i for i, (_, needs_encoding) in enumerate(assignments) if needs_encoding]
+        else:
+            assignments = None
+            to_encode = list(range(len(face_locations)))
         
-        # Detectar rostros en el frame
-        face_locations = face_recognition.face_locations(rgb_small_frame)
+        # Descartar antes del encoding los rostros que no darían una coincidencia fiable
+        if quality_gate is not None and to_encode:
+            start = clock()
+            accepted_quality = quality_gate.filter(rgb_small_frame, [face_locations[i] for i in to_encode])
+            to_encode = [i for i, ok in zip(to_encode, accepted_quality) if ok]
+            stage_times['quality'] = clock() - start
         
-        if face_locations:
-            # Obtener encodings de los rostros detectados
-            face_encodings = face_recognition.face_encodings(rgb_small_frame, face_locations)
+        # Identidad de cada rostro: (nombre, confianza, acceso_concedido, encoding si se acaba de identificar)
+        identities = [None] * len(face_locations)
+        
+        if to_encode:
+            # Obtener encodings solo de los rostros que lo necesitan
+            start = clock()
+            face_encodings = face_recognition.face_encodings(
+                rgb_small_frame, [face_locations[i] for i in to_encode]
+            )
+            stage_times['encode'] = clock() - start
             
-            for (top, right, bottom, left), face_encoding in zip(face_locations, face_encodings):
-                # Ajustar coordenadas al tamaño original
-                top = int(top / resize_factor)
-                right = int(right / resize_factor)
-                bottom = int(bottom / resize_factor)
-                left = int(left / resize_factor)
-                
-                # Buscar coincidencias
-                matches = face_recognition.compare_faces(
-                    known_face_encodings, 
-                    face_encoding,
-                    tolerance=tolerance
-                )
-                
+            # Buscar coincidencias de todos los rostros en una sola operación matricial
+            start = clock()
+            best_indices, best_distances, accepted = gallery.match(face_encodings, tolerance=tolerance)
+            stage_times['match'] = clock() - start
+            
+            for j, i in enumerate(to_encode):
                 name = "Desconocido"
                 confidence = 0.0
                 access_granted = False
                 
-                if True in matches:
-                    # Calcular distancias faciales
-                    face_distances = face_recognition.face_distance(known_face_encodings, face_encoding)
-                    best_match_index = np.argmin(face_distances)
-                    
-                    # Solo aceptar si la distancia es suficientemente pequeña
-                    if matches[best_match_index]:
-                        confidence = 1.0 - face_distances[best_match_index]
-                        if confidence >= (1.0 - tolerance):
-                            name = known_face_names[best_match_index]
-                            access_granted = True
-                
-                # Configurar colores y mensaje de acceso
-                if access_granted:
-                    color = (0, 255, 0)  # Verde para acceso permitido
-                    access_text = f"ACCESO PERMITIDO ({confidence:.2f})"
-                else:
-                    color = (0, 0, 255)  # Rojo para acceso denegado
-                    access_text = "ACCESO DENEGADO"
-                
-                # Registrar acceso si hay un logger disponible
-                if access_logger:
-                    # Solo registrar si la confianza es suficiente o si es un desconocido
-                    if access_granted or name == "Desconocido":
-                        extra_data = {
-                            'face_location': [top, right, bottom, left]
-                        }
-                        access_logger.log_access(
-                            name=name,
-                            access_granted=access_granted,
-                            confidence=confidence,
-                            camera_id=camera_id,
-                            extra_data=extra_data
-                        )
+                if accepted[j]:
+                    confidence = 1.0 - float(best_distances[j])
+                    name = gallery.names[best_indices[j]]
+                    access_granted = True
                 
-                results.append((name, (left, top, right, bottom), color, access_text))
+                if assignments is not None:
+                    assignments[i][0].set_identity(name, confidence, access_granted)
+                identities[i] = (name, confidence, access_granted, face_encodings[j])
+        
+        # Rostros seguidos que conservan la identidad del frame anterior
+        if assignments is not None:
+            for i, (track, _) in enumerate(assignments):
+                if identities[i] is None and track.identified:
+                    identities[i] = (track.name, track.confidence, track.access_granted, None)
+        
+        for (top, right, bottom, left), identity in zip(face_locations, identities):
+            # Ajustar coordenadas al tamaño original
+            top = int(top / resize_factor)
+            right = int(right / resize_factor)
+            bottom = int(bottom / resize_factor)
+            left = int(left / resize_factor)
+            
+            if identity is None:
+                # Rostro descartado por calidad y sin identidad previa: se muestra pero no se registra
+                results.append(("Desconocido", (left, top, right, bottom), (128, 128, 128), "CALIDAD INSUFICIENTE"))
+                continue
+            name, confidence, access_granted, face_encoding = identity
+            
+            # Configurar colores y mensaje de acceso
+            if access_granted:
+                color = (0, 255, 0)  # Verde para acceso permitido
+                access_text = f"ACCESO PERMITIDO ({confidence:.2f})"
+            else:
+                color = (0, 0, 255)  # Rojo para acceso denegado
+                access_text = "ACCESO DENEGADO"
+            
+            # Registrar acceso si hay un logger disponible (solo al identificar el rostro)
+            if access_logger and face_encoding is not None:
+                # Solo registrar si la confianza es suficiente o si es un desconocido
+                if access_granted or name == "Desconocido":
+                    start = clock()
+                    extra_data = {
+                        'face_location': [top, right, bottom, left]
+                    }
+                    access_logger.log_access(
+                        name=name,
+                        access_granted=access_granted,
+                        confidence=confidence,
+                        camera_id=camera_id,
+                        extra_data=extra_data,
+                        face_encoding=face_encoding,
+                        timestamp=timestamp
+                    )
+                    stage_times['log'] = stage_times.get('log', 0.0) + clock() - start
+            
+            results.append((name, (left, top, right, bottom), color, access_text))
     except Exception as e:
         print(f"Error en el reconocimiento facial: {e}")
     
+    if timings is not None:
+        for stage, seconds in stage_times.items():
+            timings.add(stage, seconds)
+    
     return results
\ No newline at end of file
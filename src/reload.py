@@ -0,0 +1,108 @@
+import os
+import time
+import logging
+import threading
+from src.gallery import FaceGallery
+from src.ann import prepare_index
+from src.store import HEADER_FILE, is_gallery_store, open_gallery_store
+
+def load_gallery(encodings_file, search_index="brute", index_file=None, index_params=None):
+    """
+    Abre la galería binaria y prepara su índice de búsqueda
+
+    Args:
+        encodings_file (str): Directorio de la galería
+        search_index (str): Backend de búsqueda
+        index_file (str, optional): Ruta al índice guardado
+        index_params (dict, optional): Parámetros del backend
+
+    Returns:
+        FaceGallery: Galería lista para usar (vacía si no existe)
+    """
+    if not is_gallery_store(encodings_file):
+        return FaceGallery([], [])
+    matrix, names, header = open_gallery_store(encodings_file)
+    gallery = FaceGallery(matrix, names, checksum=header['checksum'], generation=header.get('generation'))
+    gallery.index = prepare_index(gallery, search_index, index_file, **(index_params or {}))
+    return gallery
+
+class GalleryReloader(threading.Thread):
+    """
+    Hilo que vigila la galería en disco y, si cambia, la carga e indexa en segundo plano
+
+    La galería nueva se construye por completo antes de publicarla con una única
+    asignación de referencia, de modo que cada frame usa siempre una galería
+    coherente (la anterior o la nueva, nunca una mezcla) y el bucle no se detiene.
+    """
+    def __init__(self, encodings_file, gallery, search_index="brute", index_file=None, index_params=None,
+                 poll_interval=2.0):
+        """
+        Inicializa el vigilante de la galería
+
+        Args:
+            encodings_file (str): Directorio de la galería
+            gallery (FaceGallery): Galería cargada actualmente
+            search_index (str): Backend de búsqueda
+            index_file (str, optional): Ruta al índice guardado
+            index_params (dict, optional): Parámetros del backend
+            poll_interval (float): Segundos entre comprobaciones del archivo de cabecera
+        """
+        super().__init__(name="gallery-reloader", daemon=True)
+        self.encodings_file = encodings_file
+        self.search_index = search_index
+        self.index_file = index_file
+        self.index_params = index_params
+        self.poll_interval = poll_interval
+        self.reloads = 0
+        self.logger = logging.getLogger("gallery_reloader")
+
+        self._gallery = gallery
+        self._last_mtime = self._header_mtime()
+        self._stop_event = threading.Event()
+
+    @property
+    def gallery(self):
+        """Galería vigente (leerla una vez por frame)"""
+        return self._gallery
+
+    def _header_mtime(self):
+        try:
+            return os.stat(os.path.join(self.encodings_file, HEADER_FILE)).st_mtime_ns
+        except OSError:
+            return None
+
+    def check(self):
+        """
+        Comprueba si la galería cambió en disco y, en ese caso, la recarga
+
+        Returns:
+            bool: True si se publicó una galería nueva
+        """
+        mtime = self._header_mtime()
+        if mtime is None or mtime == self._last_mtime:
+            return False
+        self._last_mtime = mtime
+
+        start = time.perf_counter()
+        try:
+            gallery = load_gallery(self.encodings_file, self.search_index, self.index_file, self.index_params)
+        except Exception as e:
+            self.logger.error(f"Error al recargar la galería: {e}")
+            return False
+
+        if gallery.checksum and gallery.checksum == self._gallery.checksum:
+            return False
+
+        # Publicación atómica: los lectores ven la galería anterior o la nueva completa
+        self._gallery = gallery
+        self.reloads += 1
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        self.logger.info(f"Galería recargada en {elapsed_ms:.1f} ms: {len(gallery)} encodings")
+        return True
+
+    def run(self):
+        while not self._stop_event.wait(self.poll_interval):
+            self.check()
+
+    def stop(self):
+        self._stop_event.set()
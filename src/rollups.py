@@ -0,0 +1,178 @@
+import os
+import copy
+import glob
+import json
+
+ROLLUP_DIR = "rollups"
+ROLLUP_PREFIX = "rollup_"
+
+def empty_rollup():
+    """Contadores vacíos de un día"""
+    return {
+        'records': 0,
+        'source_size': None,
+        'acceso': {},      # acceso -> registros
+        'usuarios': {},    # nombre -> acceso -> registros
+        'camaras': {}      # cámara -> hora ("00".."23") -> registros
+    }
+
+def add_record(rollup, entry):
+    """
+    Suma un registro a los contadores de su día
+
+    Args:
+        rollup (dict): Contadores del día (ver empty_rollup)
+        entry (dict): Registro de acceso
+    """
+    access = entry['acceso']
+    rollup['records'] += 1
+    rollup['acceso'][access] = rollup['acceso'].get(access, 0) + 1
+
+    user = rollup['usuarios'].setdefault(entry['nombre'], {})
+    user[access] = user.get(access, 0) + 1
+
+    camera = rollup['camaras'].setdefault(str(entry['camara_id']), {})
+    hour = entry['timestamp'][11:13]
+    camera[hour] = camera.get(hour, 0) + 1
+
+def merge_rollups(rollups):
+    """
+    Combina los contadores de varios días
+
+    Args:
+        rollups (iterable): Contadores diarios
+
+    Returns:
+        dict: Contadores totales (mismo formato que un día, sin source_size)
+    """
+    total = empty_rollup()
+    del total['source_size']
+    for rollup in rollups:
+        total['records'] += rollup['records']
+        for access, count in rollup['acceso'].items():
+            total['acceso'][access] = total['acceso'].get(access, 0) + count
+        for name, counts in rollup['usuarios'].items():
+            user = total['usuarios'].setdefault(name, {})
+            for access, count in counts.items():
+                user[access] = user.get(access, 0) + count
+        for camera_id, hours in rollup['camaras'].items():
+            camera = total['camaras'].setdefault(camera_id, {})
+            for hour, count in hours.items():
+                camera[hour] = camera.get(hour, 0) + count
+    return total
+
+class RollupStore:
+    """
+    Contadores agregados por día (día × acceso, usuario × acceso, cámara × hora)
+
+    Cada día se guarda en un pequeño archivo JSON (rollups/rollup_AAAAMMDD.json) que se
+    sustituye de forma atómica, de modo que las estadísticas de meses se leen sin tocar
+    los registros originales.
+    """
+    def __init__(self, log_dir):
+        """
+        Inicializa el almacén de contadores
+
+        Args:
+            log_dir (str): Directorio de los registros
+        """
+        self.rollup_dir = os.path.join(log_dir, ROLLUP_DIR)
+        os.makedirs(self.rollup_dir, exist_ok=True)
+        # Día -> (firma del archivo, contadores); otro proceso puede sustituir el archivo
+        self._cache = {}
+
+    def path(self, day):
+        return os.path.join(self.rollup_dir, f"{ROLLUP_PREFIX}{day}.json")
+
+    def _signature(self, day):
+        """Identifica la versión del archivo de un día (cada guardado crea un archivo nuevo)"""
+        try:
+            stat = os.stat(self.path(day))
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def load(self, day):
+        """
+        Lee los contadores de un día
+
+        Args:
+            day (str): Día en formato "AAAAMMDD"
+
+        Returns:
+            dict: Contadores del día, o None si no existen o están dañados
+        """
+        signature = self._signature(day)
+        if signature is None:
+            self._cache.pop(day, None)
+            return None
+        cached = self._cache.get(day)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        try:
+            with open(self.path(day), 'r', encoding='utf-8') as f:
+                rollup = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        self._cache[day] = (signature, rollup)
+        return rollup
+
+    def save(self, day, rollup):
+        """Guarda los contadores de un día de forma atómica"""
+        tmp_path = self.path(day) + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(rollup, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path(day))
+        self._cache[day] = (self._signature(day), rollup)
+
+    def days(self, start_day=None, end_day=None):
+        """
+        Días con contadores guardados dentro del rango
+
+        Returns:
+            list: Días "AAAAMMDD" en orden cronológico
+        """
+        days = []
+        for path in glob.glob(os.path.join(self.rollup_dir, f"{ROLLUP_PREFIX}[0-9]*.json")):
+            day = os.path.basename(path)[len(ROLLUP_PREFIX):-len(".json")]
+            if len(day) != 8 or not day.isdigit():
+                continue
+            if (start_day and day < start_day) or (end_day and day > end_day):
+                continue
+            days.append(day)
+        return sorted(days)
+
+    def rebuild(self, day, entries, source_size=None):
+        """
+        Recalcula los contadores de un día a partir de sus registros
+
+        Args:
+            day (str): Día en formato "AAAAMMDD"
+            entries (iterable): Registros del día
+            source_size (int, optional): Tamaño del archivo de origen contado
+
+        Returns:
+            dict: Contadores recalculados
+        """
+        rollup = empty_rollup()
+        for entry in entries:
+            add_record(rollup, entry)
+        rollup['source_size'] = source_size
+        self.save(day, rollup)
+        return rollup
+
+    def update(self, day, entries, source_size=None):
+        """
+        Suma nuevos registros a los contadores de un día (que deben estar al día)
+
+        Args:
+            day (str): Día en formato "AAAAMMDD"
+            entries (list): Registros nuevos del día
+            source_size (int, optional): Tamaño del archivo de origen tras escribirlos
+        """
+        # Se trabaja sobre una copia: si el guardado falla, la caché sigue igual que el disco
+        rollup = copy.deepcopy(self.load(day)) or empty_rollup()
+        for entry in entries:
+            add_record(rollup, entry)
+        rollup['source_size'] = source_size
+        self.save(day, rollup)
@@ -0,0 +1,94 @@
+import os
+import cv2
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+def list_frame_files(directory):
+    """
+    Imágenes de un directorio de frames, en orden de nombre
+
+    Args:
+        directory (str): Directorio con un frame por archivo
+
+    Returns:
+        list: Rutas de las imágenes
+    """
+    return [
+        os.path.join(directory, file_name)
+        for file_name in sorted(os.listdir(directory))
+        if file_name.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+
+def is_recorded_source(source):
+    """Indica si la fuente es un vídeo o un directorio de frames locales (y no una cámara o un stream)"""
+    return isinstance(source, str) and (os.path.isfile(source) or os.path.isdir(source))
+
+def source_fps(source, default=25.0):
+    """
+    Frames por segundo declarados por un vídeo
+
+    Returns:
+        float: FPS del vídeo, o default si es un directorio o no lo declara
+    """
+    if os.path.isdir(source):
+        return default
+    cap = cv2.VideoCapture(source)
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+    finally:
+        cap.release()
+    return fps if fps and fps > 0 else default
+
+def iter_timed_frames(source, max_frames=None, fps=None):
+    """
+    Recorre los frames de un vídeo, un directorio de imágenes o una URL de stream
+
+    Los frames se leen tan rápido como se consumen (no se respeta la velocidad de
+    reproducción) y ninguno se descarta.
+
+    Args:
+        source (str): Ruta de un vídeo, directorio de frames o URL
+        max_frames (int, optional): Número máximo de frames a leer
+        fps (float, optional): Frames por segundo de un directorio de frames, para calcular su posición
+
+    Yields:
+        tuple: (segundos desde el inicio de la grabación o None si no se conocen, frame BGR)
+    """
+    count = 0
+    if os.path.isdir(source):
+        for path in list_frame_files(source):
+            if max_frames is not None and count >= max_frames:
+                return
+            frame = cv2.imread(path)
+            if frame is None:
+                print(f"No se pudo leer el frame: {path}")
+                continue
+            offset = count / float(fps) if fps else None
+            count += 1
+            yield offset, frame
+        return
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise ValueError(f"No se pudo abrir la fuente de vídeo: {source}")
+    recorded = os.path.isfile(source)
+    try:
+        while max_frames is None or count < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                return
+            count += 1
+            # Posición del frame en la grabación (en un stream en directo no tiene sentido)
+            yield (cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0 if recorded else None), frame
+    finally:
+        cap.release()
+
+def iter_frames(source, max_frames=None):
+    """
+    Recorre los frames de una fuente sin su posición (ver iter_timed_frames)
+
+    Yields:
+        numpy.ndarray: Frames BGR
+    """
+    for _, frame in iter_timed_frames(source, max_frames=max_frames):
+        yield frame
@@ -0,0 +1,199 @@
+import os
+import json
+import glob
+import pickle
+import hashlib
+import numpy as np
+
+# Formato binario versionado de la galería de encodings
+STORE_FORMAT = "vision-gallery"
+STORE_VERSION = 1
+HEADER_FILE = "header.json"
+
+def _checksum(matrix, ids, name_table):
+    """Calcula el checksum SHA-256 de la matriz, los IDs y la tabla de nombres"""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(matrix).tobytes())
+    digest.update(np.ascontiguousarray(ids).tobytes())
+    digest.update(json.dumps(name_table, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+def _name_ids(names):
+    """Construye la tabla compacta de nombres y el ID de empleado de cada fila"""
+    name_table = sorted(set(names))
+    name_ids = {name: i for i, name in enumerate(name_table)}
+    ids = np.fromiter((name_ids[name] for name in names), dtype=np.uint32, count=len(names))
+    return name_table, ids
+
+def _as_matrix(encodings, count):
+    matrix = np.asarray(encodings, dtype=np.float32)
+    return matrix.reshape(count, -1) if matrix.size else np.empty((0, 128), dtype=np.float32)
+
+def compute_checksum(encodings, names):
+    """
+    Calcula el checksum que tendría la galería formada por estos encodings y nombres
+
+    Args:
+        encodings (list | numpy.ndarray): Encodings (uno por fila)
+        names (list): Nombre de cada fila
+
+    Returns:
+        str: Checksum SHA-256
+    """
+    name_table, ids = _name_ids(names)
+    return _checksum(_as_matrix(encodings, len(names)), ids, name_table)
+
+def is_gallery_store(store_dir):
+    """Indica si la ruta contiene una galería en formato binario"""
+    return os.path.isfile(os.path.join(store_dir, HEADER_FILE))
+
+def read_store_header(store_dir):
+    """
+    Lee la cabecera de la galería
+
+    Args:
+        store_dir (str): Directorio de la galería
+
+    Returns:
+        dict: Cabecera (formato, versión, dimensión, número de filas, checksum y ficheros), o None si no existe
+    """
+    try:
+        with open(os.path.join(store_dir, HEADER_FILE), 'r', encoding='utf-8') as f:
+            header = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+    if header.get('format') != STORE_FORMAT:
+        raise ValueError("El archivo de encodings tiene un formato inválido")
+    if header.get('version', 0) > STORE_VERSION:
+        raise ValueError(f"Versión de la galería no soportada: {header.get('version')}")
+    return header
+
+def store_checksum(store_dir):
+    """Devuelve el checksum de la galería, o None si no existe"""
+    header = read_store_header(store_dir) if is_gallery_store(store_dir) else None
+    return header['checksum'] if header else None
+
+def store_generation(store_dir):
+    """Devuelve la generación de la galería (crece con cada escritura), o None si no existe"""
+    header = read_store_header(store_dir) if is_gallery_store(store_dir) else None
+    return header.get('generation') if header else None
+
+def write_gallery_store(store_dir, encodings, names):
+    """
+    Escribe la galería en formato binario: matriz float32 .npy, tabla de nombres/IDs y cabecera
+
+    Cada escritura crea una nueva generación de ficheros y solo al final sustituye la
+    cabecera de forma atómica, por lo que los lectores nunca ven una galería a medias.
+    Se conserva la generación anterior para los procesos que aún la tengan mapeada.
+
+    Args:
+        store_dir (str): Directorio de la galería
+        encodings (list | numpy.ndarray): Encodings (uno por fila)
+        names (list): Nombre de cada fila
+
+    Returns:
+        dict: Cabecera escrita
+    """
+    os.makedirs(store_dir, exist_ok=True)
+
+    matrix = _as_matrix(encodings, len(names))
+
+    # Tabla compacta de nombres: cada fila guarda solo el ID del empleado
+    name_table, ids = _name_ids(names)
+
+    previous = read_store_header(store_dir) if is_gallery_store(store_dir) else None
+    generation = previous['generation'] + 1 if previous else 1
+
+    files = {
+        'matrix': f"encodings_{generation:06d}.npy",
+        'ids': f"ids_{generation:06d}.npy",
+        'names': f"names_{generation:06d}.json"
+    }
+    np.save(os.path.join(store_dir, files['matrix']), matrix)
+    np.save(os.path.join(store_dir, files['ids']), ids)
+    with open(os.path.join(store_dir, files['names']), 'w', encoding='utf-8') as f:
+        json.dump(name_table, f, ensure_ascii=False)
+
+    header = {
+        'format': STORE_FORMAT,
+        'version': STORE_VERSION,
+        'dtype': 'float32',
+        'dim': int(matrix.shape[1]),
+        'count': int(matrix.shape[0]),
+        'generation': generation,
+        'checksum': _checksum(matrix, ids, name_table),
+        'files': files
+    }
+    tmp_path = os.path.join(store_dir, HEADER_FILE + ".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(header, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(store_dir, HEADER_FILE))
+
+    _remove_old_generations(store_dir, keep={generation, generation - 1})
+    return header
+
+def _remove_old_generations(store_dir, keep):
+    """Elimina los ficheros de generaciones que ya no se necesitan"""
+    for path in glob.glob(os.path.join(store_dir, "*_[0-9][0-9][0-9][0-9][0-9][0-9].*")):
+        try:
+            generation = int(os.path.splitext(os.path.basename(path))[0].rsplit('_', 1)[1])
+        except ValueError:
+            continue
+        if generation not in keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def open_gallery_store(store_dir, verify=False):
+    """
+    Abre la galería sin copiar la matriz (mapeada en memoria y compartible entre procesos)
+
+    Args:
+        store_dir (str): Directorio de la galería
+        verify (bool): Si es True, comprueba el checksum (lee la matriz completa)
+
+    Returns:
+        tuple: (matriz float32 mapeada, nombres por fila, cabecera)
+    """
+    header = read_store_header(store_dir)
+    if header is None:
+        raise FileNotFoundError(f"No se encontró la galería en {store_dir}")
+
+    files = header['files']
+    matrix = np.load(os.path.join(store_dir, files['matrix']), mmap_mode='r')
+    ids = np.load(os.path.join(store_dir, files['ids']), mmap_mode='r')
+    with open(os.path.join(store_dir, files['names']), 'r', encoding='utf-8') as f:
+        name_table = json.load(f)
+
+    if matrix.dtype != np.float32 or matrix.shape != (header['count'], header['dim']) or len(ids) != header['count']:
+        raise ValueError("La galería no coincide con su cabecera")
+    if verify and _checksum(matrix, ids, name_table) != header['checksum']:
+        raise ValueError("El checksum de la galería no es válido")
+
+    names = [name_table[i] for i in ids.tolist()]
+    return matrix, names, header
+
+def migrate_pickle_store(pickle_file, store_dir):
+    """
+    Migra (una sola vez) el archivo pickle de encodings al formato binario
+
+    Args:
+        pickle_file (str): Ruta al archivo .pkl heredado
+        store_dir (str): Directorio de la nueva galería
+
+    Returns:
+        int: Número de encodings migrados
+    """
+    with open(pickle_file, 'rb') as f:
+        data = pickle.load(f)
+
+    if not isinstance(data, dict) or 'encodings' not in data or 'names' not in data:
+        raise ValueError("El archivo de encodings tiene un formato inválido")
+
+    header = write_gallery_store(store_dir, data['encodings'], data['names'])
+    print(f"Galería migrada de {pickle_file} a {store_dir}: {header['count']} encodings")
+    return header['count']
@@ -0,0 +1,164 @@
+import numpy as np
+
+class Track:
+    """
+    Rostro seguido entre frames junto con su última identidad conocida
+    """
+    def __init__(self, track_id, box):
+        self.track_id = track_id
+        self.box = box  # (top, right, bottom, left)
+        self.encoded_box = box
+        self.name = None
+        self.confidence = 0.0
+        self.access_granted = False
+        self.frames_since_encoding = 0
+        self.missed_frames = 0
+
+    @property
+    def identified(self):
+        """Indica si el track ya tiene una identidad asignada"""
+        return self.name is not None
+
+    def set_identity(self, name, confidence, access_granted):
+        """
+        Actualiza la identidad del track tras codificar y comparar el rostro
+
+        Args:
+            name (str): Nombre reconocido
+            confidence (float): Nivel de confianza del reconocimiento
+            access_granted (bool): Si se concedió acceso o no
+        """
+        self.name = name
+        self.confidence = confidence
+        self.access_granted = access_granted
+        self.encoded_box = self.box
+        self.frames_since_encoding = 0
+
+def _box_arrays(boxes):
+    """Convierte cajas (top, right, bottom, left) en una matriz float (N x 4)"""
+    return np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+
+def iou_matrix(boxes_a, boxes_b):
+    """Calcula la intersección sobre unión entre dos conjuntos de cajas"""
+    a = _box_arrays(boxes_a)[:, None, :]
+    b = _box_arrays(boxes_b)[None, :, :]
+    inter_h = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_w = np.clip(np.minimum(a[..., 1], b[..., 1]) - np.maximum(a[..., 3], b[..., 3]), 0, None)
+    inter = inter_h * inter_w
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 1] - a[..., 3])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 1] - b[..., 3])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+def _box_geometry(box):
+    """Devuelve el centro (y, x) y el tamaño medio de una caja"""
+    top, right, bottom, left = box
+    size = ((bottom - top) + (right - left)) / 2.0
+    return (top + bottom) / 2.0, (left + right) / 2.0, max(size, 1.0)
+
+class FaceTracker:
+    """
+    Seguimiento ligero de rostros entre frames por IoU y distancia entre centros
+    """
+    def __init__(self, iou_threshold=0.3, reencode_interval=15, max_move=0.3, max_scale_change=0.3, max_missed=5):
+        """
+        Inicializa el tracker
+
+        Args:
+            iou_threshold (float): IoU mínima para asociar una detección a un track
+            reencode_interval (int): Frames tras los que se vuelve a codificar un rostro ya identificado
+            max_move (float): Desplazamiento máximo del centro (relativo al tamaño) sin re-codificar
+            max_scale_change (float): Cambio relativo de tamaño máximo sin re-codificar
+            max_missed (int): Frames sin detección tras los que se descarta un track
+        """
+        self.iou_threshold = iou_threshold
+        self.reencode_interval = reencode_interval
+        self.max_move = max_move
+        self.max_scale_change = max_scale_change
+        self.max_missed = max_missed
+        self.tracks = []
+        self._next_id = 1
+
+    def _changed_sharply(self, track, box):
+        """Indica si la caja se ha movido o cambiado de tamaño bruscamente desde la última codificación"""
+        old_y, old_x, old_size = _box_geometry(track.encoded_box)
+        new_y, new_x, new_size = _box_geometry(box)
+        moved = np.hypot(new_y - old_y, new_x - old_x) / old_size
+        scaled = abs(new_size - old_size) / old_size
+        return moved > self.max_move or scaled > self.max_scale_change
+
+    def _associate(self, face_locations):
+        """Empareja detecciones con tracks existentes (primero por IoU, después por centro)"""
+        matches = {}
+        if not self.tracks or not face_locations:
+            return matches
+
+        iou = iou_matrix([t.box for t in self.tracks], face_locations)
+        for t, d in zip(*np.unravel_index(np.argsort(-iou, axis=None), iou.shape)):
+            if iou[t, d] < self.iou_threshold:
+                break
+            if t in matches.values() or d in matches:
+                continue
+            matches[d] = t
+
+        # Detecciones sin pareja: asociar por cercanía de centros (rostros rápidos o cajas pequeñas)
+        for d, box in enumerate(face_locations):
+            if d in matches:
+                continue
+            det_y, det_x, det_size = _box_geometry(box)
+            best, best_dist = None, self.max_move * 2
+            for t, track in enumerate(self.tracks):
+                if t in matches.values():
+                    continue
+                trk_y, trk_x, trk_size = _box_geometry(track.box)
+                dist = np.hypot(det_y - trk_y, det_x - trk_x) / max(det_size, trk_size)
+                if dist < best_dist:
+                    best, best_dist = t, dist
+            if best is not None:
+                matches[d] = best
+
+        return matches
+
+    def update(self, face_locations):
+        """
+        Actualiza los tracks con las detecciones del frame actual
+
+        Args:
+            face_locations (list): Cajas (top, right, bottom, left) detectadas en el frame
+
+        Returns:
+            list: Tuplas (track, necesita_codificar) alineadas con face_locations
+        """
+        matches = self._associate(face_locations)
+        assignments = []
+        seen = set()
+
+        for d, box in enumerate(face_locations):
+            if d in matches:
+                track = self.tracks[matches[d]]
+                track.frames_since_encoding += 1
+                needs_encoding = (
+                    not track.identified
+                    or track.frames_since_encoding >= self.reencode_interval
+                    or self._changed_sharply(track, box)
+                )
+                track.box = box
+                track.missed_frames = 0
+            else:
+                track = Track(self._next_id, box)
+                self._next_id += 1
+                self.tracks.append(track)
+                needs_encoding = True
+            seen.add(track.track_id)
+            assignments.append((track, needs_encoding))
+
+        # Envejecer los tracks no vistos y descartar los perdidos
+        for track in self.tracks:
+            if track.track_id not in seen:
+                track.missed_frames += 1
+        self.tracks = [t for t in self.tracks if t.missed_frames <= self.max_missed]
+
+        return assignments
+
+    def reset(self):
+        """Descarta todos los tracks"""
+        self.tracks = []
@@ -0,0 +1,290 @@
+import time
+import signal
+import logging
+import threading
+import multiprocessing
+from src.recognition import load_encodings, recognize_faces
+from src.gallery import FaceGallery
+from src.ann import prepare_index
+from src.store import store_checksum, store_generation
+from src.reload import load_gallery
+from src.detectors import create_detector
+from src.quality import FaceQualityGate
+
+# Estado de cada proceso trabajador (galería cargada una sola vez al arrancar)
+_worker_state = {}
+
+class _RecordingLogger:
+    """
+    Sustituto de AccessLogger que guarda las llamadas para reproducirlas en el proceso principal
+    """
+    def __init__(self):
+        self.calls = []
+
+    def log_access(self, **kwargs):
+        self.calls.append(kwargs)
+
+class _RecordingTimings:
+    """
+    Receptor de tiempos por etapa que los guarda para sumarlos a las métricas del proceso principal
+    """
+    def __init__(self):
+        self.samples = []
+
+    def add(self, stage, seconds):
+        # El registro real ocurre en el proceso principal, que mide allí la etapa 'log'
+        if stage != 'log':
+            self.samples.append((stage, seconds))
+
+def _init_worker(encodings_file, index_file, search_index, index_params, tolerance, resize_factor,
+                 detector_backend, detector_params, quality_params):
+    """Carga la galería, su índice y el detector de rostros en el proceso trabajador"""
+    # El proceso principal gestiona Ctrl+C; los trabajadores lo ignoran
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # La galería binaria se mapea en memoria: todos los procesos comparten las mismas páginas
+    encodings, names = load_encodings(encodings_file)
+    gallery = FaceGallery(encodings, names, checksum=store_checksum(encodings_file),
+                          generation=store_generation(encodings_file))
+    gallery.index = prepare_index(gallery, search_index, index_file, **(index_params or {}))
+
+    _worker_state['gallery'] = gallery
+    _worker_state['gallery_args'] = (encodings_file, search_index, index_file, index_params)
+    _worker_state['reload_lock'] = threading.Lock()
+    _worker_state['requested_generation'] = gallery.generation
+    _worker_state['tolerance'] = tolerance
+    _worker_state['resize_factor'] = resize_factor
+    _worker_state['detector'] = create_detector(detector_backend, **(detector_params or {}))
+    _worker_state['quality_gate'] = FaceQualityGate(**quality_params) if quality_params is not None else None
+
+def _is_newer(generation, current):
+    """Indica si una generación es posterior a otra (None = desconocida, la más antigua)"""
+    return generation is not None and (current is None or generation > current)
+
+def _reload_in_worker():
+    """Carga e indexa la galería en disco y la publica si es posterior a la vigente"""
+    try:
+        gallery = load_gallery(*_worker_state['gallery_args'])
+    except Exception as e:
+        logging.getLogger("gallery_reloader").error(f"Error al recargar la galería en el trabajador: {e}")
+        return
+    # Solo hacia delante: nunca se sustituye por una generación anterior
+    if _is_newer(gallery.generation, _worker_state['gallery'].generation):
+        _worker_state['gallery'] = gallery
+
+def _request_reload(generation):
+    """
+    Pide cargar en segundo plano una generación de la galería más reciente que la del trabajador
+
+    Cada generación se pide una sola vez; mientras se carga, los frames siguen
+    reconociéndose con la galería anterior.
+    """
+    with _worker_state['reload_lock']:
+        if not _is_newer(generation, _worker_state['requested_generation']):
+            return
+        _worker_state['requested_generation'] = generation
+    threading.Thread(target=_reload_in_worker, name="gallery-reloader", daemon=True).start()
+
+def _recognize_in_worker(task):
+    """
+    Reconoce los rostros de un frame dentro de un proceso trabajador
+
+    Un error en un frame no debe bloquear el flujo ordenado de resultados: se informa
+    y el frame se devuelve sin rostros.
+    """
+    seq, frame, camera_id, generation, timestamp = task
+    recorder = _RecordingLogger()
+    timings = _RecordingTimings()
+
+    try:
+        # El proceso principal publicó una generación nueva: se prepara fuera del frame
+        if _is_newer(generation, _worker_state['gallery'].generation):
+            _request_reload(generation)
+        gallery = _worker_state['gallery']
+        results = recognize_faces(
+            frame,
+            gallery,
+            gallery.names,
+            tolerance=_worker_state['tolerance'],
+            resize_factor=_worker_state['resize_factor'],
+            access_logger=recorder,
+            camera_id=camera_id,
+            detector=_worker_state['detector'],
+            quality_gate=_worker_state['quality_gate'],
+            timings=timings,
+            timestamp=timestamp
+        )
+    except Exception as e:
+        print(f"Error en el reconocimiento facial (frame {seq}): {e}")
+        return seq, [], [], []
+    return seq, results, recorder.calls, timings.samples
+
+class RecognitionPool:
+    """
+    Pool de procesos para el reconocimiento facial con resultados en el orden de los frames
+
+    Cada proceso carga la galería una vez al arrancar y, cuando el proceso principal le
+    indica que hay una generación nueva, la carga en un hilo aparte y la adopta al terminar.
+    Los accesos detectados en los trabajadores se registran en el AccessLogger del proceso
+    principal al recoger cada resultado. El seguimiento de rostros y la detección condicionada al movimiento no están
+    disponibles en este modo, ya que frames consecutivos se reparten entre procesos distintos.
+    """
+    def __init__(self, num_workers, encodings_file, index_file=None, search_index="brute",
+                 index_params=None, tolerance=0.45, resize_factor=0.25, access_logger=None, reloader=None,
+                 detector_backend="hog", detector_params=None, quality_params=None, timings=None):
+        """
+        Arranca los procesos trabajadores
+
+        Args:
+            num_workers (int): Número de procesos (0 = uno por núcleo)
+            encodings_file (str): Ruta al archivo de encodings
+            index_file (str, optional): Ruta al índice de búsqueda guardado
+            search_index (str): Backend de búsqueda
+            index_params (dict, optional): Parámetros del backend de búsqueda
+            tolerance (float): Tolerancia para el reconocimiento facial
+            resize_factor (float): Factor de redimensionado del frame
+            access_logger (AccessLogger, optional): Logger donde registrar los accesos
+            reloader (GalleryReloader, optional): Vigilante cuya galería vigente deben usar los trabajadores
+            detector_backend (str): Detector de rostros de los trabajadores ("hog", "haar" o "dnn")
+            detector_params (dict, optional): Parámetros del detector
+            quality_params (dict, optional): Parámetros del filtro de calidad (None = sin filtro)
+            timings (CameraMetrics, optional): Métricas donde sumar los tiempos por etapa y los contadores
+        """
+        self.num_workers = num_workers or multiprocessing.cpu_count()
+        self.access_logger = access_logger
+        self.timings = timings
+        self.reloader = reloader
+        self._pool = multiprocessing.Pool(
+            processes=self.num_workers,
+            initializer=_init_worker,
+            initargs=(encodings_file, index_file, search_index, index_params, tolerance, resize_factor,
+                      detector_backend, detector_params, quality_params)
+        )
+        self._pending = {}
+        self._next_submit = 0
+        self._next_result = 0
+        self._closed = False
+
+    @property
+    def in_flight(self):
+        """Número de frames enviados cuyos resultados aún no se han recogido"""
+        return len(self._pending)
+
+    def submit(self, frame, camera_id=0, timestamp=None):
+        """
+        Envía un frame a los trabajadores
+
+        Args:
+            frame (numpy.ndarray): Frame a analizar
+            camera_id (int): ID de la cámara del frame
+            timestamp (datetime, optional): Momento del frame para los registros (por defecto, al reconocerlo)
+
+        Returns:
+            int: Número de orden asignado al frame
+        """
+        seq = self._next_submit
+        self._next_submit += 1
+        generation = self.reloader.gallery.generation if self.reloader else None
+        self._pending[seq] = self._pool.apply_async(_recognize_in_worker, ((seq, frame, camera_id, generation, timestamp),))
+        return seq
+
+    def next_result(self, timeout=None):
+        """
+        Recoge el siguiente resultado respetando el orden de envío
+
+        Args:
+            timeout (float, optional): Tiempo máximo de espera en segundos
+
+        Returns:
+            tuple: (orden, lista de tuplas (nombre, coordenadas, color, texto_acceso)),
+                   o None si no hay resultados pendientes o no llegó a tiempo. Un frame
+                   cuyo reconocimiento falló se devuelve sin rostros.
+        """
+        seq = self._next_result
+        async_result = self._pending.get(seq)
+        if async_result is None:
+            return None
+        try:
+            _, results, log_calls, stage_times = async_result.get(timeout)
+        except multiprocessing.TimeoutError:
+            return None
+        except Exception as e:
+            # El frame se da por procesado para que no bloquee a los siguientes
+            print(f"Error en el reconocimiento facial (frame {seq}): {e}")
+            results, log_calls, stage_times = [], [], []
+
+        del self._pending[seq]
+        self._next_result += 1
+
+        start = time.perf_counter()
+        if self.access_logger:
+            for kwargs in log_calls:
+                self.access_logger.log_access(**kwargs)
+        if self.timings is not None:
+            if log_calls and self.access_logger:
+                self.timings.add('log', time.perf_counter() - start)
+            for stage, seconds in stage_times:
+                self.timings.add(stage, seconds)
+            self.timings.observe_results(results)
+        return seq, results
+
+    def recognize(self, frame, camera_id=0):
+        """
+        Reconoce un frame de forma síncrona con el mismo contrato que recognize_faces
+
+        Returns:
+            list: Lista de tuplas (nombre, coordenadas, color, texto_acceso)
+        """
+        seq = self.submit(frame, camera_id)
+        while True:
+            item = self.next_result()
+            if item is not None and item[0] == seq:
+                return item[1]
+
+    def imap(self, frames, camera_id=0):
+        """
+        Reconoce una secuencia de frames en paralelo devolviendo los resultados en orden
+
+        Args:
+            frames (iterable): Frames a analizar
+            camera_id (int): ID de la cámara de los frames
+
+        Yields:
+            list: Resultados de cada frame, en el mismo orden que la entrada
+        """
+        for frame in frames:
+            self.submit(frame, camera_id)
+            if self.in_flight >= 2 * self.num_workers:
+                yield self.next_result()[1]
+        while self.in_flight:
+            yield self.next_result()[1]
+
+    def close(self, timeout=10.0):
+        """
+        Recoge los frames en vuelo (registrando sus accesos) y detiene los procesos trabajadores
+
+        Args:
+            timeout (float): Segundos máximos de espera; pasado ese tiempo se abandonan los
+                             frames pendientes y se terminan los procesos
+        """
+        if self._closed:
+            return
+        deadline = time.monotonic() + timeout
+        while self.in_flight and time.monotonic() < deadline:
+            self.next_result(timeout=max(0.0, deadline - time.monotonic()))
+        if self.in_flight:
+            print(f"Se descartan {self.in_flight} frames sin reconocer al cerrar el pool")
+            self.terminate()
+            return
+        self._closed = True
+        self._pool.close()
+        self._pool.join()
+
+    def terminate(self):
+        """Detiene los procesos trabajadores de inmediato, descartando los frames en vuelo (ruta de error)"""
+        if self._closed:
+            return
+        self._closed = True
+        self._pending.clear()
+        self._pool.terminate()
+        self._pool.join()
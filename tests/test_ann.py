@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from src.gallery import FaceGallery
+from src.ann import build_index, save_index, load_index, evaluate_recall
+
+def _clustered_gallery(size=4000, photos_per_employee=5, seed=1):
+    rng = np.random.default_rng(seed)
+    owners = np.arange(size) // photos_per_employee
+    centers = rng.normal(0.0, 0.09, (owners[-1] + 1, 128)).astype(np.float32)
+    encodings = centers[owners] + rng.normal(0.0, 0.03, (size, 128)).astype(np.float32)
+    return FaceGallery(encodings, [f"Empleado_{owner:04d}" for owner in owners])
+
+@pytest.mark.parametrize('backend', ['ivf', 'ivfpq'])
+def test_recall_against_exact_search(backend):
+    gallery = _clustered_gallery()
+    index = build_index(gallery, backend)
+    assert evaluate_recall(gallery, index, num_queries=300)['recall'] >= 0.95
+
+@pytest.mark.parametrize('backend', ['ivf', 'ivfpq'])
+def test_saved_index_is_reused_only_for_the_same_gallery(tmp_path, backend):
+    gallery = _clustered_gallery()
+    index = build_index(gallery, backend)
+    index_file = str(tmp_path / "index.npz")
+    save_index(index, gallery, index_file)
+
+    loaded = load_index(index_file, gallery, backend)
+    queries = gallery.encodings[:20]
+    np.testing.assert_array_equal(loaded.search(queries)[1], index.search(queries)[1])
+
+    assert load_index(index_file, _clustered_gallery(seed=2), backend) is None
+    assert load_index(index_file, gallery, 'ivf' if backend == 'ivfpq' else 'ivfpq') is None
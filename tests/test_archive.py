@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from src.archive import write_day_archive, iter_day_archive
+from src.logger import AccessLogger
+
+def _entries():
+    return [
+        {'timestamp': "2026-03-02 09:00:05", 'nombre': "Luis", 'acceso': "PERMITIDO", 'confianza': 0.75, 'camara_id': 1},
+        {'timestamp': "2026-03-02 09:00:00", 'nombre': "Ana", 'acceso': "PERMITIDO", 'confianza': 0.8125, 'camara_id': 0},
+        {'timestamp': "2026-03-02 10:30:00", 'nombre': "Desconocido", 'acceso': "DENEGADO", 'confianza': 0.0,
+         'camara_id': "rtsp://puerta", 'detecciones': 4}
+    ]
+
+def test_day_archive_round_trip(tmp_path):
+    path = str(tmp_path / "accesos_20260302.npz")
+    zone = write_day_archive(path, _entries())
+    assert zone['records'] == 3
+    assert zone['names'] == ["Ana", "Desconocido", "Luis"]
+
+    expected = sorted(_entries(), key=lambda entry: entry['timestamp'])
+    assert list(iter_day_archive(path)) == expected
+    assert [entry['nombre'] for entry in iter_day_archive(path, name="Luis")] == ["Luis"]
+    assert [entry['nombre'] for entry in iter_day_archive(path, camera_id="rtsp://puerta")] == ["Desconocido"]
+
+def test_archived_days_read_like_raw_partitions(tmp_path):
+    logger = AccessLogger(log_dir=str(tmp_path))
+    for entry in sorted(_entries(), key=lambda entry: entry['timestamp']):
+        logger.log_access(entry['nombre'], entry['acceso'] == "PERMITIDO", entry['confianza'],
+                          camera_id=entry['camara_id'],
+                          timestamp=datetime.strptime(entry['timestamp'], "%Y-%m-%d %H:%M:%S"))
+    before = list(logger.iter_access_history(end_date=datetime(2026, 3, 2, 23, 59, 59)))
+    rollups_before = logger.get_rollups(start_date=datetime(2026, 3, 2), end_date=datetime(2026, 3, 2, 23, 59, 59))
+
+    archived = logger.archive_closed_days(before_day="20260303")
+    assert [(day, records) for day, records, _, _ in archived] == [("20260302", 3)]
+    assert not (tmp_path / "accesos_20260302.jsonl").exists()
+
+    assert list(logger.iter_access_history(end_date=datetime(2026, 3, 2, 23, 59, 59))) == before
+    rollups_after = logger.get_rollups(start_date=datetime(2026, 3, 2), end_date=datetime(2026, 3, 2, 23, 59, 59))
+    assert rollups_after["20260302"]['records'] == rollups_before["20260302"]['records'] == 3
+    logger.close()
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from src.dedup import AccessEventCoalescer
+from src.logger import AccessLogger
+
+def test_one_event_per_identity_and_camera_per_window():
+    coalescer = AccessEventCoalescer(window=30.0)
+    emitted = [coalescer.observe("Ana", 0, t)[0] for t in (0.0, 1.0, 10.0, 29.0, 31.0)]
+    assert emitted == [True, False, False, False, True]
+
+    # Otra cámara u otra persona abren su propio episodio
+    assert coalescer.observe("Ana", 1, 32.0)[0]
+    assert coalescer.observe("Luis", 0, 32.0)[0]
+
+def test_closed_episode_summary():
+    coalescer = AccessEventCoalescer(window=5.0)
+    for t in (0.0, 1.0, 2.0):
+        coalescer.observe("Ana", 0, t)
+    emit, closed = coalescer.observe("Luis", 0, 8.0)
+    assert emit
+    assert closed == [{'nombre': "Ana", 'camara_id': 0, 'detecciones': 3, 'primera': 0.0, 'ultima': 2.0}]
+
+def test_unknowns_are_told_apart_by_encoding():
+    coalescer = AccessEventCoalescer(window=30.0, unknown_distance=0.5)
+    first = np.zeros(128)
+    second = np.full(128, 0.2)
+    assert coalescer.observe("Desconocido", 0, 0.0, first)[0]
+    assert not coalescer.observe("Desconocido", 0, 1.0, first + 0.01)[0]
+    assert coalescer.observe("Desconocido", 0, 2.0, second)[0]
+
+def test_logger_writes_only_coalesced_events(tmp_path):
+    logger = AccessLogger(log_dir=str(tmp_path), dedup_window=30.0, rollups=False)
+    start = datetime(2026, 3, 2, 9, 0, 0)
+    for seconds in range(0, 60, 2):
+        logger.log_access("Ana", True, 0.8, timestamp=start + timedelta(seconds=seconds))
+    logger.close()
+    assert [entry['timestamp'] for entry in logger.iter_access_history()] == ["2026-03-02 09:00:00", "2026-03-02 09:00:30"]
+
+def test_logger_records_every_event_by_default(tmp_path):
+    logger = AccessLogger(log_dir=str(tmp_path), rollups=False)
+    start = datetime(2026, 3, 2, 9, 0, 0)
+    for seconds in range(5):
+        logger.log_access("Ana", True, 0.8, timestamp=start + timedelta(seconds=seconds))
+    logger.close()
+    assert len(list(logger.iter_access_history())) == 5
@@ -0,0 +1,68 @@
+import os
+import numpy as np
+
+import src.recognition as recognition
+from src.encoding_cache import PhotoEncodingCache
+from src.store import open_gallery_store
+
+def _fake_photos(employees_dir, employees=400, photos_per_employee=5):
+    for e in range(employees):
+        employee_dir = os.path.join(employees_dir, f"Empleado_{e:04d}")
+        os.makedirs(employee_dir)
+        for p in range(photos_per_employee):
+            with open(os.path.join(employee_dir, f"foto_{p}.jpg"), 'wb') as f:
+                f.write(f"{e}/{p}".encode())
+
+def _count_encoder_calls(monkeypatch):
+    calls = []
+
+    def face_encodings(image, known_face_locations=None):
+        calls.append(image)
+        seed = sum(image)
+        return [np.random.default_rng(seed).normal(0.0, 0.1, 128)]
+
+    monkeypatch.setattr(recognition.face_recognition, 'load_image_file', lambda path: open(path, 'rb').read())
+    monkeypatch.setattr(recognition.face_recognition, 'face_encodings', face_encodings)
+    return calls
+
+def test_cache_round_trip_with_thousands_of_entries(tmp_path):
+    rng = np.random.default_rng(0)
+    cache = PhotoEncodingCache(str(tmp_path))
+    for i in range(5000):
+        encoding = rng.normal(size=128).astype(np.float32) if i % 7 else None
+        cache.entries[f"Empleado_{i // 5:04d}/foto_{i % 5}.jpg"] = (1_700_000_000_000_000_000 + i, 1000 + i, f"{i:040x}", encoding)
+    cache.save()
+
+    loaded = PhotoEncodingCache(str(tmp_path))
+    assert loaded.load() == 5000
+    for path, (mtime, size, digest, encoding) in cache.entries.items():
+        entry = loaded.entries[path]
+        assert entry[:3] == (mtime, size, digest)
+        if encoding is None:
+            assert entry[3] is None
+        else:
+            np.testing.assert_array_equal(entry[3], encoding)
+
+def test_second_run_reuses_every_cached_photo(tmp_path, monkeypatch):
+    employees_dir = str(tmp_path / "empleados")
+    encodings_file = str(tmp_path / "galeria")
+    _fake_photos(employees_dir)
+    calls = _count_encoder_calls(monkeypatch)
+
+    assert recognition.generate_encodings(employees_dir, encodings_file) == 2000
+    assert len(calls) == 2000
+    first_matrix, first_names, _ = open_gallery_store(encodings_file)
+    first_matrix = np.array(first_matrix)
+
+    calls.clear()
+    assert recognition.generate_encodings(employees_dir, encodings_file) == 2000
+    assert calls == []
+    matrix, names, _ = open_gallery_store(encodings_file)
+    np.testing.assert_array_equal(matrix, first_matrix)
+    assert names == first_names
+
+    # Solo se vuelve a codificar la foto modificada
+    with open(os.path.join(employees_dir, "Empleado_0003", "foto_1.jpg"), 'wb') as f:
+        f.write(b"otra foto")
+    recognition.generate_encodings(employees_dir, encodings_file)
+    assert len(calls) == 1
@@ -0,0 +1,29 @@
+import numpy as np
+
+from src.gallery import FaceGallery
+from src.index import CentroidIndex
+from src.ann import evaluate_recall
+
+def _clustered_gallery(size=2000, photos_per_employee=5, seed=1):
+    rng = np.random.default_rng(seed)
+    owners = np.arange(size) // photos_per_employee
+    centers = rng.normal(0.0, 0.09, (owners[-1] + 1, 128)).astype(np.float32)
+    encodings = centers[owners] + rng.normal(0.0, 0.03, (size, 128)).astype(np.float32)
+    return FaceGallery(encodings, [f"Empleado_{owner:04d}" for owner in owners])
+
+def test_centroid_index_recall_matches_exact_search():
+    gallery = _clustered_gallery()
+    index = CentroidIndex(gallery, top_k=5)
+    assert evaluate_recall(gallery, index, num_queries=300)['recall'] >= 0.99
+
+def test_centroid_index_gives_same_matches_as_exact_search():
+    gallery = _clustered_gallery()
+    rng = np.random.default_rng(2)
+    queries = gallery.encodings[rng.integers(0, len(gallery), 50)] + rng.normal(0.0, 0.02, (50, 128)).astype(np.float32)
+    exact = gallery.match(queries, tolerance=0.45)
+
+    gallery.index = CentroidIndex(gallery, top_k=5)
+    indexed = gallery.match(queries, tolerance=0.45)
+
+    np.testing.assert_array_equal(indexed[0], exact[0])
+    np.testing.assert_array_equal(indexed[2], exact[2])
@@ -0,0 +1,59 @@
+import json
+import os
+from datetime import datetime
+
+from src.logger import AccessLogger, convert_json_to_jsonl, read_log_entries
+
+def test_jsonl_log_appends_one_line_per_access(tmp_path):
+    logger = AccessLogger(log_dir=str(tmp_path), log_format="jsonl", rollups=False)
+    day = datetime(2026, 3, 2, 9, 0, 0)
+    logger.log_access("Ana", True, 0.81, timestamp=day)
+    json_path = logger.partition_paths("20260302")[1]
+    with open(json_path, 'rb') as f:
+        first = f.read()
+
+    logger.log_access("Desconocido", False, 0.0, camera_id=1, timestamp=day.replace(minute=1))
+    logger.close()
+
+    with open(json_path, 'rb') as f:
+        content = f.read()
+    # El archivo solo crece por el final: la primera línea no se reescribe
+    assert content.startswith(first)
+    lines = content.decode('utf-8').splitlines()
+    assert [json.loads(line)['nombre'] for line in lines] == ["Ana", "Desconocido"]
+    assert json.loads(lines[1])['acceso'] == "DENEGADO"
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    path = str(tmp_path / "accesos_20260302.jsonl")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({'timestamp': "2026-03-02 09:00:00", 'nombre': "Ana"}) + "\n")
+        f.write('{"timestamp": "2026-03-02 09:0')
+    assert [entry['nombre'] for entry in read_log_entries(path)] == ["Ana"]
+
+def test_convert_json_array_to_jsonl(tmp_path):
+    json_path = str(tmp_path / "accesos_20260302.json")
+    entries = [{'timestamp': f"2026-03-02 09:00:0{i}", 'nombre': f"E{i}"} for i in range(3)]
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(entries, f)
+
+    assert convert_json_to_jsonl(json_path, remove_source=True) == 3
+    assert not os.path.exists(json_path)
+    assert read_log_entries(str(tmp_path / "accesos_20260302.jsonl")) == entries
+
+def test_accesses_go_to_their_day_partition(tmp_path):
+    logger = AccessLogger(log_dir=str(tmp_path), log_format="jsonl", rollups=False)
+    logger.log_access("Ana", True, 0.8, timestamp=datetime(2026, 3, 1, 23, 59, 59))
+    logger.log_access("Luis", True, 0.7, timestamp=datetime(2026, 3, 2, 0, 0, 1))
+    logger.log_access("Ana", True, 0.9, timestamp=datetime(2026, 3, 3, 8, 0, 0))
+    logger.close()
+
+    for day in ("20260301", "20260302", "20260303"):
+        assert len(read_log_entries(str(tmp_path / f"accesos_{day}.jsonl"))) == 1
+        assert os.path.exists(tmp_path / f"accesos_{day}.csv")
+
+    history = list(logger.iter_access_history())
+    assert [entry['nombre'] for entry in history] == ["Ana", "Luis", "Ana"]
+
+    # Solo se leen las particiones del rango pedido
+    selected = logger.iter_access_history(start_date=datetime(2026, 3, 2), end_date=datetime(2026, 3, 2, 23, 59, 59))
+    assert [entry['nombre'] for entry in selected] == ["Luis"]
@@ -0,0 +1,45 @@
+import numpy as np
+
+from src.tracker import FaceTracker, iou_matrix
+
+def test_iou_matrix():
+    boxes_a = [(0, 10, 10, 0), (100, 110, 110, 100)]
+    boxes_b = [(0, 10, 10, 0), (5, 15, 15, 5), (50, 60, 60, 50)]
+    iou = iou_matrix(boxes_a, boxes_b)
+    assert iou.shape == (2, 3)
+    np.testing.assert_allclose(iou[0], [1.0, 25.0 / 175.0, 0.0], rtol=1e-5)
+    np.testing.assert_allclose(iou[1], [0.0, 0.0, 0.0])
+
+def test_identified_face_is_not_reencoded_until_interval():
+    tracker = FaceTracker(reencode_interval=3)
+    box = (10, 60, 60, 10)
+
+    (track, needs_encoding), = tracker.update([box])
+    assert needs_encoding
+    track.set_identity("Ana", 0.8, True)
+
+    # Pequeños movimientos: se conserva la identidad sin volver a codificar
+    for shift in (1, 2):
+        (same, needs_encoding), = tracker.update([(10 + shift, 60 + shift, 60 + shift, 10 + shift)])
+        assert same is track
+        assert not needs_encoding
+
+    # Cumplido el intervalo se vuelve a codificar
+    (_, needs_encoding), = tracker.update([(13, 63, 63, 13)])
+    assert needs_encoding
+
+def test_sharp_move_or_new_face_forces_encoding():
+    tracker = FaceTracker(reencode_interval=100)
+    (track, _), = tracker.update([(10, 60, 60, 10)])
+    track.set_identity("Ana", 0.8, True)
+
+    assignments = tracker.update([(10, 80, 60, 30), (200, 250, 250, 200)])
+    assert assignments[0][0] is track and assignments[0][1]
+    assert assignments[1][0] is not track and assignments[1][1]
+
+def test_lost_tracks_are_dropped():
+    tracker = FaceTracker(max_missed=2)
+    tracker.update([(10, 60, 60, 10)])
+    for _ in range(3):
+        tracker.update([])
+    assert tracker.tracks == []